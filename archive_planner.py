@@ -0,0 +1,71 @@
+"""
+Pemilih metode kompresi ZIP berdasarkan sampel isi file (action 7).
+
+Catatan:
+    - Beberapa blok kecil yang tersebar di seluruh file dicoba dikompres
+      dengan zlib; hasilnya menentukan metode untuk seluruh file:
+        * hampir tidak mengecil (JPEG, MP4, MP3, PDF terkompresi) -> ZIP_STORED
+        * level 9 tidak lebih kecil berarti dibanding level cepat -> level cepat
+        * selain itu -> level 9
+    - DEFLATE level 9 pada data yang sudah terkompresi menghabiskan CPU untuk
+      penghematan di bawah 1%; ZIP_STORED hanya menyalin data
+    - LZMA tidak dipakai walaupun didukung zipfile, karena banyak ekstraktor
+      bawaan (misalnya Windows Explorer) tidak bisa membukanya
+"""
+
+import zlib
+import zipfile
+
+SAMPLE_BLOCKS = 8  # Blocks sampled across the file
+SAMPLE_BLOCK_SIZE = 64 * 1024
+FAST_LEVEL = 1
+BEST_LEVEL = 9
+STORE_RATIO = 0.97  # Fast-level output at least this share of the input: store instead
+BEST_LEVEL_GAIN = 0.01  # Level 9 must save this share of the input over the fast level
+
+
+def sample_blocks(reader, size, count=SAMPLE_BLOCKS, block_size=SAMPLE_BLOCK_SIZE):
+    """
+    Membaca beberapa blok yang tersebar merata dari file seekable.
+
+    Parameter:
+        reader: File-like seekable, misalnya EncryptedFileReader
+        size (int): Ukuran file dalam byte
+
+    Return:
+        list: Blok bytes; seluruh file jika lebih kecil dari total sampel
+
+    Catatan:
+        - Posisi reader tidak dikembalikan; pemanggil melakukan seek(0)
+    """
+    if size <= count * block_size:
+        reader.seek(0)
+        return [reader.read(size)]
+    blocks = []
+    for i in range(count):
+        reader.seek(i * (size - block_size) // (count - 1))
+        blocks.append(reader.read(block_size))
+    return blocks
+
+
+def plan_zip(blocks):
+    """
+    Memilih metode dan level kompresi ZIP dari blok sampel.
+
+    Parameter:
+        blocks (list): Hasil sample_blocks()
+
+    Return:
+        tuple: (compress_type, compresslevel, perkiraan rasio ukuran hasil)
+               untuk zipfile.ZipFile; compresslevel None untuk ZIP_STORED
+    """
+    total = sum(len(block) for block in blocks)
+    if not total:
+        return zipfile.ZIP_STORED, None, 1.0
+    fast = sum(len(zlib.compress(block, FAST_LEVEL)) for block in blocks)
+    if fast >= total * STORE_RATIO:
+        return zipfile.ZIP_STORED, None, 1.0
+    best = sum(len(zlib.compress(block, BEST_LEVEL)) for block in blocks)
+    if fast - best < total * BEST_LEVEL_GAIN:
+        return zipfile.ZIP_DEFLATED, FAST_LEVEL, fast / total
+    return zipfile.ZIP_DEFLATED, BEST_LEVEL, best / total
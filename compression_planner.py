@@ -0,0 +1,253 @@
+"""
+Perencana kompresi berbasis target ukuran untuk gambar (action 4) dan PDF (action 5).
+
+Catatan:
+    - Ukuran hasil diperkirakan dari sampel kecil (tile gambar, beberapa
+      gambar terbesar di PDF, atau beberapa halaman), bukan dengan
+      meng-encode seluruh output berkali-kali
+    - Kualitas JPEG dicari dengan binary search pada sampel; hasil akhirnya
+      di-encode sekali saja dengan parameter yang dipilih
+    - Perkiraan bytes per piksel dari sampel dikalikan jumlah piksel output,
+      ditambah overhead header JPEG yang diukur terpisah
+"""
+
+import math
+from io import BytesIO
+
+TILE_SIZE = 128  # Output pixels per side of one sample tile
+TILES_PER_AXIS = 3
+QUALITY_FLOOR = 35
+SAMPLE_IMAGES = 3  # Largest images sampled when planning a PDF
+SAMPLE_PAGES = 3  # Pages sampled when planning a rasterized PDF
+PDF_DPI_LADDER = (150, 120, 96, 72)
+RASTER_LADDER = ((0.5, 40), (0.4, 30), (0.3, 20), (0.25, 10))  # (scale, quality), gentlest first
+
+
+def _jpeg_size(img, quality):
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.tell()
+
+
+def search_quality(estimate, target_bytes, low, high):
+    """
+    Mencari kualitas JPEG tertinggi yang perkiraan ukurannya tidak melebihi target.
+
+    Parameter:
+        estimate (callable): Fungsi quality -> perkiraan ukuran dalam byte
+        target_bytes (int): Ukuran maksimum
+        low, high (int): Rentang kualitas yang boleh dipakai
+
+    Return:
+        int atau None: Kualitas terpilih, None jika kualitas terendah pun melebihi target
+    """
+    if estimate(low) > target_bytes:
+        return None
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate(middle) <= target_bytes:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class JpegSizeEstimator:
+    """
+    Memperkirakan ukuran JPEG seluruh gambar dari beberapa tile sampel.
+
+    Parameter:
+        img (PIL.Image): Gambar sumber dalam mode RGB atau L
+        tiles_per_axis (int): Jumlah tile per sisi (grid tiles_per_axis^2)
+        tile_size (int): Ukuran sisi tile pada skala output
+    """
+
+    def __init__(self, img, tiles_per_axis=TILES_PER_AXIS, tile_size=TILE_SIZE):
+        self.img = img
+        self.tiles_per_axis = tiles_per_axis
+        self.tile_size = tile_size
+        self._cache = {}
+        self._overhead = {}
+
+    def _header_overhead(self, quality):
+        # Headers and Huffman/quantization tables, paid once per JPEG
+        if quality not in self._overhead:
+            self._overhead[quality] = _jpeg_size(self.img.crop((0, 0, 8, 8)), quality)
+        return self._overhead[quality]
+
+    def estimate(self, scale, quality):
+        """
+        Return:
+            int: Perkiraan ukuran JPEG gambar yang di-resize dengan skala scale
+        """
+        key = (scale, quality)
+        if key in self._cache:
+            return self._cache[key]
+        from PIL import Image
+
+        width, height = self.img.size
+        out_width, out_height = max(1, round(width * scale)), max(1, round(height * scale))
+        sample_pixels = (self.tiles_per_axis * self.tile_size) ** 2
+        if out_width * out_height <= sample_pixels:
+            # Small enough to measure exactly
+            size = _jpeg_size(self.img.resize((out_width, out_height), Image.Resampling.LANCZOS), quality)
+        else:
+            box = min(width, max(1, round(self.tile_size / scale))), min(height, max(1, round(self.tile_size / scale)))
+            overhead = self._header_overhead(quality)
+            data_bytes = 0
+            pixels = 0
+            for row in range(self.tiles_per_axis):
+                for column in range(self.tiles_per_axis):
+                    # Tile centres spread evenly over the image
+                    left = round((width - box[0]) * (column + 0.5) / self.tiles_per_axis)
+                    top = round((height - box[1]) * (row + 0.5) / self.tiles_per_axis)
+                    tile = self.img.crop((left, top, left + box[0], top + box[1]))
+                    tile_size = (max(1, round(box[0] * scale)), max(1, round(box[1] * scale)))
+                    tile = tile.resize(tile_size, Image.Resampling.LANCZOS)
+                    data_bytes += max(0, _jpeg_size(tile, quality) - overhead)
+                    pixels += tile_size[0] * tile_size[1]
+            size = round(data_bytes / pixels * out_width * out_height) + overhead
+        self._cache[key] = size
+        return size
+
+
+def plan_image(img, target_bytes, max_scale, max_quality, min_scale=0.4, min_quality=QUALITY_FLOOR):
+    """
+    Memilih skala dan kualitas JPEG agar gambar tidak melebihi target ukuran.
+
+    Parameter:
+        img (PIL.Image): Gambar sumber (RGB atau L)
+        target_bytes (int): Ukuran hasil yang diinginkan
+        max_scale, max_quality: Pengaturan paling ringan yang boleh dipakai
+        min_scale, min_quality: Batas paling agresif
+
+    Return:
+        tuple: (scale, quality, perkiraan ukuran)
+
+    Catatan:
+        - Urutan: turunkan kualitas sampai 50 pada max_scale, lalu perkecil
+          skala, lalu turunkan kualitas sampai min_quality; jika target tetap
+          tidak tercapai, pengaturan paling agresif yang dipakai
+    """
+    estimator = JpegSizeEstimator(img)
+    mid_quality = max(min_quality, min(50, max_quality))
+
+    quality = search_quality(lambda q: estimator.estimate(max_scale, q), target_bytes, mid_quality, max_quality)
+    if quality is not None:
+        return max_scale, quality, estimator.estimate(max_scale, quality)
+
+    if min_scale < max_scale:
+        # Size scales with pixel count, so shrink both sides by sqrt(ratio)
+        ratio = target_bytes / estimator.estimate(max_scale, mid_quality)
+        scale = max(min_scale, round(max_scale * math.sqrt(ratio) * 0.95, 3))
+        if estimator.estimate(scale, mid_quality) <= target_bytes:
+            return scale, mid_quality, estimator.estimate(scale, mid_quality)
+
+    quality = search_quality(lambda q: estimator.estimate(min_scale, q), target_bytes, min_quality, mid_quality)
+    quality = quality if quality is not None else min_quality
+    return min_scale, quality, estimator.estimate(min_scale, quality)
+
+
+def plan_pdf_images(doc, original_size, target_bytes, max_quality=75, dpi_ladder=PDF_DPI_LADDER,
+                    min_quality=QUALITY_FLOOR, check=None):
+    """
+    Memilih max_dpi dan kualitas JPEG untuk pdf_optimizer.optimize_pdf().
+
+    Parameter:
+        doc (fitz.Document): Dokumen sumber
+        original_size (int): Ukuran file asli
+        target_bytes (int): Ukuran hasil yang diinginkan
+        check (callable): Dipanggil di antara sampel untuk pembatalan, boleh None
+
+    Return:
+        tuple: (max_dpi, quality, perkiraan ukuran), atau None jika dokumen
+               tidak punya gambar yang bisa dioptimasi
+
+    Catatan:
+        - Hanya SAMPLE_IMAGES gambar terbesar yang didekode; bytes per piksel
+          mereka dipakai untuk semua gambar
+        - Bagian non-gambar diperkirakan dari ukuran asli dikurangi stream gambar
+    """
+    from PIL import Image
+    from pdf_optimizer import collect_images, target_size
+    import fitz  # PyMuPDF
+
+    images = collect_images(doc)
+    raw_sizes = {xref: len(doc.xref_stream_raw(xref)) for xref in images}
+    if not images:
+        return None
+    other_bytes = max(0, original_size - sum(raw_sizes.values()))
+
+    samples = []
+    for xref in sorted(images, key=lambda x: images[x]['width'] * images[x]['height'], reverse=True):
+        if len(samples) >= SAMPLE_IMAGES:
+            break
+        if check:
+            check()
+        try:
+            pix = fitz.Pixmap(doc, xref)
+            if pix.alpha or pix.colorspace is None:
+                continue
+            if pix.colorspace.n not in (1, 3):
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+            mode = 'L' if pix.n == 1 else 'RGB'
+            samples.append((xref, JpegSizeEstimator(Image.frombytes(mode, (pix.width, pix.height), pix.samples))))
+        except Exception:
+            continue
+    if not samples:
+        return None
+
+    def estimate(max_dpi, quality):
+        # Bytes per output pixel, averaged over the sampled images
+        data_bytes = 0
+        pixels = 0
+        for xref, estimator in samples:
+            info = images[xref]
+            size = target_size(info, max_dpi)
+            scale = size[0] / info['width']
+            data_bytes += estimator.estimate(scale, quality)
+            pixels += size[0] * size[1]
+        bytes_per_pixel = data_bytes / pixels if pixels else 0
+        total = other_bytes
+        for xref, info in images.items():
+            size = target_size(info, max_dpi)
+            # The optimizer keeps the original stream when re-encoding is not smaller
+            total += min(raw_sizes[xref], round(bytes_per_pixel * size[0] * size[1]))
+        return total
+
+    for max_dpi in dpi_ladder:
+        quality = search_quality(lambda q: estimate(max_dpi, q), target_bytes, min_quality, max_quality)
+        if quality is not None:
+            return max_dpi, quality, estimate(max_dpi, quality)
+    return dpi_ladder[-1], min_quality, estimate(dpi_ladder[-1], min_quality)
+
+
+def plan_raster(doc, target_bytes, ladder=RASTER_LADDER, check=None):
+    """
+    Memilih skala dan kualitas rasterisasi halaman dari beberapa halaman sampel.
+
+    Parameter:
+        doc (fitz.Document): Dokumen sumber
+        target_bytes (int): Ukuran hasil yang diinginkan
+        ladder: Daftar (scale, quality), dari yang paling ringan
+
+    Return:
+        tuple: (scale, quality) paling ringan yang perkiraannya memenuhi target,
+               atau pengaturan terakhir di ladder
+    """
+    import fitz  # PyMuPDF
+
+    page_count = len(doc)
+    if page_count == 0:
+        return ladder[-1]
+    step = max(1, page_count // SAMPLE_PAGES)
+    sample_pages = list(range(0, page_count, step))[:SAMPLE_PAGES]
+    for scale, quality in ladder:
+        if check:
+            check()
+        matrix = fitz.Matrix(scale, scale)
+        sample_bytes = sum(len(doc[number].get_pixmap(matrix=matrix).tobytes("jpeg", jpg_quality=quality))
+                           for number in sample_pages)
+        if sample_bytes / len(sample_pages) * page_count <= target_bytes:
+            return scale, quality
+    return ladder[-1]
@@ -0,0 +1,1173 @@
+"""
+Job konversi RupaGanti yang dijalankan di dalam proses worker.
+
+Catatan:
+    - Setiap job menerima path file terenkripsi (input) dan menulis hasilnya
+      ke file terenkripsi baru (output), sehingga data besar tidak pernah
+      dikirim lewat pickle antar proses
+    - Kunci enkripsi diberikan sekali lewat init_worker() saat worker dibuat
+    - Modul ini tidak boleh mengimpor rupaganti_bot: worker dengan metode
+      'spawn' hanya mengimpor modul ini beserta modul yang diimpornya
+      (secure_storage, tool_runner, planner, ...), sehingga modul-modul
+      tersebut juga tidak boleh bergantung pada objek bot
+    - Pembatalan dan timeout bersifat kooperatif: job memanggil ctx.check()
+      di antara langkah berat; tool eksternal dijalankan lewat tool_runner
+      yang ikut memanggil ctx.check() dan membatasi jumlah proses gs/ffmpeg
+    - Rasterisasi PDF dibagi per rentang halaman ke pool proses render per
+      job, karena PyMuPDF tidak melepas GIL; konversi PDF ke Word dibagi
+      dengan cara yang sama ke pool pdf2docx per job
+"""
+
+import os
+import time
+import shutil
+import zipfile
+import multiprocessing
+import subprocess
+import concurrent.futures
+from io import BytesIO
+
+import secure_storage
+import tool_runner
+from pdf_optimizer import optimize_pdf
+from pdf_text_docx import write_pdf_text_docx
+from archive_planner import plan_zip, sample_blocks
+from zip_bundle import compress_member, unique_name, write_bundle
+from compression_planner import plan_image, plan_pdf_images, plan_raster
+from media_pipeline import (probe_command, parse_probe, extract_audio_command,
+                            audio_mp3_command, video_mp4_command, ProgressParser)
+
+MIN_COMPRESSION_TARGET = 0.5  # Keep in sync with rupaganti_bot.MIN_COMPRESSION_TARGET
+RASTER_MAX_WORKERS = 8  # Upper bound on render processes per rasterizing job
+RASTER_PAGES_PER_TASK = 8  # Pages rendered per render task
+PDF_OPTIMIZE_DEFAULT = (150, 60)  # (max image DPI, JPEG quality) when there is nothing to plan
+PLANNED_COMPRESSION_MIN_SIZE = 1024 * 1024  # Smaller images keep the fixed size-tier settings
+ZIP_CHUNK_SIZE = 1024 * 1024  # Plaintext read and compressed per step when zipping
+ZIP64_THRESHOLD = 2 ** 31 - 1  # Larger entries need ZIP64 headers up front on a non-seekable output
+IMAGE_BATCH_THREADS = min(4, os.cpu_count() or 1)  # Images processed at once in one batch job
+IMAGE_BATCH_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'compress': 'jpg'}
+WORD_WORKERS = min(4, os.cpu_count() or 1)  # pdf2docx processes per PDF-to-Word job
+WORD_PAGES_PER_TASK = 10  # Pages converted by pdf2docx per task
+PDF_TO_WORD_RESERVE = 45  # Seconds before the job deadline kept for the text fallback and stitching
+PLANNED_MIN_SCALE = 0.4  # Smallest scale plan_image() may choose; images are decoded at least this large
+
+_ENCRYPTION_KEY = None
+_WORKER_COUNT = 1
+
+
+class JobCancelled(Exception):
+    """Job dibatalkan oleh pengguna atau karena sesi berakhir."""
+
+
+class JobTimeout(Exception):
+    """Job melewati batas waktu yang diberikan."""
+
+
+def init_worker(encryption_key, tool_slots=None, worker_count=1):
+    """
+    Initializer untuk setiap proses worker.
+
+    Parameter:
+        encryption_key (bytes): Kunci AES-256 milik proses bot
+        tool_slots (dict): Semaphore dari tool_runner.create_slots(), boleh None
+        worker_count (int): Jumlah worker di pool konversi, untuk membagi CPU
+
+    Return:
+        Tidak ada
+    """
+    global _ENCRYPTION_KEY, _WORKER_COUNT
+    _ENCRYPTION_KEY = encryption_key
+    _WORKER_COUNT = max(1, worker_count)
+    tool_runner.configure(tool_slots)
+
+
+class JobContext:
+    """
+    Konteks eksekusi satu job di dalam worker.
+
+    Parameter:
+        job_id (str): ID job
+        work_dir (str): Direktori kerja khusus job (dibuat oleh proses bot)
+        deadline (float): Batas waktu absolut (time.time()), None jika tanpa batas
+
+    Catatan:
+        - Pembatalan ditandai oleh proses bot dengan membuat file CANCEL_MARKER
+          di work_dir, sehingga tidak perlu shared memory antar proses
+        - Progress ditulis ke file PROGRESS_FILE di work_dir dengan cara yang
+          sama, lalu dibaca oleh proses bot
+        - Selama handler berjalan, PID worker ada di PID_FILE sehingga proses
+          bot bisa mematikan worker yang macet melewati deadline
+    """
+
+    CANCEL_MARKER = '.cancel'
+    PROGRESS_FILE = '.progress'
+    PID_FILE = '.pid'
+    PROGRESS_INTERVAL = 1.0  # Minimum seconds between progress writes
+
+    def __init__(self, job_id, work_dir, deadline=None):
+        self.job_id = job_id
+        self.work_dir = work_dir
+        self.deadline = deadline
+        self._progress_time = 0.0
+
+    def cancelled(self):
+        return os.path.exists(os.path.join(self.work_dir, self.CANCEL_MARKER))
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def check(self):
+        """
+        Raise JobCancelled/JobTimeout jika job harus berhenti.
+        """
+        if self.cancelled():
+            raise JobCancelled(self.job_id)
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise JobTimeout(self.job_id)
+
+    def path(self, name):
+        return os.path.join(self.work_dir, name)
+
+    def report_progress(self, fraction):
+        """
+        Mencatat fraksi selesai (0-1) untuk ditampilkan oleh proses bot.
+
+        Catatan:
+            - Dibatasi satu penulisan per PROGRESS_INTERVAL, kecuali 1.0
+        """
+        now = time.monotonic()
+        if fraction < 1.0 and now - self._progress_time < self.PROGRESS_INTERVAL:
+            return
+        self._progress_time = now
+        temp_path = self.path(self.PROGRESS_FILE + '.tmp')
+        try:
+            with open(temp_path, 'w') as f:
+                f.write(f"{fraction:.3f}")
+            os.replace(temp_path, self.path(self.PROGRESS_FILE))
+        except OSError:
+            pass  # Progress is cosmetic; the bot may be reading the file right now
+
+
+def open_input(path):
+    """
+    Membuka file input terenkripsi sebagai reader seekable.
+    """
+    return secure_storage.EncryptedFileReader(path, _ENCRYPTION_KEY)
+
+
+def open_output(path):
+    """
+    Membuka file output terenkripsi sebagai writer streaming.
+    """
+    return secure_storage.EncryptedFileWriter(path, _ENCRYPTION_KEY)
+
+
+def decrypt_input(ctx, path, name):
+    """
+    Mendekripsi input ke work_dir untuk tool yang butuh file biasa.
+
+    Return:
+        str: Path file plaintext di work_dir
+    """
+    dest = ctx.path(name)
+    secure_storage.decrypt_to_file(path, dest, _ENCRYPTION_KEY)
+    return dest
+
+
+def encrypt_output(ctx, source_path, output_path):
+    """
+    Mengenkripsi file hasil tool eksternal ke output lalu menghapus plaintext-nya.
+
+    Return:
+        int: Ukuran hasil dalam byte
+    """
+    with open(source_path, 'rb') as src, open_output(output_path) as writer:
+        shutil.copyfileobj(src, writer, 1024 * 1024)
+    os.remove(source_path)
+    return writer.bytes_written
+
+
+def write_output(output_path, data):
+    """
+    Menulis bytes hasil konversi ke file output terenkripsi.
+
+    Return:
+        int: Ukuran hasil dalam byte
+    """
+    with open_output(output_path) as writer:
+        writer.write(data)
+    return writer.bytes_written
+
+
+def run_tool(ctx, args, stdin=None, stdout=None, on_stderr_line=None):
+    """
+    Menjalankan tool eksternal (ffmpeg, gs) lewat tool_runner.
+
+    Parameter:
+        args (list): Perintah tool
+        stdin, stdout: File-like untuk dialirkan ke/dari tool, boleh None
+        on_stderr_line (callable): Penerima setiap baris stderr, boleh None
+
+    Catatan:
+        - Timeout adalah timeout tool itu sendiri, dibatasi sisa waktu job
+        - Akan raise JobCancelled/JobTimeout jika job dibatalkan atau melewati
+          deadline; tool langsung di-kill
+        - Akan raise ToolTimeout jika hanya timeout tool yang habis, dan
+          CalledProcessError jika tool gagal
+    """
+    ctx.check()
+    timeout = tool_runner.TOOL_TIMEOUTS.get(os.path.basename(args[0]))
+    remaining = ctx.remaining()
+    if remaining is not None:
+        timeout = remaining if timeout is None else min(timeout, remaining)
+    try:
+        return tool_runner.run(args, check=ctx.check, timeout=timeout, stdin=stdin, stdout=stdout,
+                               cwd=ctx.work_dir, on_stderr_line=on_stderr_line)
+    except tool_runner.ToolTimeout:
+        ctx.check()  # Report the job deadline rather than the tool timeout when both passed
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Image jobs (actions 1-4)
+# ---------------------------------------------------------------------------
+
+def _flatten_alpha(img):
+    """
+    Mengubah gambar ke RGB, mengomposit transparansi ke latar putih.
+
+    Catatan:
+        - Komposit hanya dilakukan jika alpha benar-benar dipakai; gambar
+          RGBA yang seluruhnya opaque cukup dikonversi
+        - Alpha dipakai langsung sebagai mask, tanpa split() yang menyalin
+          setiap band
+    """
+    from PIL import Image
+    if img.mode == 'P':
+        img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+    if img.mode in ('RGBA', 'LA'):
+        if img.getextrema()[-1][0] == 255:
+            return img.convert('RGB')  # Alpha channel present but fully opaque
+        # Create white background for transparency
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, (0, 0), img)
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def _load_reduced(img, min_size):
+    """
+    Mendekode gambar langsung ke ukuran sekecil mungkin yang masih >= min_size.
+
+    Parameter:
+        img (PIL.Image): Gambar yang baru dibuka (belum di-load)
+        min_size (tuple): Ukuran terkecil yang masih dibutuhkan
+
+    Return:
+        PIL.Image: Gambar RGB tanpa alpha
+
+    Catatan:
+        - JPEG memakai draft(): decoder menskala 1/2, 1/4, atau 1/8 di domain
+          DCT sehingga piksel ukuran penuh tidak pernah dibuat
+        - Format lain diperkecil dengan reduce() (box filter kelipatan bulat)
+          sebelum komposit alpha dan resize LANCZOS akhir
+    """
+    img.draft('RGB', min_size)
+    if img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        img = _flatten_alpha(img)  # reduce() does not support palette/CMYK/16-bit modes
+    factor = min(img.width // min_size[0], img.height // min_size[1])
+    if factor >= 2:
+        img = img.reduce(factor)
+    return _flatten_alpha(img)
+
+
+def _convert_image(ctx, reader, target, output):
+    """
+    Mengonversi satu gambar ke format target dan menulisnya ke output.
+    """
+    from PIL import Image
+    with Image.open(reader) as img:
+        if target == 'JPEG':
+            img = _flatten_alpha(img)
+            save_args = {'quality': 95, 'optimize': True}
+        elif target == 'PNG':
+            # Ensure proper PNG format
+            if img.mode not in ('RGBA', 'RGB', 'L', 'P'):
+                img = img.convert('RGBA')
+            save_args = {'optimize': True}
+        else:
+            # WebP supports both RGB and RGBA
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGB')
+            save_args = {'quality': 95, 'method': 6}
+        ctx.check()
+        img.save(output, format=target, **save_args)
+
+
+def job_image_convert(ctx, params):
+    """
+    Konversi gambar ke JPEG, PNG, atau WebP (action 1-3).
+
+    Parameter (params):
+        input_path, output_path, format ('JPEG', 'PNG', 'WEBP')
+    """
+    with open_input(params['input_path']) as reader, open_output(params['output_path']) as writer:
+        _convert_image(ctx, reader, params['format'], writer)
+    return {'output_path': params['output_path'], 'output_size': writer.bytes_written}
+
+
+def _compress_image(ctx, reader, output):
+    """
+    Mengompres satu gambar ke JPEG dan menulisnya ke output.
+
+    Parameter:
+        reader: Input seekable dengan atribut size (EncryptedFileReader)
+        output: File-like tujuan
+
+    Catatan:
+        - Skala dan kualitas awal ditentukan oleh ukuran gambar
+        - Untuk file > 1MB, plan_image() menurunkan kualitas/skala sampai
+          perkiraan ukuran memenuhi MIN_COMPRESSION_TARGET, dari tile sampel
+        - Gambar di-encode penuh hanya sekali
+        - Gambar didekode langsung pada skala terkecil yang mungkin dipakai
+          (_load_reduced), bukan pada resolusi penuh
+    """
+    from PIL import Image
+    original_size = reader.size
+    with Image.open(reader) as img:
+        # The header is enough to choose the settings; nothing is decoded yet
+        width, height = img.size
+
+        # Smart compression based on image size
+        if width * height > 2000000:  # Large image (>2MP)
+            scale, quality = 0.5, 60
+        elif width * height > 500000:  # Medium image (>0.5MP)
+            scale, quality = 0.7, 70
+        else:
+            # Light compression for small images
+            scale, quality = 0.8, 80
+
+        planned = original_size > PLANNED_COMPRESSION_MIN_SIZE
+        min_scale = min(scale, PLANNED_MIN_SCALE) if planned else scale
+        img = _load_reduced(img, (max(1, int(width * min_scale)), max(1, int(height * min_scale))))
+        ctx.check()
+        # Scales below are relative to the decoded (possibly reduced) image
+        loaded = img.width / width
+        scale, min_scale = min(1.0, scale / loaded), min(1.0, min_scale / loaded)
+
+        if planned:
+            target_bytes = original_size * (1 - MIN_COMPRESSION_TARGET)
+            scale, quality, _ = plan_image(img, target_bytes, scale, quality, min_scale=min_scale)
+            ctx.check()
+
+        new_size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+        if new_size != img.size:
+            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        img.save(output, format='JPEG', quality=quality, optimize=True)
+
+
+def job_image_compress(ctx, params):
+    """
+    Kompresi gambar dengan resize + JPEG (action 4).
+
+    Parameter (params):
+        input_path, output_path
+    """
+    with open_input(params['input_path']) as reader:
+        original_size = reader.size
+        output = BytesIO()
+        _compress_image(ctx, reader, output)
+
+    size = write_output(params['output_path'], output.getbuffer())
+    return {'output_path': params['output_path'], 'output_size': size, 'original_size': original_size}
+
+
+def _batch_name(name, extension, used):
+    # Same stem with the new extension; numbered when two images share a stem
+    stem = os.path.splitext(os.path.basename(name))[0] or 'image'
+    candidate = f"{stem}.{extension}"
+    number = 2
+    while candidate in used:
+        candidate = f"{stem}_{number}.{extension}"
+        number += 1
+    used.add(candidate)
+    return candidate
+
+
+def job_image_batch(ctx, params):
+    """
+    Menerapkan satu operasi gambar ke banyak gambar sekaligus (mode album).
+
+    Parameter (params):
+        inputs: Daftar [input_path, nama_asli]
+        operation: 'JPEG', 'PNG', 'WEBP', atau 'compress'
+        archive (bool): True untuk satu ZIP di output_path, False untuk
+                        output terpisah per gambar di work_dir
+        output_path
+
+    Return:
+        dict: output_path (ZIP atau None), output_size, original_size,
+              outputs [{'output_path', 'name', 'output_size'}] jika bukan ZIP,
+              failed [nama gambar yang gagal]
+
+    Catatan:
+        - Gambar diproses paralel di IMAGE_BATCH_THREADS thread; decode,
+          resize, dan encode Pillow melepas GIL
+        - Hasil ditulis sesuai urutan input; gambar yang gagal dilewati dan
+          dilaporkan, kecuali semuanya gagal
+        - Gambar di ZIP disimpan tanpa kompresi (ZIP_STORED) karena sudah
+          terkompresi
+    """
+    operation = params['operation']
+    extension = IMAGE_BATCH_EXTENSIONS[operation]
+
+    def process(input_path):
+        ctx.check()
+        output = BytesIO()
+        with open_input(input_path) as reader:
+            original_size = reader.size
+            if operation == 'compress':
+                _compress_image(ctx, reader, output)
+            else:
+                _convert_image(ctx, reader, operation, output)
+        return output, original_size
+
+    used = set()
+    names = [_batch_name(name, extension, used) for _, name in params['inputs']]
+    outputs = []
+    failed = []
+    original_total = 0
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=IMAGE_BATCH_THREADS)
+    try:
+        futures = [pool.submit(process, input_path) for input_path, _ in params['inputs']]
+
+        def results():
+            nonlocal original_total
+            for future, name, (_, original_name) in zip(futures, names, params['inputs']):
+                try:
+                    output, original_size = future.result()
+                except (JobCancelled, JobTimeout):
+                    raise
+                except Exception:
+                    failed.append(original_name)
+                    continue
+                original_total += original_size
+                yield name, output
+
+        if params.get('archive'):
+            with open_output(params['output_path']) as writer:
+                with zipfile.ZipFile(writer, 'w', zipfile.ZIP_STORED) as zipf:
+                    for name, output in results():
+                        zipf.writestr(name, output.getbuffer())
+                if len(failed) == len(names):
+                    raise ValueError("No image could be processed")
+            return {'output_path': params['output_path'], 'output_size': writer.bytes_written,
+                    'original_size': original_total, 'outputs': [], 'failed': failed}
+
+        for index, (name, output) in enumerate(results()):
+            output_path = ctx.path(f"image_{index}.enc")
+            outputs.append({'output_path': output_path, 'name': name,
+                            'output_size': write_output(output_path, output.getbuffer())})
+        if not outputs:
+            raise ValueError("No image could be processed")
+        return {'output_path': None, 'output_size': sum(item['output_size'] for item in outputs),
+                'original_size': original_total, 'outputs': outputs, 'failed': failed}
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ---------------------------------------------------------------------------
+# PDF jobs (actions 5, 8, 9)
+# ---------------------------------------------------------------------------
+
+def _render_page_range(pdf_path, start, stop, scale, jpg_quality):
+    """
+    Merender halaman [start, stop) ke JPEG (dijalankan di proses render).
+
+    Return:
+        list: (jpeg_bytes, lebar, tinggi) per halaman, sesuai urutan
+    """
+    import fitz  # PyMuPDF
+    matrix = fitz.Matrix(scale, scale)
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for number in range(start, stop):
+            page = doc[number]
+            pix = page.get_pixmap(matrix=matrix)
+            pages.append((pix.tobytes("jpeg", jpg_quality=jpg_quality), page.rect.width, page.rect.height))
+    return pages
+
+
+def _raster_workers():
+    # Share the CPUs with the other conversion workers instead of claiming all of them
+    return max(1, min(RASTER_MAX_WORKERS, (os.cpu_count() or 1) // _WORKER_COUNT))
+
+
+def _rendered_pages(ctx, pdf_path, page_count, scale, jpg_quality):
+    """
+    Menghasilkan halaman yang sudah dirender, sesuai urutan halaman.
+
+    Catatan:
+        - Dokumen kecil, atau jika CPU sudah habis dibagi ke worker konversi,
+          dirender langsung di proses ini
+        - Dokumen besar dibagi per RASTER_PAGES_PER_TASK halaman ke pool
+          render milik job ini; hasil dibaca berurutan sehingga halaman bisa
+          langsung dimasukkan ke dokumen output tanpa menunggu semua selesai
+        - Pool dimatikan setelah job selesai, dibatalkan, atau timeout; render
+          yang belum dimulai dibatalkan
+    """
+    ranges = [(start, min(start + RASTER_PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, RASTER_PAGES_PER_TASK)]
+    workers = min(_raster_workers(), len(ranges))
+    if workers <= 1:
+        for start, stop in ranges:
+            ctx.check()
+            yield from _render_page_range(pdf_path, start, stop, scale, jpg_quality)
+        return
+
+    pool = concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        futures = [pool.submit(_render_page_range, pdf_path, start, stop, scale, jpg_quality)
+                   for start, stop in ranges]
+        for future in futures:
+            while True:
+                ctx.check()
+                try:
+                    pages = future.result(timeout=0.5)
+                    break
+                except concurrent.futures.TimeoutError:
+                    continue
+            yield from pages
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _rasterize_pdf(ctx, pdf_path, scale, jpg_quality, output):
+    """
+    Membuat ulang PDF dari gambar JPEG tiap halaman.
+
+    Parameter:
+        pdf_path (str): PDF plaintext di work_dir
+        scale (float): Skala render
+        jpg_quality (int): Kualitas JPEG
+        output: Writer tujuan
+
+    Return:
+        int: Jumlah halaman
+    """
+    import fitz  # PyMuPDF
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+    new_doc = fitz.open()
+    try:
+        for img_data, width, height in _rendered_pages(ctx, pdf_path, page_count, scale, jpg_quality):
+            new_page = new_doc.new_page(width=width, height=height)
+            new_page.insert_image(new_page.rect, stream=img_data)
+        # Use maximum compression settings
+        new_doc.save(output, garbage=4, deflate=True, clean=True)
+        return page_count
+    finally:
+        new_doc.close()
+
+
+GHOSTSCRIPT_PRESETS = {
+    # More aggressive compression settings
+    'screen': ['-dPDFSETTINGS=/screen',
+               '-dDownsampleColorImages=true', '-dColorImageResolution=72',
+               '-dCompatibilityLevel=1.4', '-dEmbedAllFonts=false', '-dSubsetFonts=true'],
+    # More balanced settings to maintain readability
+    'ebook': ['-dPDFSETTINGS=/ebook',
+              '-dDownsampleColorImages=true', '-dColorImageResolution=150',
+              '-dDownsampleGrayImages=true', '-dGrayImageResolution=150',
+              '-dDownsampleMonoImages=true', '-dMonoImageResolution=150',
+              '-dCompatibilityLevel=1.5', '-dEmbedAllFonts=true', '-dSubsetFonts=true'],
+}
+
+
+def _ghostscript_preset(ctx, pdf_path, preset, output_path):
+    # gs writes the PDF to stdout (its own messages go to stderr) straight into the encrypted output
+    args = ['gs', '-sDEVICE=pdfwrite', *GHOSTSCRIPT_PRESETS[preset], '-dNOPAUSE', '-dQUIET', '-dBATCH',
+            '-sstdout=%stderr', '-sOutputFile=-', pdf_path]
+    with open_output(output_path) as writer:
+        run_tool(ctx, args, stdout=writer)
+    return writer.bytes_written
+
+
+def _ghostscript_compress(ctx, params, original_size, pdf_path):
+    """
+    Menjalankan preset gs /screen dan /ebook bersamaan lalu memilih hasilnya.
+
+    Return:
+        int: Ukuran output yang ditulis ke output_path
+
+    Catatan:
+        - /screen dipakai jika memenuhi MIN_COMPRESSION_TARGET; jika tidak,
+          /ebook dipilih bila setidaknya 80% seefektif /screen karena lebih
+          mudah dibaca
+        - Jika satu preset gagal, hasil preset lainnya yang dipakai
+    """
+    outputs = {'screen': params['output_path'], 'ebook': ctx.path('ebook.enc')}
+    sizes = {}
+    errors = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(outputs)) as executor:
+        futures = {executor.submit(_ghostscript_preset, ctx, pdf_path, preset, path): preset
+                   for preset, path in outputs.items()}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                sizes[futures[future]] = future.result()
+            except Exception as e:
+                errors.append(e)
+    for error in errors:
+        if isinstance(error, (JobCancelled, JobTimeout)):
+            raise error
+    if not sizes:
+        raise errors[0]
+
+    def ratio(preset):
+        return 1 - sizes[preset] / original_size if original_size else 0
+
+    best = 'screen' if 'screen' in sizes else 'ebook'
+    if best == 'screen' and 'ebook' in sizes and ratio('screen') < MIN_COMPRESSION_TARGET:
+        # Use the better compression while maintaining readability
+        if ratio('ebook') > ratio('screen') * 0.8:  # Accept if at least 80% as effective
+            best = 'ebook'
+    if best == 'ebook':
+        os.replace(outputs['ebook'], params['output_path'])
+    elif os.path.exists(outputs['ebook']):
+        os.remove(outputs['ebook'])
+    return sizes[best]
+
+
+def _optimize_pdf_planned(ctx, pdf_path, output_path, original_size):
+    """
+    Menjalankan optimize_pdf() sekali dengan pengaturan dari plan_pdf_images().
+
+    Return:
+        int: Ukuran output yang ditulis ke output_path
+    """
+    import fitz  # PyMuPDF
+    target_bytes = original_size * (1 - MIN_COMPRESSION_TARGET)
+    with fitz.open(pdf_path) as doc:
+        plan = plan_pdf_images(doc, original_size, target_bytes, check=ctx.check)
+    max_dpi, quality = plan[:2] if plan else PDF_OPTIMIZE_DEFAULT
+    with open_output(output_path) as writer:
+        optimize_pdf(pdf_path, writer, max_dpi=max_dpi, jpeg_quality=quality, check=ctx.check)
+    return writer.bytes_written
+
+
+def job_pdf_compress(ctx, params):
+    """
+    Kompresi PDF (action 5): optimasi gambar, fallback ke rasterisasi lalu Ghostscript.
+
+    Parameter (params):
+        input_path, output_path
+
+    Return:
+        dict: output_path, output_size, original_size, engine, errors
+              engine 'original' berarti tidak ada hasil yang lebih kecil dari
+              file asli (atau semua metode gagal) dan output_path None;
+              errors berisi 'engine: exception' untuk setiap engine yang gagal
+
+    Catatan:
+        - Input didekripsi sekali ke work_dir dan dipakai oleh semua engine;
+          work_dir dihapus oleh proses bot setelah job selesai
+        - Engine utama adalah optimize_pdf(): teks tetap vektor, hanya gambar
+          yang terlalu besar yang di-encode ulang
+        - DPI dan kualitas dipilih sekali oleh compression_planner dari sampel
+          gambar/halaman, lalu output ditulis satu kali
+        - Rasterisasi halaman hanya dipakai jika PyMuPDF gagal memproses
+          struktur dokumen; kegagalan tersebut dilaporkan lewat errors agar
+          fallback terlihat di log bot
+    """
+    with open_input(params['input_path']) as reader:
+        original_size = reader.size
+    # Render processes open the plaintext copy directly instead of receiving the bytes
+    pdf_path = decrypt_input(ctx, params['input_path'], 'input.pdf')
+    errors = []
+
+    def result(engine, size=None):
+        if engine == 'original':
+            return {'output_path': None, 'output_size': original_size,
+                    'original_size': original_size, 'engine': engine, 'errors': errors}
+        return {'output_path': params['output_path'], 'output_size': size,
+                'original_size': original_size, 'engine': engine, 'errors': errors}
+
+    try:
+        size = _optimize_pdf_planned(ctx, pdf_path, params['output_path'], original_size)
+        return result('optimizer', size) if size < original_size else result('original')
+    except (JobCancelled, JobTimeout):
+        raise
+    except Exception as e:
+        errors.append(f"optimizer: {e!r}")
+
+    try:
+        import fitz  # PyMuPDF
+        with fitz.open(pdf_path) as doc:
+            scale, quality = plan_raster(doc, original_size * (1 - MIN_COMPRESSION_TARGET), check=ctx.check)
+        with open_output(params['output_path']) as writer:
+            _rasterize_pdf(ctx, pdf_path, scale, quality, writer)
+        if writer.bytes_written >= original_size:
+            # Rasterizing mostly-text PDFs can make them larger
+            os.remove(params['output_path'])
+            return result('original')
+        return result('pymupdf', writer.bytes_written)
+    except (JobCancelled, JobTimeout):
+        raise
+    except Exception as e:
+        errors.append(f"pymupdf: {e!r}")
+
+    try:
+        size = _ghostscript_compress(ctx, params, original_size, pdf_path)
+        return result('ghostscript', size) if size < original_size else result('original')
+    except (JobCancelled, JobTimeout):
+        raise
+    except Exception as e:
+        errors.append(f"ghostscript: {e!r}")
+        return result('original')
+
+
+def _convert_word_range(pdf_path, start, stop, docx_path):
+    """
+    Mengonversi halaman [start, stop) dengan pdf2docx (dijalankan di pool konversi Word).
+
+    Return:
+        str: docx_path
+    """
+    from pdf2docx import Converter
+    cv = Converter(pdf_path)
+    try:
+        cv.convert(docx_path, start=start, end=stop)
+    finally:
+        cv.close()
+    return docx_path
+
+
+def _write_text_pages(ctx, pdf_path, start, stop, docx_path):
+    """
+    Menulis teks terstruktur halaman [start, stop) ke DOCX dengan pdf_text_docx.
+
+    Catatan:
+        - Dipakai jika pdf2docx tidak tersedia, gagal, atau halaman tidak
+          selesai dalam batas waktu
+    """
+    import fitz
+
+    with fitz.open(pdf_path) as pdf_document:
+        write_pdf_text_docx(pdf_document, docx_path, start, stop, check=ctx.check)
+
+
+def _convert_word_ranges(ctx, pdf_path, ranges):
+    """
+    Mengonversi rentang halaman paralel dengan pdf2docx dalam batas waktu.
+
+    Parameter:
+        pdf_path (str): PDF plaintext di work_dir
+        ranges (list): (start, stop) per part, sesuai urutan halaman
+
+    Return:
+        list: Path DOCX per rentang, None untuk rentang yang gagal atau
+              tidak selesai sebelum deadline job dikurangi PDF_TO_WORD_RESERVE
+
+    Catatan:
+        - Memakai multiprocessing.Pool sendiri karena pdf2docx tidak bisa
+          dihentikan dari luar; pool di-terminate begitu batas waktu habis,
+          dibatalkan, atau semua part selesai
+    """
+    budget_end = ctx.deadline - PDF_TO_WORD_RESERVE if ctx.deadline is not None else None
+    page_count = ranges[-1][1]
+    pool = multiprocessing.get_context('spawn').Pool(processes=min(WORD_WORKERS, len(ranges)))
+    try:
+        pending = [pool.apply_async(_convert_word_range, (pdf_path, start, stop, ctx.path(f'part_{start}.docx')))
+                   for start, stop in ranges]
+        parts = []
+        for (start, stop), result in zip(ranges, pending):
+            while not result.ready() and (budget_end is None or time.time() < budget_end):
+                ctx.check()
+                result.wait(0.5)
+            parts.append(result.get() if result.ready() and result.successful() else None)
+            ctx.report_progress(0.9 * stop / page_count)
+        return parts
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def job_pdf_to_word(ctx, params):
+    """
+    Konversi PDF ke DOCX dengan pdf2docx, fallback ke teks PyMuPDF (action 8).
+
+    Parameter (params):
+        input_path, output_path, use_pdf2docx (bool)
+
+    Return:
+        dict: output_path, output_size, enhanced (True jika pdf2docx berhasil),
+              fallback_pages (halaman yang hanya dikonversi sebagai teks)
+
+    Catatan:
+        - PDF dibagi per WORD_PAGES_PER_TASK halaman dan dikonversi paralel,
+          lalu part DOCX digabung dengan docx_stitch; dokumen satu rentang
+          juga lewat pool (satu proses) agar batas waktunya sama
+        - Rentang yang gagal atau belum selesai saat batas waktu habis
+          dikonversi sebagai teks saja, sehingga job tetap menghasilkan
+          dokumen lengkap sebelum deadline
+    """
+    import fitz
+
+    temp_pdf = decrypt_input(ctx, params['input_path'], 'input.pdf')
+    output_docx = ctx.path('converted.docx')
+    try:
+        with fitz.open(temp_pdf) as pdf_document:
+            page_count = len(pdf_document)
+    except Exception:
+        page_count = 0
+    ranges = [(start, min(start + WORD_PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, WORD_PAGES_PER_TASK)]
+
+    # Use pdf2docx for better conversion if available
+    parts = [None] * len(ranges)
+    if params.get('use_pdf2docx') and ranges:
+        try:
+            parts = _convert_word_ranges(ctx, temp_pdf, ranges)
+        except (JobCancelled, JobTimeout):
+            raise
+        except Exception:
+            # Fall back to basic conversion
+            parts = [None] * len(ranges)
+    ctx.check()
+    if all(part is None for part in parts):
+        ranges, parts = [(0, page_count)], [None]
+
+    fallback_pages = sum(stop - start for (start, stop), part in zip(ranges, parts) if part is None)
+    try:
+        for index, ((start, stop), part) in enumerate(zip(ranges, parts)):
+            if part is None:
+                # Fallback to basic conversion using python-docx and PyMuPDF
+                parts[index] = ctx.path(f'text_{start}.docx')
+                _write_text_pages(ctx, temp_pdf, start, stop, parts[index])
+        if len(parts) > 1:
+            from docx_stitch import stitch_documents
+            stitch_documents(parts, output_docx)
+        elif parts[0] != output_docx:
+            os.replace(parts[0], output_docx)
+    except (JobCancelled, JobTimeout):
+        raise
+    except Exception:
+        # Create an empty document with error message
+        try:
+            from docx import Document
+            doc = Document()
+            doc.add_paragraph("Error converting PDF. The file may be encrypted or contain only images.")
+            doc.save(output_docx)
+        except Exception:
+            # If even this fails, create a simple text file
+            with open(output_docx, 'w') as f:
+                f.write("Error converting PDF. The file may be encrypted or contain only images.")
+        fallback_pages = page_count
+
+    os.remove(temp_pdf)
+    size = encrypt_output(ctx, output_docx, params['output_path'])
+    return {'output_path': params['output_path'], 'output_size': size,
+            'enhanced': fallback_pages < page_count, 'fallback_pages': fallback_pages}
+
+
+def _extract_document_text(source_path, ext):
+    if ext in ['docx', 'doc']:
+        from docx import Document
+        doc = Document(source_path)
+        return [para.text for para in doc.paragraphs if para.text.strip()]
+    if ext in ['txt', 'rtf']:
+        with open(source_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.readlines()
+    if ext in ['xlsx', 'xls']:
+        try:
+            import pandas as pd
+            return [pd.read_excel(source_path).to_string()]
+        except Exception:
+            return ["Excel file content (conversion limited)"]
+    if ext in ['pptx', 'ppt']:
+        try:
+            from pptx import Presentation
+            text_content = []
+            for slide in Presentation(source_path).slides:
+                for shape in slide.shapes:
+                    if hasattr(shape, "text"):
+                        text_content.append(shape.text)
+            return text_content
+        except Exception:
+            return ["PowerPoint file content (conversion limited)"]
+    return ["Document content"]
+
+
+def job_document_to_pdf(ctx, params):
+    """
+    Konversi dokumen (DOCX, TXT, XLSX, PPTX) ke PDF (action 9).
+
+    Parameter (params):
+        input_path, output_path, ext (ekstensi file asli)
+    """
+    temp_docx = decrypt_input(ctx, params['input_path'], f"input.{params['ext'] or 'bin'}")
+    output_pdf = ctx.path('output.pdf')
+    conversion_success = False
+
+    # Try docx2pdf first
+    try:
+        import importlib.util
+        if importlib.util.find_spec("docx2pdf"):
+            from docx2pdf import convert
+            convert(temp_docx, output_pdf)
+            if os.path.exists(output_pdf) and os.path.getsize(output_pdf) > 0:
+                conversion_success = True
+    except Exception:
+        pass
+    ctx.check()
+
+    # Fallback to basic conversion for all document types
+    if not conversion_success:
+        text_content = _extract_document_text(temp_docx, params['ext'])
+
+        # Create PDF with extracted content
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import letter
+
+        c = canvas.Canvas(output_pdf, pagesize=letter)
+        width, height = letter
+        y = height - 50
+        for line in text_content:
+            if line and line.strip():
+                c.drawString(50, y, line.strip()[:80])  # Limit line length
+                y -= 20
+                if y < 50:
+                    c.showPage()
+                    y = height - 50
+        c.save()
+
+    os.remove(temp_docx)
+    size = encrypt_output(ctx, output_pdf, params['output_path'])
+    return {'output_path': params['output_path'], 'output_size': size}
+
+
+# ---------------------------------------------------------------------------
+# Media and archive jobs (actions 6, 7, 10, 11)
+# ---------------------------------------------------------------------------
+
+def _probe_media(ctx, path):
+    output = BytesIO()
+    run_tool(ctx, probe_command(path), stdout=output)
+    return parse_probe(output.getvalue())
+
+
+def _run_media_command(ctx, build, info, output_path, temp_output=None):
+    """
+    Menjalankan perintah dari media_pipeline, dengan stream copy jika bisa.
+
+    Parameter:
+        build (callable): allow_copy -> (args, copied)
+        info (dict): Hasil probe, durasinya dipakai untuk progress
+        output_path (str): Path output terenkripsi
+        temp_output (str): File keluaran ffmpeg jika perintah tidak menulis ke stdout
+
+    Return:
+        tuple: (ukuran output, copied)
+
+    Catatan:
+        - Jika stream copy gagal, perintah diulang dengan encode ulang penuh
+        - Progress ffmpeg diteruskan ke ctx.report_progress()
+    """
+    for allow_copy in (True, False):
+        args, copied = build(allow_copy)
+        parser = ProgressParser(info['duration'])
+
+        def on_stderr_line(line):
+            fraction = parser.feed(line)
+            if fraction is not None:
+                ctx.report_progress(fraction)
+
+        try:
+            if temp_output:
+                run_tool(ctx, args, on_stderr_line=on_stderr_line)
+                return encrypt_output(ctx, temp_output, output_path), copied
+            with open_output(output_path) as writer:
+                run_tool(ctx, args, stdout=writer, on_stderr_line=on_stderr_line)
+            return writer.bytes_written, copied
+        except subprocess.CalledProcessError:
+            if not copied:
+                raise
+
+
+def job_extract_audio(ctx, params):
+    """
+    Ekstrak audio MP3 dari video dengan ffmpeg (action 6).
+
+    Catatan:
+        - Track MP3 disalin tanpa encode; MP3 dialirkan dari stdout ffmpeg
+          langsung ke output terenkripsi
+    """
+    temp_video = decrypt_input(ctx, params['input_path'], 'input_video')
+    info = _probe_media(ctx, temp_video)
+    size, copied = _run_media_command(ctx, lambda allow_copy: extract_audio_command(info, temp_video, allow_copy),
+                                      info, params['output_path'])
+    os.remove(temp_video)
+    return {'output_path': params['output_path'], 'output_size': size, 'stream_copy': copied}
+
+
+def job_video_mp4(ctx, params):
+    """
+    Konversi video ke MP4 (H.264/AAC) dengan ffmpeg (action 10).
+
+    Catatan:
+        - Stream H.264/AAC di-remux tanpa encode ulang; hanya stream lain
+          yang di-encode
+    """
+    temp_input = decrypt_input(ctx, params['input_path'], 'input')
+    temp_output = ctx.path('output.mp4')
+    info = _probe_media(ctx, temp_input)
+    size, copied = _run_media_command(
+        ctx, lambda allow_copy: video_mp4_command(info, temp_input, temp_output, allow_copy),
+        info, params['output_path'], temp_output)
+    os.remove(temp_input)
+    return {'output_path': params['output_path'], 'output_size': size, 'stream_copy': copied}
+
+
+def job_audio_mp3(ctx, params):
+    """
+    Konversi audio ke MP3 192k dengan ffmpeg (action 11).
+
+    Catatan:
+        - Audio yang sudah MP3 disalin tanpa encode
+    """
+    temp_input = decrypt_input(ctx, params['input_path'], 'input')
+    info = _probe_media(ctx, temp_input)
+    size, copied = _run_media_command(ctx, lambda allow_copy: audio_mp3_command(info, temp_input, allow_copy),
+                                      info, params['output_path'])
+    os.remove(temp_input)
+    return {'output_path': params['output_path'], 'output_size': size, 'stream_copy': copied}
+
+
+def job_zip_file(ctx, params):
+    """
+    Membuat arsip ZIP dari satu file (action 7).
+
+    Parameter (params):
+        input_path, output_path, original_name
+
+    Catatan:
+        - Input didekripsi dan dikompres per chunk langsung ke output
+          terenkripsi; memori terpakai hanya beberapa chunk berapapun ukuran
+          file, dan tidak ada plaintext di disk
+        - Output tidak seekable, jadi zipfile menulis ukuran entry di data
+          descriptor setelah datanya
+        - Metode kompresi dipilih dari sampel isi file (archive_planner):
+          file yang sudah terkompresi disimpan tanpa DEFLATE
+    """
+    with open_input(params['input_path']) as reader, open_output(params['output_path']) as writer:
+        compress_type, compresslevel, _ = plan_zip(sample_blocks(reader, reader.size))
+        reader.seek(0)
+        with zipfile.ZipFile(writer, 'w', compress_type, compresslevel=compresslevel) as zipf:
+            with zipf.open(params['original_name'], 'w', force_zip64=reader.size > ZIP64_THRESHOLD) as entry:
+                copied = 0
+                while True:
+                    ctx.check()
+                    chunk = reader.read(ZIP_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    entry.write(chunk)
+                    copied += len(chunk)
+                    ctx.report_progress(copied / max(reader.size, 1))
+    return {'output_path': params['output_path'], 'output_size': writer.bytes_written}
+
+
+def job_zip_member(ctx, params):
+    """
+    Mengompres satu file sesi ZIP multi-file begitu file itu diunggah.
+
+    Parameter (params):
+        input_path, output_path
+
+    Return:
+        dict: output_path, output_size, member (info dari
+              zip_bundle.compress_member() untuk job_zip_bundle)
+    """
+    with open_input(params['input_path']) as reader, open_output(params['output_path']) as writer:
+        member = compress_member(reader, writer, reader.size, ctx.check, ctx.report_progress)
+    return {'output_path': params['output_path'], 'output_size': writer.bytes_written, 'member': member}
+
+
+def job_zip_bundle(ctx, params):
+    """
+    Menyatukan member hasil job_zip_member menjadi satu arsip ZIP.
+
+    Parameter (params):
+        members: Daftar [member_path, nama_asli, member]
+        output_path
+
+    Return:
+        dict: output_path, output_size, original_size
+
+    Catatan:
+        - Data member hanya disalin, tidak dikompres ulang
+        - Nama file yang sama diberi akhiran (2), (3), ...
+    """
+    used = set()
+    members = [(unique_name(name, used), path, member) for path, name, member in params['members']]
+    with open_output(params['output_path']) as writer:
+        size = write_bundle(writer, members, open_input, ctx.check)
+    return {'output_path': params['output_path'], 'output_size': size,
+            'original_size': sum(member['file_size'] for _, _, member in members)}
+
+
+JOB_HANDLERS = {
+    'image_convert': job_image_convert,
+    'image_compress': job_image_compress,
+    'image_batch': job_image_batch,
+    'pdf_compress': job_pdf_compress,
+    'extract_audio': job_extract_audio,
+    'zip_file': job_zip_file,
+    'zip_member': job_zip_member,
+    'zip_bundle': job_zip_bundle,
+    'pdf_to_word': job_pdf_to_word,
+    'document_to_pdf': job_document_to_pdf,
+    'video_mp4': job_video_mp4,
+    'audio_mp3': job_audio_mp3,
+}
+
+
+def run_job(job_type, params, job_id, work_dir, deadline=None):
+    """
+    Entry point yang dikirim ke ProcessPoolExecutor.
+
+    Parameter:
+        job_type (str): Kunci di JOB_HANDLERS
+        params (dict): Parameter job (hanya path dan nilai kecil, bukan data file)
+        job_id (str): ID job
+        work_dir (str): Direktori kerja khusus job
+        deadline (float): Batas waktu absolut, None jika tanpa batas
+
+    Return:
+        dict: Hasil job (path output terenkripsi dan metadata kecil)
+
+    Catatan:
+        - PID worker dicatat di work_dir (JobContext.PID_FILE) selama handler
+          berjalan; kode yang tidak memanggil ctx.check() tetap bisa
+          dihentikan oleh proses bot
+    """
+    handler = JOB_HANDLERS.get(job_type)
+    if handler is None:
+        raise ValueError(f"Unknown conversion job type: {job_type}")
+    ctx = JobContext(job_id, work_dir, deadline)
+    pid_path = ctx.path(JobContext.PID_FILE)
+    with open(pid_path, 'w') as f:
+        f.write(str(os.getpid()))
+    try:
+        ctx.check()
+        return handler(ctx, params)
+    finally:
+        # This worker moves on to other jobs and must no longer be killed for this one
+        try:
+            os.remove(pid_path)
+        except OSError:
+            pass
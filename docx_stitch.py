@@ -0,0 +1,112 @@
+"""
+Penggabungan dokumen DOCX hasil konversi per rentang halaman (action 8).
+
+Catatan:
+    - Isi body dokumen part disalin ke dokumen utama; gambar dan hyperlink
+      didaftarkan ulang ke dokumen utama sehingga rId-nya tetap valid
+    - Setiap part dimulai dengan section baru: section terakhir dokumen
+      utama ditutup dengan section break yang membawa ukuran halamannya,
+      lalu section terakhir part menjadi section terakhir dokumen utama
+    - Style tidak disalin; part yang dihasilkan pdf2docx dan python-docx
+      memakai template bawaan yang sama
+    - python-docx diimpor di dalam fungsi, sehingga modul ini aman diimpor
+      oleh proses worker yang belum tentu memakainya
+"""
+
+from copy import deepcopy
+from io import BytesIO
+
+_RELATIONSHIP_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_RELATIONSHIP_ATTRIBUTES = tuple(f'{{{_RELATIONSHIP_NS}}}{name}' for name in ('embed', 'link', 'id'))
+
+
+def _copy_relationships(element, source_part, target_part, mapping):
+    """
+    Memindahkan relationship yang dirujuk element dari source_part ke target_part.
+
+    Catatan:
+        - Gambar lewat get_or_add_image(), sehingga gambar identik disimpan
+          sekali dan nama part tidak bertabrakan
+        - Relationship eksternal (hyperlink) dibuat ulang dengan target yang sama
+        - Relationship internal lain tidak dihasilkan oleh pdf2docx; atributnya
+          dibuang agar dokumen tetap valid
+    """
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    for node in element.iter():
+        for attribute in _RELATIONSHIP_ATTRIBUTES:
+            r_id = node.get(attribute)
+            if r_id is None:
+                continue
+            if r_id not in mapping:
+                rel = source_part.rels.get(r_id)
+                if rel is None:
+                    mapping[r_id] = None
+                elif rel.is_external:
+                    mapping[r_id] = target_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+                elif rel.reltype == RT.IMAGE:
+                    mapping[r_id] = target_part.get_or_add_image(BytesIO(rel.target_part.blob))[0]
+                else:
+                    mapping[r_id] = None
+            if mapping[r_id] is None:
+                del node.attrib[attribute]
+            else:
+                node.set(attribute, mapping[r_id])
+
+
+def append_document(master, part):
+    """
+    Menambahkan seluruh isi dokumen part ke akhir dokumen master.
+
+    Parameter:
+        master (docx.Document): Dokumen tujuan, diubah langsung
+        part (docx.Document): Dokumen yang disalin
+
+    Return:
+        Tidak ada
+    """
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    body = master.element.body
+    last_section = body.find(qn('w:sectPr'))
+    if last_section is None:
+        last_section = OxmlElement('w:sectPr')
+        body.append(last_section)
+    elif len(body) > 1:
+        # End the master's last section on its own page setup
+        paragraph = OxmlElement('w:p')
+        properties = OxmlElement('w:pPr')
+        properties.append(deepcopy(last_section))
+        paragraph.append(properties)
+        last_section.addprevious(paragraph)
+
+    mapping = {}
+    part_section = None
+    for child in part.element.body.iterchildren():
+        if child.tag == qn('w:sectPr'):
+            part_section = child
+            continue
+        element = deepcopy(child)
+        _copy_relationships(element, part.part, master.part, mapping)
+        last_section.addprevious(element)
+    if part_section is not None:
+        section = deepcopy(part_section)
+        _copy_relationships(section, part.part, master.part, mapping)
+        body.replace(last_section, section)
+
+
+def stitch_documents(paths, output_path):
+    """
+    Menggabungkan beberapa file DOCX sesuai urutan menjadi satu file.
+
+    Parameter:
+        paths (list): Path file DOCX part, sesuai urutan halaman
+        output_path (str): Path file DOCX hasil
+
+    Return:
+        Tidak ada
+    """
+    from docx import Document
+    master = Document(paths[0])
+    for path in paths[1:]:
+        append_document(master, Document(path))
+    master.save(output_path)
@@ -0,0 +1,263 @@
+"""
+Lapisan akses database untuk tabel 'files' di files.db.
+
+Catatan:
+    - Setiap thread memakai satu koneksi persisten (thread-local), jadi tidak
+      ada biaya connect/close per request
+    - Database memakai WAL sehingga pembaca tidak menunggu penulis, dan
+      synchronous=NORMAL karena isi tabel hanya metadata sementara
+    - Semua query memakai teks SQL konstan, sehingga statement yang sudah
+      di-prepare diambil dari cache statement sqlite3 per koneksi
+    - Operasi banyak baris (hapus batch, sweep retensi) berjalan dalam satu
+      transaksi pendek agar tidak bersaing lama dengan insert upload
+    - Skema diversi dengan PRAGMA user_version; init_schema() menjalankan
+      migrasi yang belum diterapkan
+    - Setiap baris punya expires_at terindeks, sehingga sweep retensi hanya
+      menyentuh baris yang kedaluwarsa (O(k log n)), bukan full scan
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+STATEMENT_CACHE_SIZE = 64
+SWEEP_BATCH_SIZE = 500  # Rows deleted per retention sweep statement
+
+STATE_UPLOADED = 'uploaded'
+STATE_PROCESSING = 'processing'
+STATE_MERGING = 'merging'
+
+_INSERT_FILE = ('INSERT INTO files (user_id, file_id, file_name, file_path, created_at, expires_at, state) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)')
+_SELECT_FILE = 'SELECT file_path, file_name FROM files WHERE id = ?'
+_SELECT_USER_FILES = 'SELECT id, file_path, file_name FROM files WHERE user_id = ? AND state = ? ORDER BY id'
+_UPDATE_STATE = 'UPDATE files SET state = ?, expires_at = MAX(expires_at, COALESCE(?, expires_at)) WHERE id = ?'
+_DELETE_FILE = 'DELETE FROM files WHERE id = ?'
+_DELETE_EXPIRED = ('DELETE FROM files WHERE id IN '
+                   '(SELECT id FROM files WHERE expires_at < ? ORDER BY expires_at LIMIT ?) '
+                   'RETURNING file_path')
+_DELETE_ALL = 'DELETE FROM files'
+
+
+def _timestamp(value):
+    # Same text format as sqlite3's default datetime adapter, so old and new
+    # rows compare correctly as strings
+    return value.isoformat(' ') if isinstance(value, datetime) else value
+
+
+def _migrate_expiry_and_state(conn, retention):
+    """
+    Versi 1: kolom expires_at dan state, indeks untuk sweep dan query per pengguna.
+    """
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(files)')}
+    if 'expires_at' not in columns:
+        conn.execute('ALTER TABLE files ADD COLUMN expires_at TIMESTAMP')
+        conn.execute("UPDATE files SET expires_at = datetime(COALESCE(created_at, datetime('now', 'localtime')), ?)",
+                     (f'+{int(retention.total_seconds())} seconds',))
+    if 'state' not in columns:
+        conn.execute(f"ALTER TABLE files ADD COLUMN state TEXT NOT NULL DEFAULT '{STATE_UPLOADED}'")
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_files_expires_at ON files (expires_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_files_user_state ON files (user_id, state)')
+
+
+# Index i migrates the schema from user_version i to i + 1
+MIGRATIONS = [_migrate_expiry_and_state]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+class FileRepository:
+    """
+    Repository untuk metadata file yang diunggah pengguna.
+
+    Parameter:
+        path (str): Lokasi file database SQLite
+        timeout (float): Waktu tunggu lock (busy timeout) dalam detik
+        retention (timedelta): Umur baris sebelum dihapus oleh sweep
+    """
+
+    def __init__(self, path='files.db', timeout=10.0, retention=timedelta(minutes=15)):
+        self.path = path
+        self.timeout = timeout
+        self.retention = retention
+        self._local = threading.local()
+
+    def _connection(self):
+        """
+        Mengambil koneksi milik thread saat ini, membuatnya jika belum ada.
+
+        Return:
+            sqlite3.Connection: Koneksi dalam mode autocommit
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit; multi-statement writes open their own transaction
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        # Take the write lock up front so the transaction never has to upgrade
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self):
+        """
+        Menutup koneksi milik thread saat ini (koneksi baru dibuka jika dipakai lagi).
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
+    def init_schema(self):
+        """
+        Membuat tabel 'files' jika belum ada lalu menjalankan migrasi.
+
+        Catatan:
+            - Tabel dibuat dengan skema awal (versi 0) agar database baru dan
+              lama melewati jalur migrasi yang sama
+            - Setiap migrasi berjalan dalam transaksinya sendiri bersama
+              kenaikan user_version
+        """
+        self._connection().execute('''CREATE TABLE IF NOT EXISTS files
+                        (id INTEGER PRIMARY KEY, user_id INTEGER, file_id TEXT,
+                         file_name TEXT, file_path TEXT, created_at TIMESTAMP)''')
+        with self._transaction() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for index in range(version, SCHEMA_VERSION):
+            with self._transaction() as conn:
+                # Re-check under the write lock in case another process migrated first
+                if conn.execute('PRAGMA user_version').fetchone()[0] != index:
+                    continue
+                MIGRATIONS[index](conn, self.retention)
+                conn.execute(f'PRAGMA user_version = {index + 1}')
+
+    def add(self, user_id, file_id, file_name, file_path, created_at=None, state=STATE_UPLOADED):
+        """
+        Menyimpan satu file baru.
+
+        Parameter:
+            created_at (datetime): Waktu upload, default sekarang
+            state (str): STATE_UPLOADED, STATE_PROCESSING, atau STATE_MERGING
+
+        Return:
+            int: ID baris yang dibuat
+        """
+        created_at = created_at or datetime.now()
+        cursor = self._connection().execute(
+            _INSERT_FILE, (user_id, file_id, file_name, file_path, _timestamp(created_at),
+                           _timestamp(created_at + self.retention), state))
+        return cursor.lastrowid
+
+    def set_state(self, db_id, state, expires_at=None):
+        """
+        Mengubah state satu file.
+
+        Parameter:
+            expires_at (datetime): Jika diisi, masa simpan diperpanjang sampai
+                                   waktu ini (tidak pernah diperpendek)
+        """
+        self._connection().execute(_UPDATE_STATE, (state, _timestamp(expires_at), db_id))
+
+    def list_for_user(self, user_id, state=STATE_UPLOADED):
+        """
+        Return:
+            list: (id, file_path, file_name) milik pengguna dengan state tertentu
+        """
+        return self._connection().execute(_SELECT_USER_FILES, (user_id, state)).fetchall()
+
+    def get(self, db_id):
+        """
+        Return:
+            tuple: (file_path, file_name), None jika tidak ditemukan
+        """
+        return self._connection().execute(_SELECT_FILE, (db_id,)).fetchone()
+
+    def get_path(self, db_id):
+        row = self.get(db_id)
+        return row[0] if row else None
+
+    def get_name(self, db_id):
+        row = self.get(db_id)
+        return row[1] if row else None
+
+    def delete(self, db_id):
+        self._connection().execute(_DELETE_FILE, (db_id,))
+
+    def delete_many(self, db_ids):
+        """
+        Menghapus beberapa baris dalam satu transaksi.
+        """
+        db_ids = [(db_id,) for db_id in db_ids]
+        if not db_ids:
+            return
+        with self._transaction() as conn:
+            conn.executemany(_DELETE_FILE, db_ids)
+
+    def pop(self, db_id):
+        """
+        Mengambil lalu menghapus satu baris secara atomik.
+
+        Return:
+            str: file_path baris yang dihapus, None jika tidak ditemukan
+        """
+        with self._transaction() as conn:
+            row = conn.execute(_SELECT_FILE, (db_id,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(_DELETE_FILE, (db_id,))
+            return row[0]
+
+    def pop_many(self, db_ids):
+        """
+        Mengambil lalu menghapus beberapa baris dalam satu transaksi.
+
+        Return:
+            list: file_path dari baris yang ditemukan, sesuai urutan db_ids
+        """
+        paths = []
+        with self._transaction() as conn:
+            for db_id in db_ids:
+                row = conn.execute(_SELECT_FILE, (db_id,)).fetchone()
+                if row is not None:
+                    conn.execute(_DELETE_FILE, (db_id,))
+                    paths.append(row[0])
+        return paths
+
+    def pop_expired(self, now=None, batch_size=SWEEP_BATCH_SIZE):
+        """
+        Menghapus semua baris yang sudah melewati expires_at.
+
+        Parameter:
+            now (datetime): Waktu acuan, default sekarang
+            batch_size (int): Jumlah baris maksimum per statement DELETE
+
+        Return:
+            list: file_path dari baris yang dihapus
+
+        Catatan:
+            - Setiap batch adalah satu DELETE ... RETURNING lewat indeks
+              expires_at, sehingga lock tulis hanya dipegang sebentar
+        """
+        now = _timestamp(now or datetime.now())
+        conn = self._connection()
+        paths = []
+        while True:
+            batch = conn.execute(_DELETE_EXPIRED, (now, batch_size)).fetchall()
+            paths.extend(row[0] for row in batch)
+            if len(batch) < batch_size:
+                return paths
+
+    def clear(self):
+        self._connection().execute(_DELETE_ALL)
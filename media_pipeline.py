@@ -0,0 +1,165 @@
+"""
+Perencana perintah ffmpeg untuk konversi media (action 6, 10, 11).
+
+Catatan:
+    - Input diprobe dulu dengan ffprobe; jika codec sudah sesuai target
+      (misalnya H.264/AAC di MKV -> MP4, atau track MP3 di video -> MP3),
+      stream disalin apa adanya (-c copy) tanpa encode ulang
+    - Output audio (MP3) ditulis ke stdout ffmpeg sehingga bisa dialirkan
+      langsung ke file terenkripsi; MP4 butuh output seekable untuk atom
+      moov (+faststart), jadi tetap ditulis ke file
+    - Setiap fungsi *_command menerima allow_copy=False untuk memaksa encode
+      ulang, dipakai jika stream copy gagal (timestamp atau bitstream aneh)
+    - ffmpeg menulis progress (-progress pipe:2) ke stderr karena stdout
+      dipakai untuk data MP3; ProgressParser mengubahnya menjadi fraksi 0-1
+    - Modul ini hanya membangun argumen perintah dan tidak menjalankan
+      proses
+"""
+
+import json
+
+MP4_VIDEO_CODECS = ('h264',)  # Copied into MP4 as-is; anything else is re-encoded
+MP4_AUDIO_CODECS = ('aac',)
+MP3_BITRATE = '192k'
+# Errors and machine-readable progress only; stdout stays free for media data
+FFMPEG_PREFIX = ['ffmpeg', '-nostdin', '-v', 'error', '-nostats', '-progress', 'pipe:2']
+
+
+def probe_command(source):
+    """
+    Return:
+        list: Perintah ffprobe yang menulis info stream dan format sebagai JSON
+    """
+    return ['ffprobe', '-v', 'error', '-show_entries',
+            'stream=index,codec_type,codec_name:format=format_name,duration',
+            '-of', 'json', source]
+
+
+def parse_probe(output):
+    """
+    Mengubah output JSON ffprobe menjadi ringkasan stream.
+
+    Parameter:
+        output (bytes/str): stdout dari probe_command()
+
+    Return:
+        dict: {'format': nama format, 'duration': detik atau None,
+               'video': [codec], 'audio': [codec]} sesuai urutan stream
+    """
+    data = json.loads(output or '{}')
+    info = {'format': '', 'duration': None, 'video': [], 'audio': []}
+    file_format = data.get('format') or {}
+    info['format'] = file_format.get('format_name', '')
+    try:
+        info['duration'] = float(file_format['duration'])
+    except (KeyError, TypeError, ValueError):
+        pass
+    for stream in data.get('streams') or []:
+        codec_type = stream.get('codec_type')
+        if codec_type in ('video', 'audio'):
+            info[codec_type].append(stream.get('codec_name', ''))
+    return info
+
+
+def extract_audio_command(info, source, allow_copy=True):
+    """
+    Perintah ekstrak track audio pertama ke MP3 lewat stdout (action 6).
+
+    Return:
+        tuple: (args, copied), copied True jika track MP3 disalin tanpa encode
+
+    Catatan:
+        - Akan raise ValueError jika video tidak punya track audio
+    """
+    if not info['audio']:
+        raise ValueError("Video has no audio track")
+    copied = allow_copy and info['audio'][0] == 'mp3'
+    codec = ['-c:a', 'copy'] if copied else ['-c:a', 'libmp3lame', '-q:a', '0']
+    return [*FFMPEG_PREFIX, '-i', source, '-map', '0:a:0', *codec, '-f', 'mp3', 'pipe:1'], copied
+
+
+def audio_mp3_command(info, source, allow_copy=True, bitrate=MP3_BITRATE):
+    """
+    Perintah konversi audio ke MP3 lewat stdout (action 11).
+
+    Return:
+        tuple: (args, copied), copied True jika audio sudah MP3
+
+    Catatan:
+        - Gambar sampul (stream video) tidak ikut disalin
+    """
+    if not info['audio']:
+        raise ValueError("File has no audio track")
+    copied = allow_copy and info['audio'][0] == 'mp3'
+    codec = ['-c:a', 'copy'] if copied else ['-c:a', 'libmp3lame', '-b:a', bitrate]
+    return [*FFMPEG_PREFIX, '-i', source, '-map', '0:a:0', *codec, '-f', 'mp3', 'pipe:1'], copied
+
+
+def video_mp4_command(info, source, output, allow_copy=True):
+    """
+    Perintah konversi video ke MP4 H.264/AAC (action 10).
+
+    Parameter:
+        info (dict): Hasil parse_probe()
+        source, output (str): Path input dan output
+        allow_copy (bool): False untuk memaksa encode ulang semua stream
+
+    Return:
+        tuple: (args, copied), copied True jika setidaknya satu stream disalin
+
+    Catatan:
+        - Video dan audio diputuskan terpisah: H.264 dengan audio MP3
+          misalnya hanya meng-encode audionya
+    """
+    if not info['video']:
+        raise ValueError("File has no video track")
+    copy_video = allow_copy and info['video'][0] in MP4_VIDEO_CODECS
+    copy_audio = allow_copy and bool(info['audio']) and info['audio'][0] in MP4_AUDIO_CODECS
+    args = [*FFMPEG_PREFIX, '-y', '-i', source, '-map', '0:v:0']
+    if copy_video:
+        args += ['-c:v', 'copy']
+    else:
+        args += ['-c:v', 'libx264', '-preset', 'fast', '-crf', '23', '-pix_fmt', 'yuv420p']
+    if info['audio']:
+        args += ['-map', '0:a:0', '-c:a', 'copy' if copy_audio else 'aac']
+    args += ['-movflags', '+faststart', '-f', 'mp4', output]
+    return args, copy_video or copy_audio
+
+
+class ProgressParser:
+    """
+    Membaca baris output -progress ffmpeg menjadi fraksi selesai.
+
+    Parameter:
+        duration (float): Durasi input dalam detik dari parse_probe(), boleh None
+
+    Catatan:
+        - ffmpeg menulis blok key=value yang diakhiri progress=continue atau
+          progress=end; fraksi hanya dihasilkan di akhir setiap blok
+        - Tanpa durasi, hanya progress=end (1.0) yang dilaporkan
+    """
+
+    def __init__(self, duration):
+        self.duration = duration
+        self._out_time = 0.0
+
+    def feed(self, line):
+        """
+        Return:
+            float atau None: Fraksi 0-1 di akhir blok, None untuk baris lainnya
+        """
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        key, _, value = line.strip().partition('=')
+        if key in ('out_time_us', 'out_time_ms'):
+            # Both keys are in microseconds (out_time_ms is misnamed by ffmpeg)
+            try:
+                self._out_time = max(self._out_time, int(value) / 1000000)
+            except ValueError:
+                pass  # 'N/A' before the first frame
+        elif key == 'progress':
+            if value == 'end':
+                return 1.0
+            if self.duration:
+                return min(0.99, self._out_time / self.duration)
+        return None
@@ -0,0 +1,388 @@
+"""
+Scheduler untuk semua panggilan API Telegram keluar (send, edit, delete).
+
+Catatan:
+    - Token bucket global (default 30/detik) dan per chat (default 1/detik
+      dengan burst kecil) sesuai batas flood Telegram
+    - Antrian berprioritas: hasil konversi > pesan status > animasi
+    - Edit ke pesan yang sama yang belum terkirim digabung, hanya teks
+      terakhir yang dikirim
+    - Error 429 menjeda chat (atau semua chat) selama retry_after lalu
+      request diantrikan ulang; error jaringan dicoba ulang dengan backoff
+      terbatas, sehingga retry tidak melipatgandakan beban
+    - Upload file dikirim dari thread pool sendiri dan hanya diambil dari
+      antrian jika ada thread upload yang kosong, sehingga upload besar
+      tidak menahan pesan status di chat lain
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import concurrent.futures
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RESULT = 0
+PRIORITY_STATUS = 1
+PRIORITY_ANIMATION = 2
+
+
+class TokenBucket:
+    """
+    Token bucket sederhana.
+
+    Parameter:
+        rate (float): Token per detik
+        capacity (float): Jumlah token maksimum (burst)
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now):
+        """
+        Return:
+            float: Detik sampai satu token tersedia (0 jika tersedia sekarang)
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until):
+        self.blocked_until = max(self.blocked_until, until)
+
+
+class OutboundRequest:
+    __slots__ = ('priority', 'method', 'args', 'kwargs', 'chat_id', 'key', 'upload', 'future',
+                 'attempts', 'not_before', 'queued')
+
+    def __init__(self, priority, method, args, kwargs, chat_id, key, upload=False):
+        self.priority = priority
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.chat_id = chat_id
+        self.key = key
+        self.upload = upload
+        self.future = concurrent.futures.Future()
+        self.attempts = 0
+        self.not_before = 0.0
+        self.queued = True
+
+
+class OutboundScheduler:
+    """
+    Mengatur urutan dan laju panggilan API keluar.
+
+    Parameter:
+        global_rate (float): Batas request per detik untuk semua chat
+        chat_rate (float): Batas request per detik per chat
+        chat_burst (float): Kapasitas burst per chat
+        max_retries (int): Percobaan ulang maksimum per request
+        retry_after (callable): Fungsi error -> detik tunggu untuk HTTP 429,
+                                None jika error bukan 429
+        senders (int): Jumlah thread pengirim untuk request biasa
+        uploaders (int): Jumlah thread pengirim upload, sekaligus batas upload
+                         yang berjalan bersamaan
+    """
+
+    MAX_IDLE_BUCKETS = 1000
+
+    def __init__(self, global_rate=30, chat_rate=1, chat_burst=3, max_retries=3,
+                 retry_after=None, senders=4, uploaders=2):
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.retry_after = retry_after or (lambda error: None)
+        self._chat_buckets = {}
+        self._queue = []
+        self._pending_keys = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._senders = concurrent.futures.ThreadPoolExecutor(max_workers=senders, thread_name_prefix='outbound')
+        self._uploaders = concurrent.futures.ThreadPoolExecutor(max_workers=uploaders,
+                                                                thread_name_prefix='outbound-upload')
+        self.uploaders = uploaders
+        self._uploads_in_flight = 0
+        self._thread = None
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.MAX_IDLE_BUCKETS:
+                self._prune_buckets()
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _prune_buckets(self):
+        # A full, unblocked bucket behaves exactly like a new one
+        now = time.monotonic()
+        for chat_id, bucket in list(self._chat_buckets.items()):
+            if bucket.wait_time(now) == 0 and bucket.tokens >= bucket.capacity:
+                del self._chat_buckets[chat_id]
+
+    def submit(self, method, args=(), kwargs=None, chat_id=None, priority=PRIORITY_STATUS, key=None,
+               upload=False):
+        """
+        Mengantrikan satu panggilan API.
+
+        Parameter:
+            method (callable): Fungsi yang melakukan panggilan API
+            args, kwargs: Argumen untuk method
+            chat_id: Chat tujuan untuk bucket per chat, None jika tidak dibatasi per chat
+            priority (int): PRIORITY_RESULT, PRIORITY_STATUS, atau PRIORITY_ANIMATION
+            key: Kunci penggabungan; request lain dengan kunci sama yang belum
+                 terkirim diganti oleh request ini
+            upload (bool): True untuk upload file, dikirim lewat thread upload
+
+        Return:
+            concurrent.futures.Future: Hasil panggilan API
+        """
+        kwargs = kwargs or {}
+        with self._cond:
+            self._start()
+            existing = self._pending_keys.get(key) if key is not None else None
+            if existing is not None and existing.queued:
+                # Superseded edit: send only the newest content
+                existing.method = method
+                existing.args = args
+                existing.kwargs = kwargs
+                if priority < existing.priority:
+                    existing.priority = priority
+                    heapq.heappush(self._queue, (priority, next(self._seq), existing))
+                return existing.future
+
+            request = OutboundRequest(priority, method, args, kwargs, chat_id, key, upload)
+            if key is not None:
+                self._pending_keys[key] = request
+            heapq.heappush(self._queue, (priority, next(self._seq), request))
+            self._cond.notify()
+            return request.future
+
+    def pending_count(self):
+        with self._cond:
+            return sum(1 for _, _, request in self._queue if request.queued)
+
+    def _start(self):
+        # Must be called with the condition held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._dispatch_loop, name='outbound-scheduler', daemon=True)
+            self._thread.start()
+
+    def _next_ready(self, now):
+        """
+        Mengambil request prioritas tertinggi yang boleh dikirim sekarang.
+
+        Return:
+            tuple: (request atau None, detik tunggu jika tidak ada yang siap)
+        """
+        wait = None
+        global_wait = self.global_bucket.wait_time(now)
+        skipped = []
+        ready = None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            request = entry[2]
+            if not request.queued or entry[0] != request.priority:
+                continue  # Already sent or re-queued with a higher priority
+            if request.upload and self._uploads_in_flight >= self.uploaders:
+                skipped.append(entry)  # Waits in the heap until an upload finishes
+                continue
+            delay = max(global_wait, request.not_before - now)
+            if request.chat_id is not None:
+                delay = max(delay, self._chat_bucket(request.chat_id).wait_time(now))
+            if delay <= 0:
+                ready = request
+                break
+            skipped.append(entry)
+            wait = delay if wait is None else min(wait, delay)
+            if global_wait > 0:
+                break  # Nothing can go out before the global bucket refills
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+        return ready, wait
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                request, wait = self._next_ready(now)
+                if request is None:
+                    self._cond.wait(wait)
+                    continue
+                request.queued = False
+                if request.key is not None and self._pending_keys.get(request.key) is request:
+                    del self._pending_keys[request.key]
+                self.global_bucket.take(now)
+                if request.chat_id is not None:
+                    self._chat_bucket(request.chat_id).take(now)
+                if request.upload:
+                    self._uploads_in_flight += 1
+            if request.upload:
+                self._uploaders.submit(self._send_upload, request)
+            else:
+                self._senders.submit(self._send, request)
+
+    def _requeue(self, request, delay):
+        with self._cond:
+            if request.key is not None:
+                newer = self._pending_keys.get(request.key)
+                if newer is not None:
+                    # A newer edit of the same message is already queued
+                    request.future.set_result(None)
+                    return
+                self._pending_keys[request.key] = request
+            request.not_before = time.monotonic() + delay
+            request.queued = True
+            heapq.heappush(self._queue, (request.priority, next(self._seq), request))
+            self._cond.notify()
+
+    def _send_upload(self, request):
+        try:
+            self._send(request)
+        finally:
+            with self._cond:
+                self._uploads_in_flight -= 1
+                self._cond.notify()
+
+    def _send(self, request):
+        request.attempts += 1
+        try:
+            if request.attempts > 1:
+                # Rewind uploads before sending them again
+                for value in list(request.args) + list(request.kwargs.values()):
+                    if hasattr(value, 'seek') and hasattr(value, 'read'):
+                        value.seek(0)
+            result = request.method(*request.args, **request.kwargs)
+        except Exception as e:
+            retry_after = self.retry_after(e)
+            if retry_after is not None and request.attempts <= self.max_retries:
+                until = time.monotonic() + retry_after
+                with self._cond:
+                    if request.chat_id is not None:
+                        self._chat_bucket(request.chat_id).block(until)
+                    else:
+                        self.global_bucket.block(until)
+                logger.warning(f"Rate limited by Telegram, retrying in {retry_after:.0f}s")
+                self._requeue(request, retry_after)
+                return
+            if retry_after is None and request.attempts <= self.max_retries and self._is_transient(e):
+                self._requeue(request, min(2 ** request.attempts, 10))
+                return
+            request.future.set_exception(e)
+            return
+        request.future.set_result(result)
+
+    @staticmethod
+    def _is_transient(error):
+        # Network problems are worth retrying; API errors (bad request,
+        # message not found, ...) will fail the same way again
+        if hasattr(error, 'error_code'):
+            return False
+        return isinstance(error, (ConnectionError, TimeoutError, OSError)) or \
+            type(error).__module__.split('.')[0] in ('requests', 'urllib3', 'aiohttp')
+
+
+class ScheduledBot:
+    """
+    Proxy bot yang mengirim semua panggilan API keluar lewat OutboundScheduler.
+
+    Parameter:
+        transport: Objek bot asli (TeleBot atau AsyncBotBridge)
+        scheduler (OutboundScheduler): Scheduler yang dipakai
+
+    Catatan:
+        - Method di METHOD_PRIORITIES menunggu hasil dari scheduler, sehingga
+          kode pemanggil tetap mendapat objek Message seperti biasa
+        - submit() mengantrikan tanpa menunggu (untuk animasi)
+        - Method di UPLOADS dikirim lewat thread upload scheduler
+        - reply_to() dikirim sebagai send_message ke chat pesan asal, karena
+          reply_to milik TeleBot memanggil send_message-nya sendiri dan akan
+          melewati scheduler
+        - Atribut lain (decorator handler, get_file, ...) langsung ke transport
+    """
+
+    METHOD_PRIORITIES = {
+        'send_document': PRIORITY_RESULT,
+        'send_audio': PRIORITY_RESULT,
+        'send_photo': PRIORITY_RESULT,
+        'send_video': PRIORITY_RESULT,
+        'send_media_group': PRIORITY_RESULT,
+        'send_message': PRIORITY_STATUS,
+        'edit_message_text': PRIORITY_STATUS,
+        'edit_message_reply_markup': PRIORITY_STATUS,
+        'delete_message': PRIORITY_STATUS,
+        'answer_callback_query': PRIORITY_STATUS,
+    }
+    # Callback answers are not chat messages; they only count globally
+    UNTHROTTLED_PER_CHAT = {'answer_callback_query'}
+    COALESCED = {'edit_message_text', 'edit_message_reply_markup'}
+    UPLOADS = {'send_document', 'send_media_group', 'send_audio', 'send_video'}
+
+    def __init__(self, transport, scheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    def __getattr__(self, name):
+        if name not in self.METHOD_PRIORITIES:
+            return getattr(self.transport, name)
+
+        def call_api(*args, **kwargs):
+            return self.submit(name, *args, **kwargs).result()
+        return call_api
+
+    def reply_to(self, message, text, **kwargs):
+        return self.send_message(message.chat.id, text, reply_to_message_id=message.message_id, **kwargs)
+
+    def submit(self, name, *args, priority=None, **kwargs):
+        """
+        Mengantrikan panggilan API tanpa menunggu hasilnya.
+
+        Return:
+            concurrent.futures.Future: Hasil panggilan API
+        """
+        if priority is None:
+            priority = self.METHOD_PRIORITIES.get(name, PRIORITY_STATUS)
+        chat_id, message_id = self._target(name, args, kwargs)
+        key = (name, chat_id, message_id) if name in self.COALESCED and message_id is not None else None
+        if name in self.UNTHROTTLED_PER_CHAT:
+            chat_id = None
+        method = getattr(self.transport, name)
+        return self.scheduler.submit(method, args, kwargs, chat_id=chat_id, priority=priority, key=key,
+                                     upload=name in self.UPLOADS)
+
+    @staticmethod
+    def _target(name, args, kwargs):
+        if name == 'answer_callback_query':
+            return None, None
+        if name == 'edit_message_text':
+            # edit_message_text(text, chat_id, message_id, ...)
+            chat_id = kwargs.get('chat_id', args[1] if len(args) > 1 else None)
+            message_id = kwargs.get('message_id', args[2] if len(args) > 2 else None)
+            return chat_id, message_id
+        chat_id = kwargs.get('chat_id', args[0] if args else None)
+        message_id = kwargs.get('message_id', args[1] if len(args) > 1 else None)
+        if name not in ('delete_message', 'edit_message_reply_markup'):
+            message_id = None
+        return chat_id, message_id
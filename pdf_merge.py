@@ -0,0 +1,209 @@
+"""
+Penggabung PDF streaming untuk fitur PDF merge.
+
+Catatan:
+    - PdfMerger milik PyPDF2 menyalin setiap input utuh ke BytesIO dan
+      menyimpan semua objek sampai write(), sehingga memori puncak sebanding
+      dengan jumlah semua input ditambah salinan output
+    - StreamingPdfMerger membaca satu input dengan PdfReader (objek dibaca
+      lazy dari stream yang seekable), langsung menulis objek halaman dan
+      semua yang direferensikannya ke output, lalu melepas reader itu
+    - Nomor objek diberi ulang per input; hanya tabel offset (beberapa byte
+      per objek) dan daftar halaman yang disimpan sampai close()
+    - Output hanya perlu method write(), jadi bisa langsung berupa
+      EncryptedFileWriter
+    - inspect_pdf() memvalidasi PDF saat upload hanya dari xref, trailer, dan
+      page tree (tanpa membaca isi halaman); PdfReader hasilnya bisa langsung
+      diberikan ke append() sehingga setiap input hanya diparse sekali
+"""
+
+from io import BytesIO
+
+try:
+    from PyPDF2 import PdfReader
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+except ImportError:
+    from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+PDF_HEADER = b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n'
+_CATALOG_NUM = 1
+_PAGES_NUM = 2
+# Page tree nodes and catalogs are rebuilt, never copied from an input
+_SKIPPED_TYPES = ('/Pages', '/Catalog')
+
+
+def inspect_pdf(stream):
+    """
+    Memvalidasi PDF secara ringan dan mengembalikan struktur yang sudah diparse.
+
+    Parameter:
+        stream: File-like seekable berisi PDF; harus tetap terbuka selama
+                reader hasilnya masih dipakai
+
+    Return:
+        dict: {'reader': PdfReader, 'pages': jumlah halaman,
+               'encrypted': bool, 'objects': jumlah objek di xref}
+
+    Catatan:
+        - Hanya membaca header, xref, trailer, dan node page tree
+        - Akan raise ValueError jika PDF rusak, tidak punya halaman, atau
+          terkunci password
+    """
+    try:
+        reader = PdfReader(stream)
+        encrypted = reader.is_encrypted
+        if encrypted and not reader.decrypt(''):
+            raise ValueError("PDF is password protected")
+        pages = len(reader.pages)
+        objects = int(reader.trailer.get('/Size', 0))
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Invalid PDF: {str(e)}") from e
+    if pages == 0:
+        raise ValueError("PDF has no pages")
+    return {'reader': reader, 'pages': pages, 'encrypted': encrypted, 'objects': objects}
+
+
+class StreamingPdfMerger:
+    """
+    Menggabungkan PDF satu per satu ke output tanpa menahan semua input di memori.
+
+    Parameter:
+        output: Objek file-like dengan method write()
+
+    Catatan:
+        - Panggil append() untuk setiap input sesuai urutan, lalu close()
+        - Bookmark, form, dan struktur dokumen tingkat katalog tidak dibawa,
+          sama seperti PdfMerger dengan import_outline=False
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.page_count = 0
+        self._position = 0
+        self._offsets = {}
+        self._kids = []
+        self._next_num = _PAGES_NUM + 1
+        self._closed = False
+        self._write(PDF_HEADER)
+
+    def _write(self, data):
+        self.output.write(data)
+        self._position += len(data)
+
+    def append(self, source):
+        """
+        Menyalin semua halaman dari satu PDF ke output.
+
+        Parameter:
+            source: File-like seekable berisi PDF (misalnya EncryptedFileReader),
+                    atau PdfReader dari inspect_pdf() yang stream-nya masih terbuka
+
+        Return:
+            int: Jumlah halaman yang ditambahkan
+
+        Catatan:
+            - Akan raise ValueError jika PDF terenkripsi dengan password
+        """
+        if isinstance(source, PdfReader):
+            reader = source
+        else:
+            reader = inspect_pdf(source)['reader']
+
+        numbers = {}
+        pending = []
+
+        def renumber(reference):
+            key = (reference.idnum, reference.generation)
+            num = numbers.get(key)
+            if num is None:
+                num = numbers[key] = self._next_num
+                self._next_num += 1
+                pending.append((key, num))
+            return num
+
+        page_nums = set()
+        for page in reader.pages:
+            num = renumber(page.indirect_reference)
+            page_nums.add(num)
+            self._kids.append(num)
+
+        while pending:
+            key, num = pending.pop()
+            obj = reader.get_object(IndirectObject(key[0], key[1], reader))
+            buffer = BytesIO()
+            buffer.write(b'%d 0 obj\n' % num)
+            if isinstance(obj, DictionaryObject) and obj.get('/Type') in _SKIPPED_TYPES:
+                buffer.write(b'null')
+            elif num in page_nums:
+                # PdfReader already copied inherited attributes onto the page
+                self._write_value(obj, buffer, renumber, parent=_PAGES_NUM)
+            else:
+                self._write_value(obj, buffer, renumber)
+            buffer.write(b'\nendobj\n')
+            self._offsets[num] = self._position
+            self._write(buffer.getvalue())
+
+        self.page_count += len(page_nums)
+        return len(page_nums)
+
+    def _write_value(self, value, buffer, renumber, parent=None):
+        if isinstance(value, IndirectObject):
+            buffer.write(b'%d 0 R' % renumber(value))
+        elif isinstance(value, DictionaryObject):
+            is_stream = isinstance(value, StreamObject)
+            buffer.write(b'<<')
+            for key, item in value.items():
+                if key == '/Parent' and parent is not None:
+                    continue
+                if is_stream and key == '/Length':
+                    continue
+                buffer.write(b'\n')
+                key.write_to_stream(buffer, None)
+                buffer.write(b' ')
+                self._write_value(item, buffer, renumber)
+            if parent is not None:
+                buffer.write(b'\n/Parent %d 0 R' % parent)
+            if is_stream:
+                data = value._data
+                buffer.write(b'\n/Length %d\n>>\nstream\n' % len(data))
+                buffer.write(data)
+                buffer.write(b'\nendstream')
+            else:
+                buffer.write(b'\n>>')
+        elif isinstance(value, ArrayObject):
+            buffer.write(b'[')
+            for index, item in enumerate(value):
+                if index:
+                    buffer.write(b' ')
+                self._write_value(item, buffer, renumber)
+            buffer.write(b']')
+        elif value is None:
+            buffer.write(b'null')
+        else:
+            value.write_to_stream(buffer, None)
+
+    def close(self):
+        """
+        Menulis page tree, katalog, dan tabel xref (output tidak ditutup).
+        """
+        if self._closed:
+            return
+        self._closed = True
+        kids = b' '.join(b'%d 0 R' % num for num in self._kids)
+        self._offsets[_PAGES_NUM] = self._position
+        self._write(b'%d 0 obj\n<<\n/Type /Pages\n/Kids [%s]\n/Count %d\n>>\nendobj\n'
+                    % (_PAGES_NUM, kids, len(self._kids)))
+        self._offsets[_CATALOG_NUM] = self._position
+        self._write(b'%d 0 obj\n<<\n/Type /Catalog\n/Pages %d 0 R\n>>\nendobj\n' % (_CATALOG_NUM, _PAGES_NUM))
+
+        xref_position = self._position
+        size = self._next_num
+        lines = [b'xref\n0 %d\n0000000000 65535 f \n' % size]
+        for num in range(1, size):
+            lines.append(b'%010d 00000 n \n' % self._offsets.get(num, 0))
+        self._write(b''.join(lines))
+        self._write(b'trailer\n<<\n/Size %d\n/Root %d 0 R\n>>\nstartxref\n%d\n%%%%EOF\n'
+                    % (size, _CATALOG_NUM, xref_position))
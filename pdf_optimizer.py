@@ -0,0 +1,151 @@
+"""
+Optimasi PDF berbasis konten dengan PyMuPDF (action 5).
+
+Catatan:
+    - Teks, vektor, dan font tidak disentuh; hanya image XObject yang
+      resolusinya melebihi kebutuhan tampilan yang di-downsample dan
+      di-encode ulang sebagai JPEG
+    - Resolusi efektif dihitung dari ukuran piksel gambar dibanding ukuran
+      tampil terbesarnya di semua halaman (72 point = 1 inci)
+    - Gambar dengan transparansi (SMask), mask, atau filter khusus (JBIG2,
+      CCITT) dilewati karena tidak bisa diwakili JPEG tanpa kehilangan makna
+    - Stream pengganti hanya dipakai jika lebih kecil dari aslinya
+    - Penyimpanan akhir memakai garbage=4 (buang objek tak terpakai dan
+      gabungkan stream identik) dan deflate untuk semua stream
+"""
+
+from io import BytesIO
+
+DEFAULT_MAX_DPI = 150
+DEFAULT_JPEG_QUALITY = 60
+MIN_IMAGE_BYTES = 16 * 1024  # Smaller images are not worth re-encoding
+_SKIPPED_FILTERS = ('JBIG2Decode', 'CCITTFaxDecode')
+
+
+def collect_images(doc):
+    """
+    Mengumpulkan semua image XObject beserta ukuran tampil terbesarnya.
+
+    Parameter:
+        doc (fitz.Document): Dokumen sumber
+
+    Return:
+        dict: xref -> {'page', 'width', 'height', 'display_width', 'display_height'}
+              width/height dalam piksel, display_* dalam point
+    """
+    images = {}
+    for page in doc:
+        for item in page.get_images(full=True):
+            xref, smask, width, height = item[0], item[1], item[2], item[3]
+            if smask:
+                continue
+            try:
+                rects = page.get_image_rects(xref)
+            except Exception:
+                rects = []
+            display_width = max((rect.width for rect in rects), default=0)
+            display_height = max((rect.height for rect in rects), default=0)
+            info = images.get(xref)
+            if info is None:
+                images[xref] = {'page': page.number, 'width': width, 'height': height,
+                                'display_width': display_width, 'display_height': display_height}
+            else:
+                info['display_width'] = max(info['display_width'], display_width)
+                info['display_height'] = max(info['display_height'], display_height)
+    return images
+
+
+def target_size(info, max_dpi):
+    """
+    Menghitung ukuran piksel maksimum agar gambar tidak melebihi max_dpi.
+
+    Return:
+        tuple: (lebar, tinggi) baru, sama dengan ukuran asli jika sudah cukup kecil
+    """
+    width, height = info['width'], info['height']
+    if not info['display_width'] or not info['display_height']:
+        return width, height  # Not placed visibly; resolution cannot be judged
+    scale = min(max_dpi * info['display_width'] / 72 / width,
+                max_dpi * info['display_height'] / 72 / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _encode_image(doc, xref, size, jpeg_quality):
+    """
+    Mendekode satu gambar, mengubah ukurannya, lalu meng-encode ke JPEG.
+
+    Return:
+        bytes atau None: Stream JPEG baru, None jika gambar harus dilewati
+    """
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha:
+        return None
+    if pix.colorspace is None or pix.colorspace.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    mode = 'L' if pix.n == 1 else 'RGB'
+    img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+    if img.size != size:
+        img = img.resize(size, Image.LANCZOS)
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=jpeg_quality, optimize=True)
+    return output.getvalue()
+
+
+def optimize_pdf(source_path, output, max_dpi=DEFAULT_MAX_DPI, jpeg_quality=DEFAULT_JPEG_QUALITY, check=None):
+    """
+    Mengoptimasi PDF dengan meng-encode ulang gambar yang terlalu besar.
+
+    Parameter:
+        source_path (str): Path PDF plaintext
+        output: File-like tujuan (butuh write() dan tell())
+        max_dpi (int): Resolusi efektif maksimum untuk gambar
+        jpeg_quality (int): Kualitas JPEG untuk gambar yang di-encode ulang
+        check (callable): Dipanggil di antara gambar untuk pembatalan, boleh None
+
+    Return:
+        dict: {'page_count', 'images', 'recompressed', 'saved_bytes'}
+
+    Catatan:
+        - Gambar yang dipakai di banyak halaman hanya diproses sekali karena
+          stream diganti langsung di xref-nya
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(source_path)
+    try:
+        images = collect_images(doc)
+        recompressed = 0
+        saved_bytes = 0
+        for xref, info in images.items():
+            if check:
+                check()
+            image_filter = doc.xref_get_key(xref, 'Filter')[1]
+            if any(name in image_filter for name in _SKIPPED_FILTERS):
+                continue
+            if doc.xref_get_key(xref, 'Mask')[0] != 'null':
+                continue
+            old_size = len(doc.xref_stream_raw(xref))
+            if old_size < MIN_IMAGE_BYTES:
+                continue
+            size = target_size(info, max_dpi)
+            if size == (info['width'], info['height']) and 'DCTDecode' in image_filter:
+                continue  # Already a JPEG at a sensible resolution
+            try:
+                data = _encode_image(doc, xref, size, jpeg_quality)
+            except Exception:
+                continue  # Unusual colorspace or broken stream: keep the original
+            if data is None or len(data) >= old_size:
+                continue
+            doc[info['page']].replace_image(xref, stream=data)
+            recompressed += 1
+            saved_bytes += old_size - len(data)
+
+        doc.save(output, garbage=4, deflate=True, deflate_images=True, deflate_fonts=True,
+                 clean=True)
+        return {'page_count': len(doc), 'images': len(images),
+                'recompressed': recompressed, 'saved_bytes': saved_bytes}
+    finally:
+        doc.close()
@@ -1,34 +1,38 @@
 import os
-import sqlite3
-import zipfile
 import threading
 import time
 import logging
 import uuid
+import signal
 import shutil
 import asyncio
 import concurrent.futures
+import multiprocessing
 from datetime import datetime, timedelta
 from io import BytesIO
-from PIL import Image
 import telebot
 from telebot import types
 import mimetypes
-import subprocess
 import base64
 import secrets
 import tempfile
 import platform
+import importlib.util
+from timer_wheel import TimerWheel
+from outbound_scheduler import OutboundScheduler, ScheduledBot, PRIORITY_ANIMATION
+from file_repository import FileRepository, STATE_MERGING, STATE_PROCESSING
+import secure_storage
+import conversion_jobs
+import tool_runner
 
 # Import optimized encryption libraries
 try:
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
     from cryptography.hazmat.backends import default_backend
-    from cryptography.hazmat.primitives import padding
-    HAS_AES = True
+    HAS_AES = importlib.util.find_spec("cryptography.hazmat.primitives.ciphers.aead") is not None
 except ImportError:
-    from cryptography.fernet import Fernet
     HAS_AES = False
+if not HAS_AES:
+    from cryptography.fernet import Fernet
 
 # Try to import libraries for better conversions
 try:
@@ -48,19 +52,21 @@ except ImportError:
     print("Warning: Some conversion libraries may not be available.")
     print("For best results, install: pip install pdf2docx docx2pdf")
 
-# Try to import PDF merger library
+# Try to import the asyncio bot (requires aiohttp)
+try:
+    from telebot.async_telebot import AsyncTeleBot
+    HAS_ASYNC_BOT = True
+except ImportError:
+    HAS_ASYNC_BOT = False
+
+# Try to import PDF merger library (pdf_merge needs PyPDF2 or pypdf)
 try:
-    from PyPDF2 import PdfMerger
+    from pdf_merge import StreamingPdfMerger, inspect_pdf
     HAS_PDF_MERGER = True
-    print("PyPDF2 library found - PDF merging available")
+    print("PyPDF2/pypdf library found - PDF merging available")
 except ImportError:
-    try:
-        from pypdf import PdfMerger
-        HAS_PDF_MERGER = True
-        print("pypdf library found - PDF merging available")
-    except ImportError:
-        HAS_PDF_MERGER = False
-        print("Warning: PDF merger not available. Install with: pip install PyPDF2")
+    HAS_PDF_MERGER = False
+    print("Warning: PDF merger not available. Install with: pip install PyPDF2")
 
 # Check if we're on Windows
 IS_WINDOWS = platform.system() == 'Windows'
@@ -76,12 +82,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Encryption setup - using AES-256 with hardware acceleration when available
+# Encryption setup - using AES-256-GCM with hardware acceleration when available
 if HAS_AES:
-    # Generate a secure AES-256 key
+    # Generate a secure AES-256 key; every file gets its own random nonce prefix
     ENCRYPTION_KEY = secrets.token_bytes(32)  # 256 bits
-    # Generate a secure IV (Initialization Vector)
-    ENCRYPTION_IV = secrets.token_bytes(16)   # 128 bits
     # Use hardware acceleration if available
     backend = default_backend()
 else:
@@ -93,12 +97,43 @@ else:
 # Use more workers on multi-core systems for better performance
 encryption_pool = concurrent.futures.ThreadPoolExecutor(max_workers=min(os.cpu_count() or 4, 8))
 
+# Worker processes started by the conversion pool re-import this module
+# (spawn start method), so they must not start bot-side background work
+IS_WORKER_PROCESS = multiprocessing.parent_process() is not None
+
 # Security settings
 SECURE_DELETE_PASSES = 1  # Single pass is sufficient with modern storage
 FILE_RETENTION_MINUTES = 15  # Maximum time to keep files in database
 TEMP_FILE_RETENTION_MINUTES = 5  # Maximum time to keep temporary files
 SESSION_TIMEOUT_SECONDS = 120  # 2-minute countdown timer for security
+COUNTDOWN_FINAL_SECONDS = 5  # Update the countdown every second only in the last seconds
+COUNTDOWN_EDITS_PER_TICK = 20  # Max countdown edits sent per second across all sessions
 MIN_COMPRESSION_TARGET = 0.5  # Target at least 50% file size reduction
+DOWNLOAD_CHUNK_SIZE = 256 * 1024  # Stream Telegram downloads in 256KB pieces
+
+# Conversion job settings
+CONVERSION_WORKERS = max(1, min(os.cpu_count() or 2, 4))  # Worker processes for heavy conversions
+CONVERSION_RESULT_GRACE = 30  # Seconds to wait past a job deadline before giving up on it
+CONVERSION_PROGRESS_INTERVAL = 3  # Minimum seconds between progress edits of one status message
+CONVERSION_TIMEOUTS = {  # Per job type limit in seconds
+    'image_convert': 60,
+    'image_compress': 60,
+    'pdf_compress': 300,
+    'extract_audio': 300,
+    'zip_file': 120,
+    'pdf_to_word': 300,
+    'document_to_pdf': 180,
+    'video_mp4': 600,
+    'audio_mp3': 300,
+    'image_batch': 300,
+    'zip_member': 120,
+    'zip_bundle': 120,
+}
+IMAGE_BATCH_LIMIT = 20  # Max images in one album batch
+IMAGE_BATCH_WINDOW = 2.0  # Seconds after the last album image before the batch menu is shown
+MEDIA_GROUP_LIMIT = 10  # Telegram allows 2-10 documents per media group; larger batches become a ZIP
+ZIP_SESSION_LIMIT = 20  # Max files in one multi-file ZIP archive
+ZIP_SESSION_WINDOW = 3.0  # Seconds after the last upload before the ZIP menu is shown
 
 # Security enhancements
 ALLOWED_FILE_TYPES = {'pdf', 'docx', 'doc', 'jpg', 'jpeg', 'png', 'webp', 'mp3', 'mp4'}
@@ -113,12 +148,54 @@ blocked_users = set()
 # Replace with your valid Telegram bot token
 BOT_TOKEN = "****"
 
-# Configure telebot with proper request settings
-telebot.apihelper.RETRY_ON_ERROR = True
+# Runtime mode: 'threaded' (TeleBot polling + timer threads) or 'asyncio'
+# (AsyncTeleBot polling, timers and cleanup loops on one event loop)
+RUNTIME_MODE = os.environ.get('RUPAGANTI_RUNTIME', 'threaded').lower()
+ASYNC_HANDLER_WORKERS = 16  # Threads running sync handlers in asyncio mode
+
+# Outbound API limits (Telegram allows ~30 msg/s overall and ~1 msg/s per chat)
+OUTBOUND_GLOBAL_RATE = 30
+OUTBOUND_CHAT_RATE = 1
+OUTBOUND_CHAT_BURST = 3  # Short bursts per chat (e.g. result + summary message)
+OUTBOUND_MAX_RETRIES = 3
+
+# Configure telebot with proper request settings; retries are handled by
+# the OutboundScheduler so they respect the rate limits
+telebot.apihelper.RETRY_ON_ERROR = False
 telebot.apihelper.CONNECT_TIMEOUT = 10
 
-# Initialize bot with token
-bot = telebot.TeleBot(BOT_TOKEN)
+def get_retry_after(error):
+    """
+    Mengambil nilai retry_after dari error flood control Telegram (HTTP 429).
+    
+    Parameter:
+        error (Exception): Exception dari panggilan API bot
+    
+    Return:
+        float atau None: Detik yang harus ditunggu, None jika bukan error 429
+    """
+    if isinstance(error, telebot.apihelper.ApiTelegramException) and error.error_code == 429:
+        parameters = (error.result_json or {}).get('parameters') or {}
+        return float(parameters.get('retry_after', 5))
+    return None
+
+# Initialize bot with token; in asyncio mode AsyncRuntime dispatches the
+# updates itself, so the handler registry must not start worker threads.
+# Every outbound call goes through the scheduler (priorities, token buckets,
+# coalesced edits)
+bot = ScheduledBot(
+    telebot.TeleBot(BOT_TOKEN, threaded=RUNTIME_MODE != 'asyncio'),
+    OutboundScheduler(global_rate=OUTBOUND_GLOBAL_RATE, chat_rate=OUTBOUND_CHAT_RATE,
+                      chat_burst=OUTBOUND_CHAT_BURST, max_retries=OUTBOUND_MAX_RETRIES,
+                      retry_after=get_retry_after)
+)
+
+# Set by AsyncRuntime.run() when the asyncio runtime is active
+async_runtime = None
+
+# Single scheduler for every deadline (session countdowns, inactivity checks,
+# merge batch windows); driven by its own thread or by AsyncRuntime
+timer_wheel = TimerWheel(tick=0.1, slots=1024)
 
 # Store active sessions with their timers
 active_sessions = {}
@@ -129,6 +206,15 @@ user_activity = {}
 # Store PDF merge sessions with enhanced batch support
 pdf_merge_sessions = {}
 
+# Store album (media group) image batches; album messages arrive on several handler threads
+image_batch_sessions = {}
+image_batch_lock = threading.Lock()
+seen_media_groups = {}  # media_group_id -> first seen time, so an album is rate limited once
+
+# Store multi-file ZIP sessions; each upload is compressed by its own job while the next one arrives
+zip_sessions = {}
+zip_session_lock = threading.Lock()
+
 
 
 # Store user service selections
@@ -208,6 +294,15 @@ LANG = {
         'pdf_file_corrupted': '❌ PDF file appears to be corrupted or invalid.',
         'pdf_merge_timeout': '⏰ PDF merge session expired. Start over to merge PDFs.',
         'cancel_merge': '❌ Cancel Merge',
+        'batch_images_received': '📸 **{} images received** ({:.1f} MB)\n\nChoose one operation to apply to all of them:',
+        'batch_image_limit': '⚠️ Maximum 20 images can be processed at once.',
+        'batch_result': '✅ **{} images processed!**\n\n📉 {:.1f} MB → {:.1f} MB',
+        'batch_skipped': '⚠️ Skipped {} image(s) that could not be processed.',
+        'zip_file_added': '✅ **File {}:** {}',
+        'zip_files_received': '📦 **{} files received** ({:.1f} MB)\n\nCreate one ZIP archive with all of them?',
+        'zip_session_limit': '⚠️ Maximum 20 files can be added to one ZIP archive.',
+        'zip_bundle_result': '✅ **ZIP created with {} files!**\n\n📉 {:.1f} MB → {:.1f} MB',
+        'create_zip': '📦 Create ZIP',
         'service_menu': 'Choose a service:',
         'pdf_tools': '📄 PDF Tools',
         'image_tools': '📸 Image Tools', 
@@ -295,6 +390,15 @@ LANG = {
         'pdf_file_corrupted': '❌ File PDF tampaknya rusak atau tidak valid.',
         'pdf_merge_timeout': '⏰ Sesi gabung PDF berakhir. Mulai ulang untuk gabung PDF.',
         'cancel_merge': '❌ Batal Gabung',
+        'batch_images_received': '📸 **{} gambar diterima** ({:.1f} MB)\n\nPilih satu operasi untuk semua gambar:',
+        'batch_image_limit': '⚠️ Maksimal 20 gambar bisa diproses sekaligus.',
+        'batch_result': '✅ **{} gambar berhasil diproses!**\n\n📉 {:.1f} MB → {:.1f} MB',
+        'batch_skipped': '⚠️ {} gambar dilewati karena tidak bisa diproses.',
+        'zip_file_added': '✅ **File {}:** {}',
+        'zip_files_received': '📦 **{} file diterima** ({:.1f} MB)\n\nBuat satu arsip ZIP berisi semua file?',
+        'zip_session_limit': '⚠️ Maksimal 20 file bisa dimasukkan ke satu arsip ZIP.',
+        'zip_bundle_result': '✅ **ZIP berisi {} file berhasil dibuat!**\n\n📉 {:.1f} MB → {:.1f} MB',
+        'create_zip': '📦 Buat ZIP',
         'service_menu': 'Pilih layanan:',
         'pdf_tools': '📄 Tools PDF',
         'image_tools': '📸 Tools Gambar',
@@ -381,7 +485,16 @@ LANG = {
         'pdf_merge_limit': '⚠️ يمكن دمج 10 ملفات PDF كحد أقصى في المرة الواحدة.',
         'pdf_file_corrupted': '❌ يبدو أن ملف PDF تالف أو غير صالح.',
         'pdf_merge_timeout': '⏰ انتهت جلسة دمج PDF. ابدأ من جديد لدمج ملفات PDF.',
-        'cancel_merge': '❌ إلغاء الدمج'
+        'cancel_merge': '❌ إلغاء الدمج',
+        'batch_images_received': '📸 **تم استلام {} صور** ({:.1f} MB)\n\nاختر عملية واحدة لتطبيقها على جميع الصور:',
+        'batch_image_limit': '⚠️ يمكن معالجة 20 صورة كحد أقصى في المرة الواحدة.',
+        'batch_result': '✅ **تمت معالجة {} صور!**\n\n📉 {:.1f} MB → {:.1f} MB',
+        'batch_skipped': '⚠️ تم تخطي {} صورة تعذرت معالجتها.',
+        'zip_file_added': '✅ **الملف {}:** {}',
+        'zip_files_received': '📦 **تم استلام {} ملفات** ({:.1f} MB)\n\nهل تريد إنشاء أرشيف ZIP واحد يضم جميع الملفات؟',
+        'zip_session_limit': '⚠️ يمكن إضافة 20 ملفًا كحد أقصى إلى أرشيف ZIP واحد.',
+        'zip_bundle_result': '✅ **تم إنشاء ZIP يضم {} ملفات!**\n\n📉 {:.1f} MB → {:.1f} MB',
+        'create_zip': '📦 إنشاء ZIP'
     },
     'jv': {
         'welcome': "🎉 **Sugeng rawuh ing RupaGanti** saka Grands!\n\n🚀 Asisten pangolahan file aman karo tools lengkap.\n\n🛠️ **Layanan sing Ana:**\n\n📄 **Tools PDF**\n• Gabung pirang-pirang PDF dadi siji\n• Kompres file PDF\n• Konversi PDF dadi Word\n\n📸 **Tools Gambar**\n• Konversi antarane JPG, PNG, WebP\n• Kompres gambar kanggo ngurangi ukuran\n• Optimasi kualitas gambar\n\n🎵 **Tools Media**\n• Konversi video dadi MP4\n• Ekstrak audio saka video\n• Konversi audio dadi MP3\n\n🗜️ **Tools Kompresi**\n• Gawe arsip ZIP\n• Kompres kabeh jinis file\n• Ngurangi ukuran file\n\n📱 **Dioptimalake kanggo Mobile & Desktop**\n\n🔐 **Fitur Keamanan:**\n• Enkripsi AES-256\n• Busak otomatis sawise proses\n• Ora ana data disimpen permanen\n• Proses lokal wae\n\n👇 **Pilih kategori layanan kanggo miwiti:**",
@@ -455,6 +568,15 @@ LANG = {
         'pdf_file_corrupted': '❌ File PDF katon rusak utawa ora valid.',
         'pdf_merge_timeout': '⏰ Sesi gabung PDF rampung. Miwiti maneh kanggo gabung PDF.',
         'cancel_merge': '❌ Batal Gabung',
+        'batch_images_received': '📸 **{} gambar ditampa** ({:.1f} MB)\n\nPilih siji operasi kanggo kabeh gambar:',
+        'batch_image_limit': '⚠️ Maksimal 20 gambar bisa diproses sekaligus.',
+        'batch_result': '✅ **{} gambar kasil diproses!**\n\n📉 {:.1f} MB → {:.1f} MB',
+        'batch_skipped': '⚠️ {} gambar dilewati amarga ora bisa diproses.',
+        'zip_file_added': '✅ **File {}:** {}',
+        'zip_files_received': '📦 **{} file ditampa** ({:.1f} MB)\n\nGawe siji arsip ZIP isi kabeh file?',
+        'zip_session_limit': '⚠️ Maksimal 20 file bisa dilebokake ing siji arsip ZIP.',
+        'zip_bundle_result': '✅ **ZIP isi {} file kasil digawe!**\n\n📉 {:.1f} MB → {:.1f} MB',
+        'create_zip': '📦 Gawe ZIP',
         'upload_pdf_split': '✂️ Upload file PDF kanggo dipisah dadi kaca-kaca terpisah'
     }
 }
@@ -498,22 +620,19 @@ def init_db():
     
     Catatan:
         - Membuat tabel 'files' jika belum ada
-        - Tabel berisi: id, user_id, file_id, file_name, file_path, created_at
-        - Menggunakan timeout 10 detik untuk koneksi database
+        - Tabel berisi: id, user_id, file_id, file_name, file_path, created_at,
+          expires_at, state (ditambahkan lewat migrasi skema)
+        - Semua akses database lewat file_repo (koneksi thread-local, mode WAL)
         - Akan raise exception jika inisialisasi gagal
     """
     try:
-        conn = sqlite3.connect('files.db', timeout=10.0)
-        conn.execute('''CREATE TABLE IF NOT EXISTS files
-                        (id INTEGER PRIMARY KEY, user_id INTEGER, file_id TEXT, 
-                         file_name TEXT, file_path TEXT, created_at TIMESTAMP)''')
-        conn.commit()
-        conn.close()
+        file_repo.init_schema()
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Database initialization failed: {str(e)}")
         raise
 
+file_repo = FileRepository('files.db', timeout=10.0, retention=timedelta(minutes=FILE_RETENTION_MINUTES))
 init_db()
 
 def get_file_type(filename):
@@ -567,56 +686,23 @@ def is_supported_file(filename):
 
 def encrypt_file_aes(file_data):
     """
-    Mengenkripsi data file menggunakan enkripsi AES-256 dengan akselerasi hardware.
+    Mengenkripsi data file in-memory menggunakan AES-256-GCM per chunk.
     
     Parameter:
         file_data (bytes): Data file yang akan dienkripsi
     
     Return:
-        bytes: Data terenkripsi dengan IV di awal
+        bytes: Data terenkripsi dalam format secure_storage (header + chunk)
     
     Catatan:
-        - Menggunakan AES-256 dalam mode CBC
-        - Untuk file besar (>10MB), memproses dalam chunk 1MB untuk efisiensi memori
-        - Untuk file kecil, menggunakan pendekatan sederhana
-        - IV (Initialization Vector) ditambahkan di awal data terenkripsi
-        - Menggunakan PKCS7 padding
+        - Format sama dengan file yang ditulis EncryptedFileWriter
+        - Setiap pemanggilan memakai nonce prefix acak baru
+        - Untuk file dari Telegram gunakan download_to_encrypted_file() agar
+          data tidak perlu dimuat seluruhnya ke memori
         - Akan raise exception jika enkripsi gagal
     """
     try:
-        # For large files, use a more efficient approach with less memory overhead
-        if len(file_data) > 10 * 1024 * 1024:  # 10MB
-            # Process in chunks for large files
-            chunk_size = 1024 * 1024  # 1MB chunks
-            padder = padding.PKCS7(algorithms.AES.block_size).padder()
-            cipher = Cipher(algorithms.AES(ENCRYPTION_KEY), modes.CBC(ENCRYPTION_IV), backend=backend)
-            encryptor = cipher.encryptor()
-            
-            # Process all but the last chunk
-            result = bytearray()
-            for i in range(0, len(file_data) - chunk_size, chunk_size):
-                chunk = file_data[i:i+chunk_size]
-                result.extend(encryptor.update(chunk))
-            
-            # Process the last chunk with padding
-            last_chunk = file_data[-(len(file_data) % chunk_size or chunk_size):]
-            padded_last_chunk = padder.update(last_chunk) + padder.finalize()
-            result.extend(encryptor.update(padded_last_chunk) + encryptor.finalize())
-            
-            # Prepend IV to the encrypted data for decryption later
-            return ENCRYPTION_IV + bytes(result)
-        else:
-            # For smaller files, use the simpler approach
-            padder = padding.PKCS7(algorithms.AES.block_size).padder()
-            padded_data = padder.update(file_data) + padder.finalize()
-            
-            cipher = Cipher(algorithms.AES(ENCRYPTION_KEY), modes.CBC(ENCRYPTION_IV), backend=backend)
-            encryptor = cipher.encryptor()
-            
-            encrypted_data = encryptor.update(padded_data) + encryptor.finalize()
-            
-            # Prepend IV to the encrypted data for decryption later
-            return ENCRYPTION_IV + encrypted_data
+        return secure_storage.encrypt_bytes(file_data, ENCRYPTION_KEY)
     except Exception as e:
         logger.error(f"AES encryption error: {str(e)}")
         raise
@@ -717,60 +803,21 @@ def calculate_compression_ratio(original_size, compressed_size):
 
 def decrypt_file_aes(encrypted_data):
     """
-    Mendekripsi data file menggunakan AES-256 dengan pemrosesan chunk untuk file besar.
+    Mendekripsi data file in-memory yang dienkripsi dengan AES-256-GCM per chunk.
     
     Parameter:
-        encrypted_data (bytes): Data terenkripsi dengan IV di awal
+        encrypted_data (bytes): Data terenkripsi dalam format secure_storage
     
     Return:
         bytes: Data asli yang sudah didekripsi
     
     Catatan:
-        - Mengekstrak IV dari 16 byte pertama data terenkripsi
-        - Untuk file besar (>10MB), memproses dalam chunk 1MB
-        - Untuk file kecil, menggunakan pendekatan sederhana
-        - Menggunakan PKCS7 unpadding untuk menghilangkan padding
+        - Setiap chunk diverifikasi tag GCM-nya, data yang diubah akan ditolak
+        - Untuk file di disk gunakan open_encrypted_reader() agar dekripsi lazy
         - Akan raise exception jika dekripsi gagal atau data tidak valid
     """
     try:
-        if len(encrypted_data) < 16:
-            raise ValueError("Encrypted data too short")
-            
-        # Extract IV from the beginning of the encrypted data
-        iv = encrypted_data[:16]
-        actual_encrypted_data = encrypted_data[16:]
-        
-        if len(actual_encrypted_data) == 0:
-            raise ValueError("No encrypted data after IV")
-        
-        # For large files, use a more efficient approach with less memory overhead
-        if len(actual_encrypted_data) > 10 * 1024 * 1024:  # 10MB
-            # Process in chunks for large files
-            chunk_size = 1024 * 1024  # 1MB chunks
-            cipher = Cipher(algorithms.AES(ENCRYPTION_KEY), modes.CBC(iv), backend=backend)
-            decryptor = cipher.decryptor()
-            unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
-            
-            # Process all but the last chunk
-            result = bytearray()
-            for i in range(0, len(actual_encrypted_data) - chunk_size, chunk_size):
-                chunk = actual_encrypted_data[i:i+chunk_size]
-                result.extend(decryptor.update(chunk))
-            
-            # Process the last chunk with unpadding
-            last_chunk = actual_encrypted_data[-(len(actual_encrypted_data) % chunk_size or chunk_size):]
-            decrypted_last_chunk = decryptor.update(last_chunk) + decryptor.finalize()
-            result.extend(unpadder.update(decrypted_last_chunk) + unpadder.finalize())
-            
-            return bytes(result)
-        else:
-            # For smaller files, use the simpler approach
-            cipher = Cipher(algorithms.AES(ENCRYPTION_KEY), modes.CBC(iv), backend=backend)
-            decryptor = cipher.decryptor()
-            padded_data = decryptor.update(actual_encrypted_data) + decryptor.finalize()
-            
-            unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
-            return unpadder.update(padded_data) + unpadder.finalize()
+        return secure_storage.decrypt_bytes(encrypted_data, ENCRYPTION_KEY)
     except Exception as e:
         logger.error(f"AES decryption error: {str(e)}")
         raise
@@ -849,6 +896,468 @@ def decrypt_file(encrypted_data):
         # If all fails, raise error
         raise ValueError("Failed to decrypt file data")
 
+class _FernetFileWriter(BytesIO):
+    """
+    Writer fallback untuk Fernet yang mengenkripsi seluruh isi saat close().
+    
+    Catatan:
+        - Fernet tidak mendukung streaming, sehingga data tetap dikumpulkan di memori
+        - Hanya dipakai jika AES-GCM tidak tersedia
+    """
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.bytes_written = 0
+
+    def write(self, data):
+        count = super().write(data)
+        self.bytes_written += count
+        return count
+
+    def close(self):
+        if not self.closed:
+            with open(self.path, 'wb') as f:
+                f.write(cipher_suite.encrypt(self.getvalue()))
+        super().close()
+
+    def abort(self):
+        super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
+
+def open_encrypted_writer(file_path):
+    """
+    Membuka writer yang mengenkripsi data secara streaming ke file_path.
+    
+    Parameter:
+        file_path (str): Path tujuan file terenkripsi
+    
+    Return:
+        file-like: Writer dengan method write(), close(), abort() dan atribut bytes_written
+    
+    Catatan:
+        - AES-256-GCM per chunk dengan nonce unik per file jika tersedia
+        - Fallback ke Fernet (in-memory) jika AES tidak tersedia
+        - Gunakan dengan 'with' agar file setengah jadi dihapus saat error
+    """
+    if HAS_AES:
+        return secure_storage.EncryptedFileWriter(file_path, ENCRYPTION_KEY)
+    return _FernetFileWriter(file_path)
+
+def open_encrypted_reader(file_path):
+    """
+    Membuka reader seekable yang mendekripsi file terenkripsi secara lazy.
+    
+    Parameter:
+        file_path (str): Path file terenkripsi
+    
+    Return:
+        file-like: Reader read-only dan seekable dengan atribut size (ukuran plaintext)
+    
+    Catatan:
+        - AES: hanya chunk yang dibaca yang didekripsi (random access), sehingga
+          PIL dan PdfReader bisa langsung membaca dari file terenkripsi
+        - Fernet: seluruh file didekripsi ke BytesIO
+        - Akan raise ValueError jika file rusak atau gagal diautentikasi
+    """
+    if HAS_AES:
+        return secure_storage.EncryptedFileReader(file_path, ENCRYPTION_KEY)
+    with open(file_path, 'rb') as f:
+        reader = BytesIO(cipher_suite.decrypt(f.read()))
+    reader.size = len(reader.getbuffer())
+    return reader
+
+def get_stored_file_size(file_path):
+    """
+    Mengambil ukuran asli (plaintext) file terenkripsi.
+    
+    Parameter:
+        file_path (str): Path file terenkripsi
+    
+    Return:
+        int: Ukuran plaintext dalam byte
+    
+    Catatan:
+        - AES: dihitung dari header dan ukuran file, tanpa dekripsi
+    """
+    if HAS_AES:
+        return secure_storage.plaintext_size(file_path)
+    with open_encrypted_reader(file_path) as reader:
+        return reader.size
+
+def read_decrypted_file(file_path):
+    """
+    Mendekripsi seluruh file terenkripsi ke memori.
+    
+    Parameter:
+        file_path (str): Path file terenkripsi
+    
+    Return:
+        bytes: Data asli yang sudah didekripsi
+    
+    Catatan:
+        - Ciphertext dibaca per chunk, tidak pernah dimuat utuh ke memori
+        - Hanya untuk konsumen yang memang butuh bytes (PIL, PyMuPDF)
+    """
+    start_time = time.time()
+    with open_encrypted_reader(file_path) as reader:
+        data = reader.read()
+    logger.info(f"File decrypted successfully in {time.time() - start_time:.2f} seconds")
+    return data
+
+def decrypt_file_to_path(file_path, dest_path):
+    """
+    Mendekripsi file terenkripsi langsung ke file plaintext (misalnya di temp/).
+    
+    Parameter:
+        file_path (str): Path file terenkripsi
+        dest_path (str): Path file plaintext tujuan
+    
+    Return:
+        int: Jumlah byte yang ditulis
+    
+    Catatan:
+        - Memori yang dipakai konstan (satu chunk) untuk ukuran file berapapun
+        - Dipakai untuk tool eksternal seperti ffmpeg, gs, dan pdf2docx
+    """
+    if HAS_AES:
+        return secure_storage.decrypt_to_file(file_path, dest_path, ENCRYPTION_KEY)
+    with open_encrypted_reader(file_path) as reader, open(dest_path, 'wb') as out:
+        shutil.copyfileobj(reader, out)
+        return reader.size
+
+def download_to_encrypted_file(file_info, file_path):
+    """
+    Mengunduh file dari Telegram dan mengenkripsinya langsung ke disk.
+    
+    Parameter:
+        file_info: Objek File dari bot.get_file()
+        file_path (str): Path tujuan file terenkripsi
+    
+    Return:
+        int: Ukuran file asli dalam byte
+    
+    Catatan:
+        - Response diunduh secara streaming per DOWNLOAD_CHUNK_SIZE
+        - Setiap potongan langsung dienkripsi, sehingga plaintext utuh tidak
+          pernah ada di memori maupun di disk
+        - Memakai pengaturan proxy dan session yang sama dengan telebot
+        - Akan raise exception jika unduhan atau enkripsi gagal
+    """
+    file_url = telebot.apihelper.FILE_URL or "https://api.telegram.org/file/bot{0}/{1}"
+    url = file_url.format(BOT_TOKEN, file_info.file_path)
+    session = telebot.apihelper._get_req_session()
+    timeout = (telebot.apihelper.CONNECT_TIMEOUT, telebot.apihelper.READ_TIMEOUT)
+    with session.get(url, proxies=telebot.apihelper.proxy, stream=True, timeout=timeout) as response:
+        if response.status_code != 200:
+            raise telebot.apihelper.ApiHTTPException('Download file', response)
+        with open_encrypted_writer(file_path) as writer:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    writer.write(chunk)
+    return writer.bytes_written
+
+class ConversionJob:
+    """
+    Handle untuk satu job konversi yang berjalan di pool proses.
+    
+    Parameter:
+        job_id (str): ID unik job
+        job_type (str): Kunci di conversion_jobs.JOB_HANDLERS
+        work_dir (str): Direktori kerja khusus job di dalam temp/
+        deadline (float): Batas waktu absolut (time.time()), None jika tanpa batas
+        owner: Pemilik job (user_id), dipakai untuk pembatalan massal
+        on_done (callable): Penerima hasil, dipanggil sebagai on_done(job, result, error)
+        db_id: ID file di database yang dikonversi, boleh None
+        on_progress (callable): Dipanggil sebagai on_progress(job, fraction), boleh None
+    
+    Catatan:
+        - future berisi concurrent.futures.Future dari ProcessPoolExecutor
+        - Pembatalan menandai work_dir dengan file marker yang dicek worker
+        - Progress dibaca dari file yang ditulis worker di work_dir
+    """
+    
+    def __init__(self, job_id, job_type, work_dir, deadline=None, owner=None, on_done=None,
+                 db_id=None, on_progress=None):
+        self.job_id = job_id
+        self.job_type = job_type
+        self.work_dir = work_dir
+        self.deadline = deadline
+        self.owner = owner
+        self.on_done = on_done
+        self.db_id = db_id
+        self.on_progress = on_progress
+        self.future = None
+        self.cancel_requested = False
+        self.delivered = False
+        self.last_progress = None
+        self.last_progress_time = 0
+    
+    def progress(self):
+        """
+        Return:
+            float atau None: Fraksi selesai terakhir yang dilaporkan worker
+        """
+        try:
+            with open(os.path.join(self.work_dir, conversion_jobs.JobContext.PROGRESS_FILE)) as f:
+                return float(f.read())
+        except (OSError, ValueError):
+            return None
+    
+    def worker_pid(self):
+        """
+        Return:
+            int atau None: PID worker yang sedang menjalankan job
+        """
+        try:
+            with open(os.path.join(self.work_dir, conversion_jobs.JobContext.PID_FILE)) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+    
+    def cancel(self):
+        """
+        Meminta job berhenti secepatnya.
+        
+        Return:
+            bool: True jika job belum selesai saat dibatalkan
+        """
+        self.cancel_requested = True
+        if self.future is not None and self.future.cancel():
+            return True
+        try:
+            open(os.path.join(self.work_dir, conversion_jobs.JobContext.CANCEL_MARKER), 'w').close()
+        except Exception as e:
+            logger.error(f"Failed to mark job {self.job_id} as cancelled: {str(e)}")
+        return self.future is None or not self.future.done()
+
+class ConversionExecutor:
+    """
+    Menjalankan konversi berat (PIL, PyMuPDF, pdf2docx, ffmpeg) di proses terpisah.
+    
+    Parameter:
+        max_workers (int): Jumlah proses worker
+    
+    Catatan:
+        - Pool proses dibuat saat job pertama dikirim, dengan start method
+          'spawn' agar worker tidak mewarisi thread dan socket milik bot
+        - Input dan output job berupa file terenkripsi; yang dikirim antar
+          proses hanya path dan parameter kecil
+        - Hasil diserahkan ke callback on_done di thread pool terpisah,
+          sehingga thread polling telebot tidak pernah menunggu konversi
+        - Monitor thread menyerahkan JobTimeout jika worker tidak merespons
+          melewati deadline + CONVERSION_RESULT_GRACE, lalu mematikan proses
+          worker tersebut dan mengganti pool; job lain yang sedang berjalan di
+          pool lama ikut gagal dengan BrokenProcessPool
+        - gs dan ffmpeg dibatasi lintas worker dengan slot dari
+          tool_runner.create_slots()
+        - Monitor thread yang sama meneruskan progress job ke on_progress,
+          paling sering sekali per CONVERSION_PROGRESS_INTERVAL
+    """
+    
+    def __init__(self, max_workers=CONVERSION_WORKERS):
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._result_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        self._monitor = None
+    
+    def _get_pool(self):
+        if self._pool is None:
+            mp_context = multiprocessing.get_context('spawn')
+            # Fresh tool slots per pool, so a killed worker cannot leak a gs/ffmpeg slot
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=mp_context,
+                initializer=conversion_jobs.init_worker,
+                initargs=(ENCRYPTION_KEY, tool_runner.create_slots(mp_context), self.max_workers)
+            )
+            if self._monitor is None:
+                self._monitor = threading.Thread(target=self._monitor_deadlines, daemon=True)
+                self._monitor.start()
+        return self._pool
+    
+    def submit(self, job_type, params, timeout=None, owner=None, on_done=None, db_id=None, on_progress=None):
+        """
+        Mengirim job konversi ke pool proses.
+        
+        Parameter:
+            job_type (str): Kunci di conversion_jobs.JOB_HANDLERS
+            params (dict): Parameter job; output_path diisi otomatis jika kosong
+            timeout (float): Batas waktu dalam detik, default dari CONVERSION_TIMEOUTS
+            owner: Pemilik job (user_id)
+            on_done (callable): Dipanggil sebagai on_done(job, result, error)
+            db_id: ID file yang dikonversi, untuk cancel_file()
+            on_progress (callable): Dipanggil sebagai on_progress(job, fraction)
+        
+        Return:
+            ConversionJob: Handle job yang bisa dibatalkan
+        """
+        if timeout is None:
+            timeout = CONVERSION_TIMEOUTS.get(job_type)
+        job_id = uuid.uuid4().hex
+        work_dir = tempfile.mkdtemp(prefix=f"job_{job_id[:8]}_", dir="temp")
+        params = dict(params)
+        params.setdefault('output_path', os.path.join(work_dir, 'result.enc'))
+        deadline = time.time() + timeout if timeout else None
+        job = ConversionJob(job_id, job_type, work_dir, deadline, owner, on_done, db_id, on_progress)
+        
+        with self._lock:
+            try:
+                job.future = self._get_pool().submit(conversion_jobs.run_job, job_type, params, job_id, work_dir, deadline)
+            except concurrent.futures.BrokenExecutor:
+                # A worker died (e.g. killed by the OS); start a fresh pool
+                logger.error("Conversion pool is broken, restarting worker processes")
+                self._pool.shutdown(wait=False)
+                self._pool = None
+                job.future = self._get_pool().submit(conversion_jobs.run_job, job_type, params, job_id, work_dir, deadline)
+            self._jobs[job_id] = job
+        job.future.add_done_callback(lambda future: self._handoff(job))
+        logger.info(f"Conversion job {job_id} ({job_type}) submitted for {owner}")
+        return job
+    
+    def cancel(self, job_id):
+        """
+        Membatalkan job berdasarkan ID.
+        
+        Return:
+            bool: True jika job ditemukan dan belum selesai
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.cancel() if job else False
+    
+    def cancel_owner(self, owner):
+        """
+        Membatalkan semua job milik satu pengguna.
+        
+        Return:
+            int: Jumlah job yang dibatalkan
+        """
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.owner == owner]
+        return sum(1 for job in jobs if job.cancel())
+    
+    def cancel_file(self, db_id):
+        """
+        Membatalkan semua job yang mengonversi satu file.
+        
+        Return:
+            int: Jumlah job yang dibatalkan
+        """
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.db_id is not None and str(job.db_id) == str(db_id)]
+        return sum(1 for job in jobs if job.cancel())
+    
+    def _handoff(self, job, error=None):
+        with self._lock:
+            if job.delivered:
+                return
+            job.delivered = True
+            self._jobs.pop(job.job_id, None)
+        self._result_pool.submit(self._deliver, job, error)
+    
+    def _deliver(self, job, error):
+        result = None
+        if error is None:
+            try:
+                result = job.future.result()
+            except concurrent.futures.CancelledError:
+                error = conversion_jobs.JobCancelled(job.job_id)
+            except Exception as e:
+                error = e
+        if error is not None and job.cancel_requested and not isinstance(error, conversion_jobs.JobCancelled):
+            error = conversion_jobs.JobCancelled(job.job_id)
+        
+        try:
+            if job.on_done:
+                job.on_done(job, result, error)
+        except Exception as e:
+            logger.error(f"Conversion job {job.job_id} result handler error: {str(e)}", exc_info=True)
+        finally:
+            # A worker that overran its deadline may still be writing here;
+            # whatever it leaves behind is swept by cleanup_files()
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+    
+    def _monitor_deadlines(self):
+        while True:
+            time.sleep(1)
+            now = time.time()
+            with self._lock:
+                overdue = [job for job in self._jobs.values()
+                           if job.deadline and now > job.deadline + CONVERSION_RESULT_GRACE]
+                reporting = [job for job in self._jobs.values()
+                             if job.on_progress and now - job.last_progress_time >= CONVERSION_PROGRESS_INTERVAL]
+            for job in overdue:
+                logger.error(f"Conversion job {job.job_id} ({job.job_type}) is unresponsive past its deadline")
+                job.cancel()
+                # Kill before the handoff removes work_dir and the PID file with it
+                self._kill_worker(job)
+                self._handoff(job, conversion_jobs.JobTimeout(job.job_id))
+            for job in reporting:
+                self._report_progress(job, now)
+    
+    def _kill_worker(self, job):
+        pid = job.worker_pid()
+        if pid is None:
+            return
+        try:
+            os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        except OSError as e:
+            logger.error(f"Failed to kill worker {pid} of conversion job {job.job_id}: {str(e)}")
+            return
+        logger.error(f"Killed worker {pid} of conversion job {job.job_id}")
+        with self._lock:
+            # The pool breaks once it notices the dead worker; new jobs go to a fresh one
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+    
+    def _report_progress(self, job, now):
+        fraction = job.progress()
+        if fraction is None or job.delivered or job.cancel_requested:
+            return
+        # Only whole-percent changes are worth an API call
+        if job.last_progress is not None and int(fraction * 100) == int(job.last_progress * 100):
+            return
+        job.last_progress = fraction
+        job.last_progress_time = now
+        try:
+            job.on_progress(job, fraction)
+        except Exception as e:
+            logger.error(f"Conversion job {job.job_id} progress handler error: {str(e)}")
+
+# Process pool for heavy conversions (requires the streaming AES storage format)
+conversion_executor = ConversionExecutor() if HAS_AES else None
+
+def schedule_callback(delay, callback, interval=None):
+    """
+    Menjadwalkan fungsi di timer_wheel.
+    
+    Parameter:
+        delay (float): Waktu tunggu dalam detik
+        callback (callable): Fungsi tanpa argumen yang akan dipanggil
+        interval (float, optional): Ulangi setiap interval detik sampai dibatalkan
+    
+    Return:
+        TimerHandle: Objek timer dengan method cancel()
+    
+    Catatan:
+        - Tidak ada thread baru per timer; schedule dan cancel O(1)
+        - Mode threaded menjalankan wheel di satu thread sendiri, mode asyncio
+          memajukannya dari event loop AsyncRuntime
+        - cancel() mengembalikan False jika callback sudah terlanjur jalan
+    """
+    if async_runtime is None:
+        timer_wheel.start()
+    return timer_wheel.schedule(delay, callback, interval)
+
 def session_expired(chat_id, file_path, db_id=None, lang='en'):
     """
     Menangani sesi yang telah berakhir (expired).
@@ -880,10 +1389,7 @@ def session_expired(chat_id, file_path, db_id=None, lang='en'):
         # Delete from database if db_id is provided
         if db_id:
             try:
-                conn = sqlite3.connect('files.db')
-                conn.execute('DELETE FROM files WHERE id = ?', (db_id,))
-                conn.commit()
-                conn.close()
+                file_repo.delete(db_id)
             except Exception as e:
                 logger.error(f"Failed to delete expired file from database: {str(e)}")
         
@@ -895,37 +1401,100 @@ def session_expired(chat_id, file_path, db_id=None, lang='en'):
     except Exception as e:
         logger.error(f"Error in session_expired: {str(e)}")
 
-def update_countdown(chat_id, message_id, seconds_left, lang='en'):
+def format_countdown(seconds_left, lang='en'):
+    """
+    Memformat sisa waktu sesi sebagai teks countdown (menit:detik).
+    """
+    return LANG[lang]['countdown'].format(seconds_left // 60, seconds_left % 60)
+
+def next_countdown_render(seconds_left):
     """
-    Memperbarui pesan countdown timer.
+    Menentukan sisa waktu saat countdown berikutnya perlu di-render.
     
     Parameter:
-        chat_id (int): ID chat Telegram
-        message_id (int): ID pesan yang akan diupdate
-        seconds_left (int): Sisa waktu dalam detik
-        lang (str): Kode bahasa untuk format pesan
+        seconds_left (int): Sisa waktu yang baru saja ditampilkan
     
     Return:
-        Tidak ada
+        int: Sisa waktu target render berikutnya
     
     Catatan:
-        - Mengkonversi detik ke format menit:detik
-        - Mengupdate pesan setiap detik untuk efek animasi
-        - Menangani error jika update pesan gagal
+        - Setiap 30 detik di atas 1 menit, setiap 15 detik di bawahnya,
+          dan setiap detik pada COUNTDOWN_FINAL_SECONDS terakhir
+        - Contoh untuk 2:00 → 1:30, 1:00, 0:45, 0:30, 0:15, 0:05, 0:04, ...
     """
-    try:
-        # Format as minutes:seconds
-        minutes = seconds_left // 60
-        seconds = seconds_left % 60
-        
-        # Update every second for a more animated effect
-        bot.edit_message_text(
-            LANG[lang]['countdown'].format(minutes, seconds),
-            chat_id,
-            message_id
-        )
-    except Exception as e:
-        logger.error(f"Error updating countdown: {str(e)}")
+    if seconds_left <= COUNTDOWN_FINAL_SECONDS:
+        return seconds_left - 1
+    cadence = 30 if seconds_left > 60 else 15
+    # Snap to the cadence grid so every session shows round numbers
+    target = (seconds_left - 1) // cadence * cadence
+    return max(target, COUNTDOWN_FINAL_SECONDS)
+
+class CountdownRenderer:
+    """
+    Satu job yang me-render countdown untuk semua sesi aktif.
+    
+    Catatan:
+        - Berjalan sebagai satu timer berulang (1 detik) di timer_wheel
+        - Cadence adaptif lewat next_countdown_render(): sekitar 10 edit per
+          sesi, bukan satu edit per detik
+        - Edit yang tidak mengubah teks dilewati
+        - Paling banyak COUNTDOWN_EDITS_PER_TICK edit per detik, sesi yang
+          paling dekat expired didahulukan
+        - Error 429 menghentikan semua edit countdown selama retry_after
+        - Tick dilewati jika antrian OutboundScheduler sedang penuh
+        - Expiry sesi tetap ditangani timer sekali jalan milik sesi
+    """
+    
+    def __init__(self):
+        self._handle = None
+        self._lock = threading.Lock()
+        self.paused_until = 0
+    
+    def ensure_running(self):
+        with self._lock:
+            if self._handle is None or not self._handle.active:
+                self._handle = schedule_callback(1.0, self.tick, interval=1.0)
+    
+    def tick(self):
+        now = time.time()
+        if now < self.paused_until:
+            return
+        if bot.scheduler.pending_count() > COUNTDOWN_EDITS_PER_TICK:
+            # Outbound queue is backed up; countdowns are the first to yield
+            return
+        
+        due = []
+        for chat_id, session in list(active_sessions.items()):
+            remaining = SESSION_TIMEOUT_SECONDS - int(now - session['start_time'])
+            if 0 < remaining <= session['next_render']:
+                due.append((remaining, chat_id, session))
+        due.sort(key=lambda item: item[0])
+        
+        # Edits are queued without waiting, so one slow chat does not delay the others
+        for remaining, chat_id, session in due[:COUNTDOWN_EDITS_PER_TICK]:
+            if active_sessions.get(chat_id) is not session:
+                continue
+            session['next_render'] = next_countdown_render(remaining)
+            text = format_countdown(remaining, session['lang'])
+            if text == session['last_text']:
+                continue
+            session['last_text'] = text
+            future = bot.submit('edit_message_text', text, chat_id, session['countdown_msg_id'],
+                                priority=PRIORITY_ANIMATION)
+            future.add_done_callback(self._edit_done)
+    
+    def _edit_done(self, future):
+        error = future.exception()
+        if error is None:
+            return
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            self.paused_until = max(self.paused_until, time.time() + retry_after)
+            logger.warning(f"Countdown updates paused for {retry_after:.0f}s (rate limited)")
+        elif 'message is not modified' not in str(error):
+            logger.warning(f"Error updating countdown: {str(error)}")
+
+countdown_renderer = CountdownRenderer()
 
 def start_session_timer(chat_id, file_path, db_id, lang='en'):
     """
@@ -943,58 +1512,40 @@ def start_session_timer(chat_id, file_path, db_id, lang='en'):
     Catatan:
         - Membuat pesan countdown dengan format awal (2:00)
         - Menyimpan informasi sesi dalam active_sessions
-        - Menggunakan threading.Timer untuk update setiap detik
-        - Timer berjalan sebagai daemon thread
-        - Otomatis memanggil session_expired() saat waktu habis
+        - Pesan countdown diperbarui oleh countdown_renderer
+        - Satu timer sekali jalan di timer_wheel memanggil session_expired()
+          saat waktu habis; membatalkannya menghentikan sesi
         - Menangani error dengan graceful
     """
     try:
         # Create countdown message with initial format (2:00)
-        minutes = SESSION_TIMEOUT_SECONDS // 60
-        seconds = SESSION_TIMEOUT_SECONDS % 60
-        countdown_msg = bot.send_message(chat_id, LANG[lang]['countdown'].format(minutes, seconds))
+        text = format_countdown(SESSION_TIMEOUT_SECONDS, lang)
+        countdown_msg = bot.send_message(chat_id, text)
         
         # Store session info
-        active_sessions[chat_id] = {
+        session = {
             'file_path': file_path,
             'db_id': db_id,
             'countdown_msg_id': countdown_msg.message_id,
             'lang': lang,
             'start_time': time.time(),
+            'last_text': text,
+            'next_render': next_countdown_render(SESSION_TIMEOUT_SECONDS),
             'timer': None
         }
+        active_sessions[chat_id] = session
         
-        # Function to update countdown and check expiration
-        def check_session():
+        def expire_session():
             try:
-                if chat_id not in active_sessions:
-                    return
-                
-                elapsed = time.time() - active_sessions[chat_id]['start_time']
-                remaining = max(0, SESSION_TIMEOUT_SECONDS - int(elapsed))
-                
-                # Always update the countdown for smooth animation
-                
-                if remaining <= 0:
-                    # Session expired
-                    session_info = active_sessions.pop(chat_id, None)
-                    if session_info:
-                        session_expired(chat_id, session_info['file_path'], session_info['db_id'], session_info['lang'])
-                else:
-                    # Update countdown and schedule next check - update every second for animation
-                    update_countdown(chat_id, active_sessions[chat_id]['countdown_msg_id'], remaining, lang)
-                    timer = threading.Timer(1.0, check_session)
-                    timer.daemon = True
-                    timer.start()
-                    active_sessions[chat_id]['timer'] = timer
+                # Only expire if this session is still the active one
+                if active_sessions.get(chat_id) is session:
+                    active_sessions.pop(chat_id, None)
+                    session_expired(chat_id, session['file_path'], session['db_id'], session['lang'])
             except Exception as e:
-                logger.error(f"Error in check_session: {str(e)}")
+                logger.error(f"Error in expire_session: {str(e)}")
         
-        # Start the timer
-        timer = threading.Timer(1.0, check_session)
-        timer.daemon = True
-        timer.start()
-        active_sessions[chat_id]['timer'] = timer
+        session['timer'] = schedule_callback(SESSION_TIMEOUT_SECONDS, expire_session)
+        countdown_renderer.ensure_running()
         
     except Exception as e:
         logger.error(f"Error starting session timer: {str(e)}")
@@ -1075,6 +1626,41 @@ def secure_delete_file(file_path):
             except:
                 pass
 
+def cleanup_inactive_users_once():
+    """
+    Satu kali pemeriksaan sesi pengguna yang tidak aktif.
+    
+    Parameter:
+        Tidak ada
+    
+    Return:
+        Tidak ada
+    
+    Catatan:
+        - Menghapus pengguna yang tidak aktif lebih dari 5 menit
+        - Membatalkan timer yang sedang berjalan untuk pengguna tidak aktif
+        - Dipanggil berkala oleh cleanup_inactive_users() atau AsyncRuntime
+    """
+    current_time = time.time()
+    users_to_remove = []
+    
+    # Check each user's activity
+    for user_id, data in list(user_activity.items()):
+        # If user has been inactive for more than 5 minutes, clean up
+        if current_time - data['timestamp'] > 300:  # 5 minutes
+            users_to_remove.append(user_id)
+    
+    # Remove inactive users
+    for user_id in users_to_remove:
+        if user_id in user_activity:
+            try:
+                if user_activity[user_id]['timer']:
+                    user_activity[user_id]['timer'].cancel()
+            except:
+                pass
+            user_activity.pop(user_id, None)
+            logger.info(f"Cleaned up inactive user: {user_id}")
+
 def cleanup_inactive_users():
     """
     Membersihkan sesi pengguna yang tidak aktif.
@@ -1088,40 +1674,20 @@ def cleanup_inactive_users():
     Catatan:
         - Berjalan dalam loop tak terbatas sebagai background thread
         - Memeriksa aktivitas pengguna setiap menit
-        - Menghapus pengguna yang tidak aktif lebih dari 5 menit
-        - Membatalkan timer yang sedang berjalan untuk pengguna tidak aktif
         - Menangani error dengan graceful untuk menjaga stabilitas
     """
     while True:
         try:
-            current_time = time.time()
-            users_to_remove = []
-            
-            # Check each user's activity
-            for user_id, data in user_activity.items():
-                # If user has been inactive for more than 5 minutes, clean up
-                if current_time - data['timestamp'] > 300:  # 5 minutes
-                    users_to_remove.append(user_id)
-            
-            # Remove inactive users
-            for user_id in users_to_remove:
-                if user_id in user_activity:
-                    try:
-                        if user_activity[user_id]['timer']:
-                            user_activity[user_id]['timer'].cancel()
-                    except:
-                        pass
-                    user_activity.pop(user_id, None)
-                    logger.info(f"Cleaned up inactive user: {user_id}")
+            cleanup_inactive_users_once()
         except Exception as e:
             logger.error(f"Error cleaning up inactive users: {str(e)}")
         
         # Check every minute
         time.sleep(60)
 
-def cleanup_files():
+def cleanup_files_once():
     """
-    Membersihkan file-file lama dan temporary secara berkala.
+    Membersihkan file-file lama dan temporary (satu kali jalan).
     
     Parameter:
         Tidak ada
@@ -1130,67 +1696,87 @@ def cleanup_files():
         Tidak ada
     
     Catatan:
-        - Berjalan dalam loop tak terbatas sebagai background thread
-        - Memeriksa dan membersihkan file setiap 3 menit
-        - Menghapus file dari database yang lebih lama dari FILE_RETENTION_MINUTES
+        - Menghapus file dari database yang sudah melewati expires_at
+          (FILE_RETENTION_MINUTES setelah upload, lebih lama selama konversi)
         - Membersihkan direktori temp dengan file lebih lama dari TEMP_FILE_RETENTION_MINUTES
         - Menghapus direktori kosong untuk menjaga kebersihan sistem
         - Menangani error dengan graceful untuk setiap operasi
+        - Dipanggil berkala oleh cleanup_files() atau AsyncRuntime
+    """
+    # Clean database files
+    files_to_delete = file_repo.pop_expired()
+    
+    for file_path in files_to_delete:
+        if file_path and os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+                logger.info(f"Deleted old file: {file_path}")
+            except Exception as e:
+                logger.error(f"Failed to delete {file_path}: {str(e)}")
+    
+    # Clean temp directory - more aggressive cleanup
+    if os.path.exists("temp"):
+        for filename in os.listdir("temp"):
+            file_path = os.path.join("temp", filename)
+            if os.path.isfile(file_path):
+                try:
+                    file_age = datetime.now() - datetime.fromtimestamp(os.path.getctime(file_path))
+                    if file_age > timedelta(minutes=TEMP_FILE_RETENTION_MINUTES):
+                        os.remove(file_path)
+                        logger.info(f"Deleted temp file: {file_path}")
+                except Exception as e:
+                    logger.error(f"Failed to delete temp file {file_path}: {str(e)}")
+            elif filename.startswith("job_") and os.path.isdir(file_path):
+                # Job work directories are removed by ConversionExecutor;
+                # only sweep the ones left behind by unresponsive workers
+                try:
+                    job_age = datetime.now() - datetime.fromtimestamp(os.path.getctime(file_path))
+                    if job_age > timedelta(seconds=max(CONVERSION_TIMEOUTS.values()) + CONVERSION_RESULT_GRACE):
+                        shutil.rmtree(file_path, ignore_errors=True)
+                        logger.info(f"Deleted abandoned job directory: {file_path}")
+                except Exception as e:
+                    logger.error(f"Failed to delete job directory {file_path}: {str(e)}")
+    
+    # Check for any empty directories and clean them
+    for folder in ["files", "temp"]:
+        if os.path.exists(folder) and os.path.isdir(folder):
+            try:
+                # Remove empty subdirectories
+                for root, dirs, files in os.walk(folder, topdown=False):
+                    for dir_name in dirs:
+                        dir_path = os.path.join(root, dir_name)
+                        # Skip job work directories, a worker may be about to fill them
+                        if not os.listdir(dir_path) and not dir_name.startswith("job_"):  # If directory is empty
+                            os.rmdir(dir_path)
+                            logger.info(f"Removed empty directory: {dir_path}")
+            except Exception as e:
+                logger.error(f"Failed to clean directories in {folder}: {str(e)}")
+
+def cleanup_files():
+    """
+    Membersihkan file-file lama dan temporary secara berkala.
+    
+    Parameter:
+        Tidak ada
+    
+    Return:
+        Tidak ada
+    
+    Catatan:
+        - Berjalan dalam loop tak terbatas sebagai background thread
+        - Memanggil cleanup_files_once() setiap 3 menit
     """
     while True:
         try:
-            # Clean database files
-            conn = sqlite3.connect('files.db', timeout=10.0)
-            cutoff = datetime.now() - timedelta(minutes=FILE_RETENTION_MINUTES)
-            cursor = conn.execute('SELECT file_path FROM files WHERE created_at < ?', (cutoff,))
-            files_to_delete = cursor.fetchall()
-            
-            for (file_path,) in files_to_delete:
-                if file_path and os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"Deleted old file: {file_path}")
-                    except Exception as e:
-                        logger.error(f"Failed to delete {file_path}: {str(e)}")
-            
-            conn.execute('DELETE FROM files WHERE created_at < ?', (cutoff,))
-            conn.commit()
-            conn.close()
-            
-            # Clean temp directory - more aggressive cleanup
-            if os.path.exists("temp"):
-                for filename in os.listdir("temp"):
-                    file_path = os.path.join("temp", filename)
-                    if os.path.isfile(file_path):
-                        try:
-                            file_age = datetime.now() - datetime.fromtimestamp(os.path.getctime(file_path))
-                            if file_age > timedelta(minutes=TEMP_FILE_RETENTION_MINUTES):
-                                os.remove(file_path)
-                                logger.info(f"Deleted temp file: {file_path}")
-                        except Exception as e:
-                            logger.error(f"Failed to delete temp file {file_path}: {str(e)}")
-            
-            # Check for any empty directories and clean them
-            for folder in ["files", "temp"]:
-                if os.path.exists(folder) and os.path.isdir(folder):
-                    try:
-                        # Remove empty subdirectories
-                        for root, dirs, files in os.walk(folder, topdown=False):
-                            for dir_name in dirs:
-                                dir_path = os.path.join(root, dir_name)
-                                if not os.listdir(dir_path):  # If directory is empty
-                                    os.rmdir(dir_path)
-                                    logger.info(f"Removed empty directory: {dir_path}")
-                    except Exception as e:
-                        logger.error(f"Failed to clean directories in {folder}: {str(e)}")
-                        
+            cleanup_files_once()
         except Exception as e:
             logger.error(f"Cleanup error: {str(e)}")
         time.sleep(180)  # Check every 3 minutes instead of 5
 
-# Start background cleanup threads
-threading.Thread(target=cleanup_files, daemon=True).start()
-threading.Thread(target=cleanup_inactive_users, daemon=True).start()
+# Start background cleanup threads (AsyncRuntime runs them as coroutines)
+if not IS_WORKER_PROCESS and RUNTIME_MODE != 'asyncio':
+    threading.Thread(target=cleanup_files, daemon=True).start()
+    threading.Thread(target=cleanup_inactive_users, daemon=True).start()
 
 # Start PDF merge session cleanup
 def cleanup_merge_sessions():
@@ -1216,7 +1802,8 @@ def cleanup_merge_sessions():
             logger.error(f"Error in merge session cleanup: {str(e)}")
         time.sleep(60)  # Check every minute
 
-threading.Thread(target=cleanup_merge_sessions, daemon=True).start()
+if not IS_WORKER_PROCESS and RUNTIME_MODE != 'asyncio':
+    threading.Thread(target=cleanup_merge_sessions, daemon=True).start()
 
 @bot.message_handler(func=lambda message: message.content_type == 'text' and not message.text.startswith('/'))
 def handle_first_message(message):
@@ -1339,8 +1926,7 @@ def start_inactivity_timer(user_id, chat_id, lang='en'):
         - Memeriksa inactivity setiap 30 detik
         - Mengirim reminder setelah 2 menit tidak aktif
         - Menutup sesi setelah 3 menit tidak aktif
-        - Menggunakan threading.Timer untuk penjadwalan
-        - Timer berjalan sebagai daemon thread
+        - Memakai schedule_callback() untuk penjadwalan
     """
     # Update user's last activity time
     user_activity[user_id] = {
@@ -1368,9 +1954,7 @@ def start_inactivity_timer(user_id, chat_id, lang='en'):
                 user_activity[user_id]['reminder_sent'] = True
                 
                 # Schedule final check after 1 more minute
-                timer = threading.Timer(60.0, check_inactivity)
-                timer.daemon = True
-                timer.start()
+                timer = schedule_callback(60.0, check_inactivity)
                 user_activity[user_id]['timer'] = timer
             except:
                 pass
@@ -1388,15 +1972,11 @@ def start_inactivity_timer(user_id, chat_id, lang='en'):
                 pass
         else:
             # Schedule next check
-            timer = threading.Timer(30.0, check_inactivity)  # Check every 30 seconds
-            timer.daemon = True
-            timer.start()
+            timer = schedule_callback(30.0, check_inactivity)  # Check every 30 seconds
             user_activity[user_id]['timer'] = timer
     
     # Start the inactivity timer
-    timer = threading.Timer(30.0, check_inactivity)  # First check after 30 seconds
-    timer.daemon = True
-    timer.start()
+    timer = schedule_callback(30.0, check_inactivity)  # First check after 30 seconds
     user_activity[user_id]['timer'] = timer
 
 def update_user_activity(user_id):
@@ -1580,6 +2160,7 @@ def create_pdf_merge_session(user_id, chat_id, lang='en'):
     Catatan:
         - Membuat entry baru dalam pdf_merge_sessions
         - Menyimpan informasi: chat_id, daftar PDF, bahasa, waktu dibuat
+        - pdf_info menyimpan metadata tiap PDF (lihat add_pdf_to_merge_session)
         - Mengatur flag awaiting_files untuk batch collection
         - Memulai timer 5 detik untuk mengumpulkan multiple files
         - Timer otomatis menampilkan konfirmasi urutan setelah batch selesai
@@ -1587,6 +2168,7 @@ def create_pdf_merge_session(user_id, chat_id, lang='en'):
     pdf_merge_sessions[user_id] = {
         'chat_id': chat_id,
         'pdfs': [],
+        'pdf_info': {},
         'lang': lang,
         'created_at': time.time(),
         'awaiting_files': True,
@@ -1599,32 +2181,110 @@ def create_pdf_merge_session(user_id, chat_id, lang='en'):
             pdf_merge_sessions[user_id]['awaiting_files'] = False
             show_pdf_order_confirmation(user_id)
     
-    timer = threading.Timer(5.0, end_batch_collection)
-    timer.daemon = True
-    timer.start()
+    timer = schedule_callback(5.0, end_batch_collection)
     pdf_merge_sessions[user_id]['batch_timer'] = timer
 
-def add_pdf_to_merge_session(user_id, pdf_id):
+def load_merge_pdf_info(pdf_id):
     """
-    Menambahkan PDF ke sesi merge yang sudah ada.
+    Membaca metadata PDF yang sudah tersimpan untuk sesi merge.
     
     Parameter:
-        user_id (int): ID pengguna Telegram
         pdf_id (int): ID database dari file PDF
     
     Return:
-        bool: True jika berhasil ditambahkan, False jika gagal
+        dict atau None: {'name', 'path', 'size', 'pages', ...}, None jika tidak ditemukan
     
     Catatan:
-        - Memeriksa apakah sesi merge ada untuk pengguna
-        - Membatasi maksimal 10 PDF per sesi
-        - Menambahkan PDF ID ke daftar pdfs dalam sesi
-        - Reset batch timer jika masih dalam mode collecting
-        - Timer baru 3 detik setelah file terakhir ditambahkan
-        - Otomatis menampilkan konfirmasi setelah batch selesai
+        - Dipakai untuk PDF yang masuk sesi dari upload biasa (start_merge_);
+          upload di mode merge membawa metadata dari validasinya sendiri
+        - Jika PDF valid, metadata berisi hasil inspect_pdf_for_merge();
+          jika tidak, pages bernilai None dan PDF dibaca ulang saat merge
     """
-    if user_id in pdf_merge_sessions:
-        if len(pdf_merge_sessions[user_id]['pdfs']) < 10:  # Limit to 10 PDFs
+    row = file_repo.get(pdf_id)
+    if not row:
+        return None
+    file_path, file_name = row
+    info = {'name': file_name, 'path': file_path, 'size': get_stored_file_size(file_path), 'pages': None}
+    try:
+        info.update(inspect_pdf_for_merge(file_path))
+    except Exception as e:
+        logger.error(f"Could not inspect PDF {pdf_id}: {str(e)}")
+    return info
+
+def inspect_pdf_for_merge(file_path):
+    """
+    Memvalidasi PDF terenkripsi untuk sesi merge dan menyimpan hasil parse-nya.
+    
+    Parameter:
+        file_path (str): Path file terenkripsi
+    
+    Return:
+        dict: {'pages', 'encrypted', 'objects', 'reader', 'source'}
+    
+    Catatan:
+        - Hanya xref, trailer, dan page tree yang dibaca (inspect_pdf), bukan
+          seluruh isi file
+        - 'reader' dipakai ulang oleh merge_pdfs() sehingga PDF tidak diparse
+          dua kali; 'source' adalah reader terenkripsi yang tetap terbuka dan
+          harus ditutup dengan release_merge_pdf_info()
+        - Akan raise ValueError jika PDF rusak atau terkunci password
+    """
+    source = open_encrypted_reader(file_path)
+    try:
+        result = inspect_pdf(source)
+    except Exception:
+        source.close()
+        raise
+    result['source'] = source
+    return result
+
+def release_merge_pdf_info(info):
+    """
+    Menutup reader yang masih terbuka milik satu entry pdf_info.
+    
+    Parameter:
+        info (dict): Entry session['pdf_info'], boleh None
+    """
+    if not info:
+        return
+    info.pop('reader', None)
+    source = info.pop('source', None)
+    if source is not None:
+        try:
+            source.close()
+        except Exception:
+            pass
+
+def add_pdf_to_merge_session(user_id, pdf_id, info=None):
+    """
+    Menambahkan PDF ke sesi merge yang sudah ada.
+    
+    Parameter:
+        user_id (int): ID pengguna Telegram
+        pdf_id (int): ID database dari file PDF
+        info (dict): Metadata PDF {'name', 'path', 'size', 'pages', ...},
+                     dibaca dengan load_merge_pdf_info() jika None
+    
+    Return:
+        bool: True jika berhasil ditambahkan, False jika gagal
+    
+    Catatan:
+        - Memeriksa apakah sesi merge ada untuk pengguna
+        - Membatasi maksimal 10 PDF per sesi
+        - Menambahkan PDF ID ke daftar pdfs dalam sesi
+        - Metadata disimpan di session['pdf_info'] sekali saat PDF ditambahkan,
+          sehingga tampilan daftar dan tombol urutan tidak perlu query database
+        - Reset batch timer jika masih dalam mode collecting
+        - Timer baru 3 detik setelah file terakhir ditambahkan
+        - Otomatis menampilkan konfirmasi setelah batch selesai
+    """
+    if user_id in pdf_merge_sessions:
+        if len(pdf_merge_sessions[user_id]['pdfs']) < 10:  # Limit to 10 PDFs
+            if info is None:
+                info = load_merge_pdf_info(pdf_id)
+                if info is None:
+                    return False
+            pdf_merge_sessions[user_id]['pdf_info'][pdf_id] = info
             pdf_merge_sessions[user_id]['pdfs'].append(pdf_id)
             # Reset batch timer if still collecting
             if pdf_merge_sessions[user_id]['awaiting_files']:
@@ -1636,9 +2296,7 @@ def add_pdf_to_merge_session(user_id, pdf_id):
                         pdf_merge_sessions[user_id]['awaiting_files'] = False
                         show_pdf_order_confirmation(user_id)
                 
-                timer = threading.Timer(3.0, end_batch_collection)  # 3 seconds after last file
-                timer.daemon = True
-                timer.start()
+                timer = schedule_callback(3.0, end_batch_collection)  # 3 seconds after last file
                 pdf_merge_sessions[user_id]['batch_timer'] = timer
             return True
     return False
@@ -1656,7 +2314,7 @@ def get_pdf_merge_session(user_id):
     Catatan:
         - Menggunakan dict.get() untuk menghindari KeyError
         - Mengembalikan None jika pengguna tidak memiliki sesi aktif
-        - Data sesi berisi: chat_id, pdfs, lang, created_at, awaiting_files, batch_timer
+        - Data sesi berisi: chat_id, pdfs, pdf_info, lang, created_at, awaiting_files, batch_timer
     """
     return pdf_merge_sessions.get(user_id)
 
@@ -1689,18 +2347,15 @@ def clear_pdf_merge_session(user_id):
             except:
                 pass
         
-        for pdf_id in session['pdfs']:
-            try:
-                conn = sqlite3.connect('files.db')
-                cursor = conn.execute('SELECT file_path FROM files WHERE id = ?', (pdf_id,))
-                result = cursor.fetchone()
-                if result:
-                    cleanup_failed_file(result[0])
-                    conn.execute('DELETE FROM files WHERE id = ?', (pdf_id,))
-                    conn.commit()
-                conn.close()
-            except Exception as e:
-                logger.error(f"Error cleaning up PDF {pdf_id}: {str(e)}")
+        # Close cached readers first so the files can be removed on every OS
+        for info in session['pdf_info'].values():
+            release_merge_pdf_info(info)
+        
+        try:
+            for file_path in file_repo.pop_many(session['pdfs']):
+                cleanup_failed_file(file_path)
+        except Exception as e:
+            logger.error(f"Error cleaning up PDFs for user {user_id}: {str(e)}")
         
         pdf_merge_sessions.pop(user_id, None)
 
@@ -1718,25 +2373,24 @@ def generate_pdf_list_text(user_id, lang='en'):
     Catatan:
         - Mengambil sesi merge untuk pengguna
         - Mengembalikan string kosong jika tidak ada sesi
-        - Mengquery database untuk mendapatkan nama file
-        - Format: "1. nama_file.pdf\n2. nama_file2.pdf"
-        - Menangani koneksi database dengan aman
+        - Nama, jumlah halaman, dan ukuran diambil dari session['pdf_info'],
+          tanpa query database
+        - Format: "1. nama_file.pdf (3 pages, 1.2 MB)"
     """
     session = get_pdf_merge_session(user_id)
     if not session:
         return ""
     
     text_lines = []
-    conn = sqlite3.connect('files.db')
     
     for i, pdf_id in enumerate(session['pdfs'], 1):
-        cursor = conn.execute('SELECT file_name FROM files WHERE id = ?', (pdf_id,))
-        result = cursor.fetchone()
-        if result:
-            filename = result[0]
-            text_lines.append(f"{i}. {filename}")
+        info = session['pdf_info'].get(pdf_id)
+        if info:
+            details = f"{info['size'] / (1024 * 1024):.1f} MB"
+            if info['pages']:
+                details = f"{info['pages']} pages, {details}"
+            text_lines.append(f"{i}. {info['name']} ({details})")
     
-    conn.close()
     return "\n".join(text_lines)
 
 def create_pdf_reorder_markup(user_id, lang='en'):
@@ -1756,6 +2410,7 @@ def create_pdf_reorder_markup(user_id, lang='en'):
         - Untuk setiap PDF: tombol naik, nama file, tombol turun, tombol hapus
         - Menggunakan placeholder "➖" untuk tombol yang tidak aktif
         - Memotong nama file jika lebih dari 15 karakter
+        - Nama file diambil dari session['pdf_info'], tanpa query database
         - Menambahkan tombol kembali dan cancel di bawah
     """
     session = get_pdf_merge_session(user_id)
@@ -1770,12 +2425,11 @@ def create_pdf_reorder_markup(user_id, lang='en'):
     markup.add(types.InlineKeyboardButton('🔗 Merge Now', callback_data="execute_pdf_merge"))
     
     # Add reorder buttons for each PDF
-    conn = sqlite3.connect('files.db')
     for i, pdf_id in enumerate(session['pdfs']):
-        cursor = conn.execute('SELECT file_name FROM files WHERE id = ?', (pdf_id,))
-        result = cursor.fetchone()
-        if result:
-            filename = result[0][:15] + "..." if len(result[0]) > 15 else result[0]
+        info = session['pdf_info'].get(pdf_id)
+        if info:
+            name = info['name']
+            filename = name[:15] + "..." if len(name) > 15 else name
             row = []
             
             # Move up button (not for first item)
@@ -1798,8 +2452,6 @@ def create_pdf_reorder_markup(user_id, lang='en'):
             
             markup.row(*row)
     
-    conn.close()
-    
     # Add back to confirmation and cancel buttons
     markup.add(types.InlineKeyboardButton('↩️ Back to Confirmation', callback_data="back_to_confirmation"))
     markup.add(types.InlineKeyboardButton(LANG[lang]['cancel_merge'], callback_data="cancel_pdf_merge"))
@@ -1815,73 +2467,50 @@ def merge_pdfs(user_id, lang='en'):
         lang (str): Kode bahasa untuk pesan error
     
     Return:
-        tuple: (pdf_data, error_message)
-               - pdf_data (bytes): Data PDF yang sudah digabung, None jika gagal
+        tuple: (merged_path, error_message)
+               - merged_path (str): Path file terenkripsi berisi PDF gabungan
+                 (dibaca dengan open_encrypted_reader), None jika gagal
                - error_message (str): Pesan error jika gagal, None jika berhasil
     
     Catatan:
         - Memeriksa apakah ada minimal 2 PDF dalam sesi
-        - Menggunakan PdfMerger untuk menggabungkan PDF
-        - Membaca dan mendekripsi setiap PDF dari database
-        - Membuat temporary BytesIO untuk setiap PDF
-        - Mengembalikan data PDF gabungan dalam bytes
-        - Membersihkan semua resource dengan aman di finally block
+        - Menggunakan StreamingPdfMerger: input diproses satu per satu dan
+          langsung ditulis ke output; PdfReader dari validasi upload dipakai
+          ulang lalu dilepas, sehingga setiap PDF hanya diparse sekali
+        - Output ditulis bertahap ke file terenkripsi di folder temp, jadi
+          memori puncak sebatas satu input, bukan jumlah semua input
+        - Pemanggil wajib menghapus merged_path setelah dikirim
+        - File output yang belum selesai dihapus jika terjadi error
     """
     session = get_pdf_merge_session(user_id)
     if not session or len(session['pdfs']) < 2:
         return None, LANG[lang]['pdf_merge_min_files']
     
-    merger = None
-    conn = None
-    temp_pdfs = []
+    merged_path = os.path.join("temp", f"merge_{uuid.uuid4().hex}.enc")
     
     try:
-        merger = PdfMerger()
-        conn = sqlite3.connect('files.db')
-        
-        # Add each PDF to merger
-        for pdf_id in session['pdfs']:
-            cursor = conn.execute('SELECT file_path FROM files WHERE id = ?', (pdf_id,))
-            result = cursor.fetchone()
-            if result:
-                file_path = result[0]
-                # Read and decrypt PDF
-                with open(file_path, 'rb') as f:
-                    encrypted_data = f.read()
-                pdf_data = decrypt_file(encrypted_data)
-                
-                # Create temporary file for merger
-                temp_pdf = BytesIO(pdf_data)
-                temp_pdfs.append(temp_pdf)
-                merger.append(temp_pdf)
-        
-        # Create output
-        output = BytesIO()
-        merger.write(output)
-        output.seek(0)
+        with open_encrypted_writer(merged_path) as output:
+            merger = StreamingPdfMerger(output)
+            for pdf_id in session['pdfs']:
+                info = session['pdf_info'].get(pdf_id)
+                if info:
+                    if info.get('reader') is not None:
+                        # Reuse the structure parsed at upload time
+                        merger.append(info['reader'])
+                        # Drop the reader's object cache before the next input
+                        release_merge_pdf_info(info)
+                    else:
+                        # Seekable decrypting reader, closed before the next input is opened
+                        with open_encrypted_reader(info['path']) as source:
+                            merger.append(source)
+            merger.close()
         
-        return output.getvalue(), None
+        return merged_path, None
         
     except Exception as e:
         logger.error(f"PDF merge error: {str(e)}")
+        cleanup_failed_file(merged_path)
         return None, LANG[lang]['pdf_merge_failed']
-    finally:
-        # Clean up resources
-        if merger:
-            try:
-                merger.close()
-            except:
-                pass
-        if conn:
-            try:
-                conn.close()
-            except:
-                pass
-        for temp_pdf in temp_pdfs:
-            try:
-                temp_pdf.close()
-            except:
-                pass
 
 def show_pdf_order_confirmation(user_id):
     """
@@ -2010,6 +2639,7 @@ def start_message(message):
         user_services.pop(user_id, None)
         if user_id in pdf_merge_sessions:
             clear_pdf_merge_session(user_id)
+        clear_zip_session(user_id)
         
         # Clear user activity to prevent duplicate timers
         if user_id in user_activity:
@@ -2038,22 +2668,23 @@ def start_message(message):
     except Exception as e:
         logger.error(f"Error in start_message: {str(e)}", exc_info=True)
 
-def async_encrypt_file(file_data, file_path):
+def async_encrypt_file(file_info, file_path):
     """
-    Mengenkripsi dan menyimpan file secara asinkron dengan optimasi memori.
+    Mengunduh dan mengenkripsi file secara streaming di thread terpisah.
     
     Parameter:
-        file_data (bytes): Data file yang akan dienkripsi
-        file_path (str): Path tempat file akan disimpan
+        file_info: Objek File dari bot.get_file()
+        file_path (str): Path tempat file terenkripsi akan disimpan
     
     Return:
-        float: Waktu yang dibutuhkan untuk enkripsi dalam detik
+        tuple: (waktu_enkripsi, ukuran_file)
+               - waktu_enkripsi (float): Waktu unduh + enkripsi dalam detik
+               - ukuran_file (int): Ukuran file asli dalam byte
     
     Catatan:
-        - Untuk file besar (>50MB), enkripsi langsung ke disk untuk menghemat memori
-        - Menggunakan chunk 5MB untuk file sangat besar
-        - Untuk file kecil, menggunakan enkripsi in-memory
-        - Membuat file temporary saat enkripsi direct-to-disk
+        - Memakai download_to_encrypted_file() sehingga memori konstan
+          berapapun ukuran upload
+        - Setiap file mendapat nonce sendiri (AES-256-GCM per chunk)
         - Mengukur waktu enkripsi untuk monitoring performa
         - Akan raise exception jika enkripsi gagal
     """
@@ -2061,56 +2692,735 @@ def async_encrypt_file(file_data, file_path):
         # Start timing for performance measurement
         start_time = time.time()
         
-        # For very large files, encrypt directly to disk to reduce memory usage
-        if len(file_data) > 50 * 1024 * 1024:  # 50MB
-            # Use direct-to-disk encryption for very large files
-            if HAS_AES:
-                # Create a temporary file for encryption
-                temp_path = f"{file_path}.tmp"
-                
-                # Encrypt in chunks and write directly to disk
-                chunk_size = 5 * 1024 * 1024  # 5MB chunks
-                padder = padding.PKCS7(algorithms.AES.block_size).padder()
-                cipher = Cipher(algorithms.AES(ENCRYPTION_KEY), modes.CBC(ENCRYPTION_IV), backend=backend)
-                encryptor = cipher.encryptor()
-                
-                # Write IV at the beginning of the file
-                with open(temp_path, 'wb') as f:
-                    f.write(ENCRYPTION_IV)
-                    
-                    # Process all chunks except the last one
-                    for i in range(0, len(file_data) - chunk_size, chunk_size):
-                        chunk = file_data[i:i+chunk_size]
-                        encrypted_chunk = encryptor.update(chunk)
-                        f.write(encrypted_chunk)
-                    
-                    # Process the last chunk with padding
-                    last_chunk = file_data[-(len(file_data) % chunk_size or chunk_size):]
-                    padded_last_chunk = padder.update(last_chunk) + padder.finalize()
-                    encrypted_last_chunk = encryptor.update(padded_last_chunk) + encryptor.finalize()
-                    f.write(encrypted_last_chunk)
-                
-                # Rename the temp file to the final file
-                os.replace(temp_path, file_path)
-            else:
-                # Use Fernet for large files (less efficient but simpler)
-                encrypted_data = cipher_suite.encrypt(file_data)
-                with open(file_path, 'wb') as f:
-                    f.write(encrypted_data)
-        else:
-            # For smaller files, use the in-memory encryption
-            encrypted_data, _ = encrypt_file(file_data)
-            with open(file_path, 'wb') as f:
-                f.write(encrypted_data)
+        file_size = download_to_encrypted_file(file_info, file_path)
         
         # Calculate total encryption time
         encryption_time = time.time() - start_time
         logger.info(f"File encrypted and saved in {encryption_time:.2f} seconds")
-        return encryption_time
+        return encryption_time, file_size
     except Exception as e:
         logger.error(f"Async encryption error: {str(e)}")
         raise
 
+IMAGE_BATCH_OPERATIONS = {  # Batch action -> (conversion_jobs operation, status text)
+    "1": ('JPEG', '🔄 **Converting images to JPG...**'),
+    "2": ('PNG', '🔄 **Converting images to PNG...**'),
+    "3": ('WEBP', '🔄 **Converting images to WebP...**'),
+    "4": ('compress', '🗜️ **Compressing images...**'),
+}
+
+def security_check_message(message):
+    """
+    security_check_user() untuk satu pesan file, satu album dihitung sekali.
+    
+    Return:
+        bool: True jika pengguna diizinkan
+    
+    Catatan:
+        - Album 20 foto datang sebagai 20 pesan; tanpa ini album besar akan
+          melewati RATE_LIMIT_REQUESTS dan pengguna terblokir
+    """
+    group_id = message.media_group_id
+    if group_id:
+        now = time.time()
+        with image_batch_lock:
+            for old_id in [old for old, seen in seen_media_groups.items() if now - seen > RATE_LIMIT_WINDOW]:
+                del seen_media_groups[old_id]
+            if group_id in seen_media_groups:
+                return message.from_user.id not in blocked_users
+            seen_media_groups[group_id] = now
+    return security_check_user(message.from_user.id)
+
+def is_batch_image(message):
+    """
+    Memeriksa apakah pesan adalah gambar bagian dari album (media group).
+    
+    Return:
+        bool: True untuk foto atau dokumen gambar dengan media_group_id
+    """
+    if not message.media_group_id:
+        return False
+    if message.content_type == 'photo':
+        return True
+    return message.content_type == 'document' and get_file_type(message.document.file_name)[0] == 'image'
+
+def handle_album_image(message, service, lang='en'):
+    """
+    Menyimpan satu gambar album ke sesi batch pengguna.
+    
+    Parameter:
+        message: Pesan Telegram berisi foto atau dokumen gambar
+        service (str): Layanan yang dipilih pengguna
+        lang (str): Kode bahasa
+    
+    Return:
+        Tidak ada
+    
+    Catatan:
+        - Mirip batch collection PDF merge: menu operasi baru ditampilkan
+          IMAGE_BATCH_WINDOW detik setelah gambar terakhir diterima, sehingga
+          satu album hanya mendapat satu menu
+        - Gambar diunduh dan dienkripsi langsung tanpa pesan status per file
+        - Maksimal IMAGE_BATCH_LIMIT gambar per batch
+    """
+    user_id = message.from_user.id
+    with image_batch_lock:
+        session = image_batch_sessions.get(user_id)
+        if session is None:
+            session = image_batch_sessions[user_id] = {
+                'chat_id': message.chat.id,
+                'images': [],
+                'image_info': {},
+                'pending': 0,
+                'service': service,
+                'lang': lang,
+                'created_at': datetime.now(),
+                'batch_timer': None,
+                'expiry_timer': None,
+                'menu_msg_id': None,
+            }
+        if len(session['images']) + session['pending'] >= IMAGE_BATCH_LIMIT:
+            full = True
+        else:
+            full = False
+            session['pending'] += 1
+            # Collecting again: the old menu and expiry no longer apply
+            if session['expiry_timer']:
+                session['expiry_timer'].cancel()
+                session['expiry_timer'] = None
+    if full:
+        bot.reply_to(message, LANG[lang]['batch_image_limit'])
+        return
+    
+    file_path = None
+    try:
+        if message.content_type == 'photo':
+            file_info = bot.get_file(message.photo[-1].file_id)
+            original_name = f"photo_{message.photo[-1].file_id}.jpg"
+        else:
+            file_info = bot.get_file(message.document.file_id)
+            original_name = message.document.file_name
+        file_path = f"files/{generate_secure_filename(original_name)}"
+        file_size = download_to_encrypted_file(file_info, file_path)
+        db_id = file_repo.add(user_id, file_info.file_id, original_name, file_path)
+    except Exception as e:
+        logger.error(f"Album image upload failed for user {user_id}: {str(e)}")
+        if file_path:
+            cleanup_failed_file(file_path)
+        db_id = None
+    
+    with image_batch_lock:
+        session['pending'] -= 1
+        if image_batch_sessions.get(user_id) is not session:
+            # The batch was cancelled or started while this image downloaded
+            if db_id is not None:
+                cleanup_failed_file(file_repo.pop(db_id))
+            return
+        if db_id is not None:
+            session['images'].append(db_id)
+            session['image_info'][db_id] = {'name': original_name, 'path': file_path, 'size': file_size}
+        if session['batch_timer']:
+            session['batch_timer'].cancel()
+        session['batch_timer'] = schedule_callback(IMAGE_BATCH_WINDOW, lambda: end_image_batch_collection(user_id))
+
+def end_image_batch_collection(user_id):
+    """
+    Menampilkan satu menu operasi untuk semua gambar di sesi batch.
+    
+    Catatan:
+        - Dipanggil oleh timer batch; jika masih ada gambar yang sedang
+          diunduh, menu ditunda sampai gambar itu selesai
+        - Sesi berakhir setelah SESSION_TIMEOUT_SECONDS tanpa pilihan
+    """
+    with image_batch_lock:
+        session = image_batch_sessions.get(user_id)
+        if session is None or session['pending']:
+            return
+        session['batch_timer'] = None
+        if not session['images']:
+            image_batch_sessions.pop(user_id, None)
+            return
+        lang = session['lang']
+        count = len(session['images'])
+        total_size = sum(info['size'] for info in session['image_info'].values()) / (1024 * 1024)
+        old_menu_id = session['menu_msg_id']
+        session['expiry_timer'] = schedule_callback(SESSION_TIMEOUT_SECONDS, lambda: expire_image_batch(user_id, session))
+    
+    markup = types.InlineKeyboardMarkup()
+    if session['service'] != 'compress_image':
+        markup.add(types.InlineKeyboardButton(LANG[lang]['convert_jpg'], callback_data="batch_1"))
+        markup.add(types.InlineKeyboardButton(LANG[lang]['convert_png'], callback_data="batch_2"))
+        markup.add(types.InlineKeyboardButton(LANG[lang]['convert_webp'], callback_data="batch_3"))
+    markup.add(types.InlineKeyboardButton(LANG[lang]['compress_img'], callback_data="batch_4"))
+    markup.add(types.InlineKeyboardButton(LANG[lang]['cancel'], callback_data="batch_cancel"))
+    
+    try:
+        if old_menu_id:
+            bot.delete_message(session['chat_id'], old_menu_id)
+    except Exception as delete_error:
+        logger.debug(f"Could not delete old batch menu: {str(delete_error)}")
+    try:
+        menu = bot.send_message(session['chat_id'], LANG[lang]['batch_images_received'].format(count, total_size),
+                                parse_mode='Markdown', reply_markup=markup)
+        session['menu_msg_id'] = menu.message_id
+    except Exception as e:
+        logger.error(f"Failed to show image batch menu for user {user_id}: {str(e)}")
+
+def clear_image_batch_session(user_id):
+    """
+    Menghapus sesi batch gambar beserta semua file dan baris database-nya.
+    
+    Return:
+        dict atau None: Sesi yang dihapus
+    """
+    with image_batch_lock:
+        session = image_batch_sessions.pop(user_id, None)
+    if not session:
+        return None
+    for timer in (session['batch_timer'], session['expiry_timer']):
+        if timer:
+            timer.cancel()
+    try:
+        for file_path in file_repo.pop_many(session['images']):
+            cleanup_failed_file(file_path)
+    except Exception as e:
+        logger.error(f"Error cleaning up image batch for user {user_id}: {str(e)}")
+    return session
+
+def expire_image_batch(user_id, session):
+    """
+    Mengakhiri sesi batch yang tidak dipilih operasinya dalam batas waktu.
+    """
+    if image_batch_sessions.get(user_id) is not session:
+        return
+    clear_image_batch_session(user_id)
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton(LANG[session['lang']]['start_over'], callback_data="start_over"))
+    try:
+        bot.send_message(session['chat_id'], LANG[session['lang']]['session_expired'], reply_markup=markup)
+    except Exception as e:
+        logger.error(f"Failed to send image batch expiry message: {str(e)}")
+
+def start_image_batch(call, user_id, action, lang='en'):
+    """
+    Menjalankan operasi yang dipilih untuk semua gambar di sesi batch.
+    
+    Parameter:
+        call: Callback query dari tombol batch_<action>
+        user_id (int): ID pengguna Telegram
+        action (str): Kunci IMAGE_BATCH_OPERATIONS ("1" - "4")
+        lang (str): Kode bahasa
+    
+    Catatan:
+        - Semua gambar diproses dalam satu job 'image_batch'; worker
+          memprosesnya paralel
+        - Sampai MEDIA_GROUP_LIMIT gambar dikirim kembali sebagai satu media
+          group, lebih dari itu sebagai satu ZIP
+    """
+    with image_batch_lock:
+        session = image_batch_sessions.get(user_id)
+        if session is None or session['pending'] or session['batch_timer'] or action not in IMAGE_BATCH_OPERATIONS:
+            session = None
+        else:
+            image_batch_sessions.pop(user_id, None)
+    if session is None:
+        bot.answer_callback_query(call.id, "❌ No images to process")
+        return
+    if session['expiry_timer']:
+        session['expiry_timer'].cancel()
+    if conversion_executor is None:
+        for file_path in file_repo.pop_many(session['images']):
+            cleanup_failed_file(file_path)
+        send_error_with_restart(call.message.chat.id, LANG[lang]['error_processing'], lang)
+        bot.answer_callback_query(call.id)
+        return
+    
+    operation, status_text = IMAGE_BATCH_OPERATIONS[action]
+    db_ids = list(session['images'])
+    inputs = [[session['image_info'][db_id]['path'], session['image_info'][db_id]['name']] for db_id in db_ids]
+    original_size = sum(session['image_info'][db_id]['size'] for db_id in db_ids) / (1024 * 1024)
+    
+    try:
+        bot.edit_message_reply_markup(call.message.chat.id, call.message.message_id, reply_markup=None)
+    except Exception as edit_error:
+        logger.debug(f"Could not remove batch menu buttons: {str(edit_error)}")
+    status_msg = bot.send_message(call.message.chat.id, status_text, parse_mode='Markdown')
+    
+    # Keep the sweep away from the inputs until the job can no longer need them
+    job_timeout = CONVERSION_TIMEOUTS['image_batch'] + CONVERSION_RESULT_GRACE
+    expires_at = datetime.now() + timedelta(seconds=job_timeout)
+    for db_id in db_ids:
+        file_repo.set_state(db_id, STATE_PROCESSING, expires_at=expires_at)
+    
+    params = {'inputs': inputs, 'operation': operation, 'archive': len(inputs) > MEDIA_GROUP_LIMIT}
+    job = conversion_executor.submit(
+        'image_batch', params, owner=user_id,
+        on_done=lambda job, result, error: deliver_image_batch_result(
+            job, result, error, call.message.chat.id, status_msg.message_id, db_ids, original_size, lang)
+    )
+    markup = create_job_cancel_markup(job)
+    try:
+        bot.edit_message_text(status_text, call.message.chat.id, status_msg.message_id, parse_mode='Markdown', reply_markup=markup)
+    except Exception as edit_error:
+        logger.debug(f"Could not update status message: {str(edit_error)}")
+    bot.answer_callback_query(call.id)
+
+def deliver_image_batch_result(job, result, error, chat_id, status_msg_id, db_ids, original_size, lang='en'):
+    """
+    Mengirim hasil job batch gambar dan menghapus semua file asli.
+    
+    Parameter:
+        job (ConversionJob): Job yang sudah selesai
+        result (dict): Hasil conversion_jobs.job_image_batch(), None jika gagal
+        error (Exception): Error job, None jika berhasil
+        chat_id (int): ID chat pengguna
+        status_msg_id (int): ID pesan status yang akan dihapus
+        db_ids (list): ID database semua gambar di batch
+        original_size (float): Total ukuran gambar asli dalam MB
+        lang (str): Kode bahasa
+    """
+    outputs = []
+    try:
+        if isinstance(error, conversion_jobs.JobCancelled):
+            bot.send_message(chat_id, "❌ Operation cancelled. File deleted for security.")
+        elif isinstance(error, conversion_jobs.JobTimeout):
+            logger.error(f"Conversion job {job.job_id} ({job.job_type}) timed out")
+            send_error_with_restart(chat_id, "⏱️ Processing took too long and was stopped.", lang)
+        elif error is not None:
+            logger.error(f"Conversion job {job.job_id} ({job.job_type}) failed: {str(error)}")
+            send_error_with_restart(chat_id, LANG[lang]['error_processing'], lang)
+        else:
+            if result['output_path']:
+                with open_job_output(result, "images.zip") as output:
+                    bot.send_document(chat_id, output, visible_file_name="images.zip")
+            elif len(result['outputs']) == 1:
+                item = result['outputs'][0]
+                with open_job_output(item, item['name']) as output:
+                    bot.send_document(chat_id, output, visible_file_name=item['name'])
+            else:
+                # One album back instead of one message per image
+                outputs = [open_job_output(item, item['name']) for item in result['outputs']]
+                bot.send_media_group(chat_id, [types.InputMediaDocument(output) for output in outputs])
+            
+            count = len(db_ids) - len(result['failed'])
+            converted_size = result['output_size'] / (1024 * 1024)
+            bot.send_message(chat_id, LANG[lang]['batch_result'].format(count, original_size, converted_size), parse_mode='Markdown')
+            if result['failed']:
+                bot.send_message(chat_id, LANG[lang]['batch_skipped'].format(len(result['failed'])))
+            bot.send_message(chat_id, LANG[lang]['files_deleted'])
+    except Exception as e:
+        logger.error(f"Failed to deliver image batch for job {job.job_id}: {str(e)}", exc_info=True)
+        send_error_with_restart(chat_id, LANG[lang]['oops_error'], lang)
+    finally:
+        for output in outputs:
+            output.close()
+    
+    # Clean up original files after processing
+    try:
+        for file_path in file_repo.pop_many(db_ids):
+            cleanup_failed_file(file_path)
+    except Exception as e:
+        logger.error(f"Failed to delete image batch files: {str(e)}")
+    
+    try:
+        bot.delete_message(chat_id, status_msg_id)
+    except Exception as delete_error:
+        logger.debug(f"Could not delete status message: {str(delete_error)}")
+    
+    if isinstance(error, conversion_jobs.JobCancelled):
+        return
+    try:
+        markup = types.InlineKeyboardMarkup()
+        markup.add(
+            types.InlineKeyboardButton(LANG[lang]['yes_more'], callback_data="yes_more"),
+            types.InlineKeyboardButton(LANG[lang]['no_thanks'], callback_data="no_thanks")
+        )
+        bot.send_message(chat_id, LANG[lang]['help_more'], reply_markup=markup)
+    except Exception as e:
+        logger.error(f"Failed to send completion message: {str(e)}")
+
+def handle_zip_upload(message, lang='en'):
+    """
+    Menambahkan satu file ke sesi ZIP multi-file pengguna.
+    
+    Parameter:
+        message: Pesan Telegram berisi dokumen, foto, video, atau audio
+        lang (str): Kode bahasa
+    
+    Return:
+        Tidak ada
+    
+    Catatan:
+        - Mirip batch collection PDF merge: menu dibuat ZIP_SESSION_WINDOW
+          detik setelah upload terakhir
+        - Setiap file langsung dikompres oleh job 'zip_member' begitu selesai
+          diunggah, sehingga kompresi berjalan paralel selagi file berikutnya
+          masih diunggah; arsip akhir hanya menyalin data member
+        - Maksimal ZIP_SESSION_LIMIT file per arsip
+    """
+    user_id = message.from_user.id
+    with zip_session_lock:
+        session = zip_sessions.get(user_id)
+        if session is None:
+            session = zip_sessions[user_id] = {
+                'chat_id': message.chat.id,
+                'files': [],
+                'pending': 0,
+                'compressing': 0,
+                'state': 'collecting',
+                'lang': lang,
+                'created_at': datetime.now(),
+                'batch_timer': None,
+                'expiry_timer': None,
+                'menu_msg_id': None,
+                'status_msg_id': None,
+            }
+        if len(session['files']) + session['pending'] >= ZIP_SESSION_LIMIT:
+            full = True
+        else:
+            full = False
+            session['pending'] += 1
+            # Collecting again: the old menu and expiry no longer apply
+            if session['expiry_timer']:
+                session['expiry_timer'].cancel()
+                session['expiry_timer'] = None
+    if full:
+        bot.reply_to(message, LANG[lang]['zip_session_limit'])
+        return
+    if conversion_executor is None:
+        with zip_session_lock:
+            session['pending'] -= 1
+        bot.reply_to(message, LANG[lang]['error_processing'])
+        return
+    
+    file_path = None
+    entry = None
+    try:
+        if message.content_type == 'photo':
+            file_info = bot.get_file(message.photo[-1].file_id)
+            original_name = f"photo_{message.photo[-1].file_id}.jpg"
+        elif message.content_type == 'document':
+            file_info = bot.get_file(message.document.file_id)
+            original_name = message.document.file_name
+        elif message.content_type == 'video':
+            file_info = bot.get_file(message.video.file_id)
+            original_name = f"video_{message.video.file_id}.mp4"
+        else:
+            file_info = bot.get_file(message.audio.file_id)
+            original_name = f"audio_{message.audio.file_id}.mp3"
+        file_path = f"files/{generate_secure_filename(original_name)}"
+        file_size = download_to_encrypted_file(file_info, file_path)
+        member_path = f"files/{generate_secure_filename(original_name)}"
+        entry = {
+            'name': original_name,
+            'size': file_size,
+            'db_id': file_repo.add(user_id, file_info.file_id, original_name, file_path, state=STATE_PROCESSING),
+            'member_id': file_repo.add(user_id, file_info.file_id, original_name, member_path, state=STATE_PROCESSING),
+            'member_path': member_path,
+            'member': None,
+            'job': None,
+        }
+    except Exception as e:
+        logger.error(f"ZIP upload failed for user {user_id}: {str(e)}")
+        if entry is None and file_path:
+            cleanup_failed_file(file_path)
+        bot.reply_to(message, LANG[lang]['error_upload'])
+    
+    with zip_session_lock:
+        session['pending'] -= 1
+        added = entry is not None and session['state'] == 'collecting'
+        if added:
+            session['files'].append(entry)
+            session['compressing'] += 1
+            position = len(session['files'])
+        if session['state'] == 'collecting':
+            if session['batch_timer']:
+                session['batch_timer'].cancel()
+            session['batch_timer'] = schedule_callback(ZIP_SESSION_WINDOW, lambda: end_zip_collection(user_id))
+    if entry is None:
+        return
+    if not added:
+        # The session was cancelled while this file downloaded
+        cleanup_failed_file(file_repo.pop(entry['db_id']))
+        file_repo.pop(entry['member_id'])
+        return
+    
+    # Keep the sweep away from the upload until its member job can no longer need it
+    expires_at = datetime.now() + timedelta(seconds=CONVERSION_TIMEOUTS['zip_member'] + CONVERSION_RESULT_GRACE)
+    file_repo.set_state(entry['db_id'], STATE_PROCESSING, expires_at=expires_at)
+    entry['job'] = conversion_executor.submit(
+        'zip_member', {'input_path': file_path, 'output_path': entry['member_path']},
+        owner=user_id, db_id=entry['db_id'],
+        on_done=lambda job, result, error: finish_zip_member(user_id, session, entry, result, error)
+    )
+    try:
+        bot.reply_to(message, LANG[lang]['zip_file_added'].format(position, original_name), parse_mode='Markdown')
+    except Exception as e:
+        logger.debug(f"Could not confirm ZIP upload: {str(e)}")
+
+def finish_zip_member(user_id, session, entry, result, error):
+    """
+    Menerima hasil job 'zip_member' untuk satu file sesi ZIP.
+    
+    Catatan:
+        - File asli dihapus begitu member terkompresi selesai; yang disimpan
+          sampai arsip dibuat hanya data member
+        - Member yang dibatalkan (JobCancelled) membatalkan seluruh sesi,
+          karena pembatalan hanya datang dari pengguna
+        - Jika pengguna sudah memilih Create ZIP, member terakhir yang selesai
+          mengirim job 'zip_bundle'
+    """
+    cleanup_failed_file(file_repo.pop(entry['db_id']))
+    if error is not None and not isinstance(error, conversion_jobs.JobCancelled):
+        logger.error(f"ZIP member job for user {user_id} failed: {str(error)}")
+    
+    with zip_session_lock:
+        session['compressing'] -= 1
+        if isinstance(error, conversion_jobs.JobCancelled) and session['state'] != 'cancelled':
+            session['state'] = 'cancelled'
+            if zip_sessions.get(user_id) is session:
+                zip_sessions.pop(user_id, None)
+            cancelled_now = True
+        else:
+            cancelled_now = False
+        if error is None and session['state'] != 'cancelled':
+            entry['member'] = result['member']
+        ready = session['state'] == 'bundling' and session['compressing'] == 0
+    if entry['member'] is None:
+        cleanup_failed_file(file_repo.pop(entry['member_id']))
+    if cancelled_now:
+        discard_zip_session(session)
+    elif ready:
+        submit_zip_bundle(user_id, session)
+
+def end_zip_collection(user_id):
+    """
+    Menampilkan menu pembuatan ZIP untuk semua file di sesi.
+    
+    Catatan:
+        - Dipanggil oleh timer batch; jika masih ada file yang sedang
+          diunduh, menu ditunda sampai file itu selesai
+        - Sesi berakhir setelah SESSION_TIMEOUT_SECONDS tanpa pilihan
+    """
+    with zip_session_lock:
+        session = zip_sessions.get(user_id)
+        if session is None or session['pending'] or session['state'] != 'collecting':
+            return
+        session['batch_timer'] = None
+        if not session['files']:
+            zip_sessions.pop(user_id, None)
+            return
+        lang = session['lang']
+        count = len(session['files'])
+        total_size = sum(entry['size'] for entry in session['files']) / (1024 * 1024)
+        old_menu_id = session['menu_msg_id']
+        session['expiry_timer'] = schedule_callback(SESSION_TIMEOUT_SECONDS, lambda: expire_zip_session(user_id, session))
+    
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton(LANG[lang]['create_zip'], callback_data="zipbundle_create"))
+    markup.add(types.InlineKeyboardButton(LANG[lang]['cancel'], callback_data="zipbundle_cancel"))
+    
+    try:
+        if old_menu_id:
+            bot.delete_message(session['chat_id'], old_menu_id)
+    except Exception as delete_error:
+        logger.debug(f"Could not delete old ZIP menu: {str(delete_error)}")
+    try:
+        menu = bot.send_message(session['chat_id'], LANG[lang]['zip_files_received'].format(count, total_size),
+                                parse_mode='Markdown', reply_markup=markup)
+        session['menu_msg_id'] = menu.message_id
+    except Exception as e:
+        logger.error(f"Failed to show ZIP menu for user {user_id}: {str(e)}")
+
+def discard_zip_session(session):
+    """
+    Menghentikan job member dan menghapus file sesi ZIP yang dibatalkan.
+    
+    Catatan:
+        - Member yang masih dikompres dibersihkan oleh finish_zip_member()
+          saat job-nya berhenti
+    """
+    for timer in (session['batch_timer'], session['expiry_timer']):
+        if timer:
+            timer.cancel()
+    if session['status_msg_id']:
+        try:
+            bot.delete_message(session['chat_id'], session['status_msg_id'])
+        except Exception as delete_error:
+            logger.debug(f"Could not delete status message: {str(delete_error)}")
+    with zip_session_lock:
+        finished = [entry for entry in session['files'] if entry['member'] is not None]
+        running = [entry['job'] for entry in session['files'] if entry['member'] is None and entry['job']]
+    for job in running:
+        job.cancel()
+    try:
+        for file_path in file_repo.pop_many([entry['member_id'] for entry in finished]):
+            cleanup_failed_file(file_path)
+    except Exception as e:
+        logger.error(f"Error cleaning up ZIP session: {str(e)}")
+
+def clear_zip_session(user_id):
+    """
+    Membatalkan sesi ZIP pengguna beserta semua file dan job-nya.
+    
+    Return:
+        dict atau None: Sesi yang dihapus
+    """
+    with zip_session_lock:
+        session = zip_sessions.pop(user_id, None)
+        if session is None or session['state'] == 'cancelled':
+            return None
+        session['state'] = 'cancelled'
+    discard_zip_session(session)
+    return session
+
+def expire_zip_session(user_id, session):
+    """
+    Mengakhiri sesi ZIP yang tidak dikonfirmasi dalam batas waktu.
+    """
+    if zip_sessions.get(user_id) is not session or clear_zip_session(user_id) is None:
+        return
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton(LANG[session['lang']]['start_over'], callback_data="start_over"))
+    try:
+        bot.send_message(session['chat_id'], LANG[session['lang']]['session_expired'], reply_markup=markup)
+    except Exception as e:
+        logger.error(f"Failed to send ZIP session expiry message: {str(e)}")
+
+def start_zip_bundle(call, user_id, lang='en'):
+    """
+    Membuat arsip dari sesi ZIP setelah pengguna memilih Create ZIP.
+    
+    Parameter:
+        call: Callback query dari tombol zipbundle_create
+        user_id (int): ID pengguna Telegram
+        lang (str): Kode bahasa
+    
+    Catatan:
+        - Sesi dilepas dari zip_sessions, sehingga upload berikutnya memulai
+          sesi baru
+        - Jika masih ada member yang dikompres, job 'zip_bundle' dikirim oleh
+          finish_zip_member() saat member terakhir selesai
+    """
+    with zip_session_lock:
+        session = zip_sessions.get(user_id)
+        if session is None or session['pending'] or session['batch_timer'] or session['state'] != 'collecting':
+            session = None
+        else:
+            zip_sessions.pop(user_id, None)
+            session['state'] = 'bundling'
+            ready = session['compressing'] == 0
+    if session is None:
+        bot.answer_callback_query(call.id, "❌ No files to archive")
+        return
+    if session['expiry_timer']:
+        session['expiry_timer'].cancel()
+    
+    try:
+        bot.edit_message_reply_markup(call.message.chat.id, call.message.message_id, reply_markup=None)
+    except Exception as edit_error:
+        logger.debug(f"Could not remove ZIP menu buttons: {str(edit_error)}")
+    status_msg = bot.send_message(call.message.chat.id, '📦 **Creating ZIP archive...**', parse_mode='Markdown')
+    session['status_msg_id'] = status_msg.message_id
+    bot.answer_callback_query(call.id)
+    if ready:
+        submit_zip_bundle(user_id, session)
+
+def submit_zip_bundle(user_id, session):
+    """
+    Mengirim job 'zip_bundle' untuk semua member sesi yang berhasil dikompres.
+    """
+    chat_id = session['chat_id']
+    lang = session['lang']
+    entries = [entry for entry in session['files'] if entry['member'] is not None]
+    if not entries:
+        send_error_with_restart(chat_id, LANG[lang]['error_processing'], lang)
+        try:
+            bot.delete_message(chat_id, session['status_msg_id'])
+        except Exception as delete_error:
+            logger.debug(f"Could not delete status message: {str(delete_error)}")
+        return
+    
+    member_ids = [entry['member_id'] for entry in entries]
+    job_timeout = CONVERSION_TIMEOUTS['zip_bundle'] + CONVERSION_RESULT_GRACE
+    expires_at = datetime.now() + timedelta(seconds=job_timeout)
+    for member_id in member_ids:
+        file_repo.set_state(member_id, STATE_PROCESSING, expires_at=expires_at)
+    
+    params = {'members': [[entry['member_path'], entry['name'], entry['member']] for entry in entries]}
+    skipped = len(session['files']) - len(entries)
+    job = conversion_executor.submit(
+        'zip_bundle', params, owner=user_id,
+        on_done=lambda job, result, error: deliver_zip_bundle_result(
+            job, result, error, chat_id, session['status_msg_id'], member_ids, skipped, lang)
+    )
+    markup = create_job_cancel_markup(job)
+    try:
+        bot.edit_message_text('📦 **Creating ZIP archive...**', chat_id, session['status_msg_id'],
+                              parse_mode='Markdown', reply_markup=markup)
+    except Exception as edit_error:
+        logger.debug(f"Could not update status message: {str(edit_error)}")
+
+def deliver_zip_bundle_result(job, result, error, chat_id, status_msg_id, member_ids, skipped, lang='en'):
+    """
+    Mengirim arsip ZIP multi-file dan menghapus semua data member.
+    
+    Parameter:
+        job (ConversionJob): Job yang sudah selesai
+        result (dict): Hasil conversion_jobs.job_zip_bundle(), None jika gagal
+        error (Exception): Error job, None jika berhasil
+        chat_id (int): ID chat pengguna
+        status_msg_id (int): ID pesan status yang akan dihapus
+        member_ids (list): ID database data member di arsip
+        skipped (int): Jumlah file yang gagal dikompres
+        lang (str): Kode bahasa
+    """
+    try:
+        if isinstance(error, conversion_jobs.JobCancelled):
+            bot.send_message(chat_id, "❌ Operation cancelled. File deleted for security.")
+        elif isinstance(error, conversion_jobs.JobTimeout):
+            logger.error(f"Conversion job {job.job_id} ({job.job_type}) timed out")
+            send_error_with_restart(chat_id, "⏱️ Processing took too long and was stopped.", lang)
+        elif error is not None:
+            logger.error(f"Conversion job {job.job_id} ({job.job_type}) failed: {str(error)}")
+            send_error_with_restart(chat_id, LANG[lang]['error_processing'], lang)
+        else:
+            with open_job_output(result, "archive.zip") as output:
+                bot.send_document(chat_id, output, visible_file_name="archive.zip")
+            original_size = result['original_size'] / (1024 * 1024)
+            converted_size = result['output_size'] / (1024 * 1024)
+            bot.send_message(chat_id, LANG[lang]['zip_bundle_result'].format(len(member_ids), original_size, converted_size),
+                             parse_mode='Markdown')
+            if skipped:
+                bot.send_message(chat_id, f"⚠️ Skipped {skipped} file(s) that could not be compressed.")
+            bot.send_message(chat_id, LANG[lang]['files_deleted'])
+    except Exception as e:
+        logger.error(f"Failed to deliver ZIP archive for job {job.job_id}: {str(e)}", exc_info=True)
+        send_error_with_restart(chat_id, LANG[lang]['oops_error'], lang)
+    
+    try:
+        for file_path in file_repo.pop_many(member_ids):
+            cleanup_failed_file(file_path)
+    except Exception as e:
+        logger.error(f"Failed to delete ZIP member files: {str(e)}")
+    
+    try:
+        bot.delete_message(chat_id, status_msg_id)
+    except Exception as delete_error:
+        logger.debug(f"Could not delete status message: {str(delete_error)}")
+    
+    if isinstance(error, conversion_jobs.JobCancelled):
+        return
+    try:
+        markup = types.InlineKeyboardMarkup()
+        markup.add(
+            types.InlineKeyboardButton(LANG[lang]['yes_more'], callback_data="yes_more"),
+            types.InlineKeyboardButton(LANG[lang]['no_thanks'], callback_data="no_thanks")
+        )
+        bot.send_message(chat_id, LANG[lang]['help_more'], reply_markup=markup)
+    except Exception as e:
+        logger.error(f"Failed to send completion message: {str(e)}")
+
 @bot.message_handler(content_types=['document', 'photo', 'video', 'audio'])
 def handle_file(message):
     """
@@ -2126,6 +3436,7 @@ def handle_file(message):
         - Melakukan security check dan rate limiting
         - Memvalidasi apakah pengguna sudah memilih layanan
         - Menangani mode PDF merge dengan batch collection
+        - Gambar dalam album (media_group_id) dikumpulkan ke sesi batch gambar
         - Mengenkripsi file secara asinkron untuk keamanan
         - Menyimpan file ke database dengan nama aman
         - Menampilkan menu kontekstual berdasarkan jenis file dan layanan
@@ -2137,7 +3448,7 @@ def handle_file(message):
         lang = get_user_lang(message.from_user.language_code)
         
         # Security check
-        if not security_check_user(user_id):
+        if not security_check_message(message):
             bot.reply_to(message, "❌ Access denied. Too many requests.")
             return
         
@@ -2162,46 +3473,43 @@ def handle_file(message):
                         bot.reply_to(message, LANG[lang]['pdf_merge_limit'])
                         return
                     
-                    # Process the PDF file
+                    # Process the PDF file - download and encrypt straight to disk
                     file_info = bot.get_file(message.document.file_id)
                     original_name = message.document.file_name
                     secure_filename = generate_secure_filename(original_name)
-                    downloaded_file = bot.download_file(file_info.file_path)
                     file_path = f"files/{secure_filename}"
+                    download_to_encrypted_file(file_info, file_path)
                     
-                    # Validate PDF
+                    # Validate PDF from its xref and page tree only; the parsed
+                    # reader is kept for the merge step
+                    pdf_info = {
+                        'name': original_name,
+                        'path': file_path,
+                        'size': message.document.file_size or get_stored_file_size(file_path),
+                        'pages': None,
+                    }
                     try:
                         if HAS_PDF_MERGER:
-                            temp_pdf = BytesIO(downloaded_file)
-                            test_merger = PdfMerger()
-                            test_merger.append(temp_pdf)
-                            test_merger.close()
-                            temp_pdf.close()
-                    except Exception:
+                            pdf_info.update(inspect_pdf_for_merge(file_path))
+                    except Exception as e:
+                        logger.info(f"Rejected PDF for merge: {str(e)}")
+                        cleanup_failed_file(file_path)
                         bot.reply_to(message, LANG[lang]['pdf_file_corrupted'])
                         return
                     
-                    # Encrypt and store
-                    encrypted_data, _ = encrypt_file(downloaded_file)
-                    with open(file_path, 'wb') as f:
-                        f.write(encrypted_data)
-                    
                     # Store in database
                     try:
-                        conn = sqlite3.connect('files.db', timeout=10.0)
-                        cursor = conn.execute('INSERT INTO files (user_id, file_id, file_name, file_path, created_at) VALUES (?, ?, ?, ?, ?)',
-                                    (user_id, file_info.file_id, original_name, file_path, datetime.now()))
-                        db_id = cursor.lastrowid
-                        conn.commit()
-                        conn.close()
+                        db_id = file_repo.add(user_id, file_info.file_id, original_name, file_path, state=STATE_MERGING)
                     except Exception as db_error:
                         logger.error(f"Database insert failed for PDF merge: {str(db_error)}")
+                        release_merge_pdf_info(pdf_info)
                         cleanup_failed_file(file_path)
                         bot.reply_to(message, LANG[lang]['error_upload'])
                         return
                     
                     # Add to merge session
-                    add_pdf_to_merge_session(user_id, db_id)
+                    if not add_pdf_to_merge_session(user_id, db_id, pdf_info):
+                        release_merge_pdf_info(pdf_info)
                     
                     # Show brief confirmation (batch collection in progress)
                     if merge_session['awaiting_files']:
@@ -2219,6 +3527,16 @@ def handle_file(message):
         if not validate_file_for_service(message, service, lang):
             return
         
+        # ZIP uploads are collected into one multi-file archive session
+        if service == 'compress_zip' and conversion_executor:
+            handle_zip_upload(message, lang)
+            return
+        
+        # Albums are collected into one batch with a single operation menu
+        if is_batch_image(message):
+            handle_album_image(message, service, lang)
+            return
+        
         if user_id in active_sessions:
             try:
                 active_sessions[user_id]['timer'].cancel()
@@ -2248,19 +3566,13 @@ def handle_file(message):
 
         # Generate secure filename
         secure_filename = generate_secure_filename(original_name)
-        
-        # Download file
-        downloaded_file = bot.download_file(file_info.file_path)
         file_path = f"files/{secure_filename}"
         
         # Get service for context
         service = user_services.get(user_id, 'general')
         
-        # Get original file size for compression ratio calculation
-        original_size = get_file_size_mb(downloaded_file)
-        
-        # Start encryption in a separate thread
-        future = encryption_pool.submit(async_encrypt_file, downloaded_file, file_path)
+        # Download and encrypt in a separate thread, streaming straight to disk
+        future = encryption_pool.submit(async_encrypt_file, file_info, file_path)
         
         # Update encryption status with animated progress indicator
         animation_chars = ['⏳', '⌛', '⏳', '⌛']
@@ -2274,11 +3586,14 @@ def handle_file(message):
             char_idx = (char_idx + 1) % len(animation_chars)
             
             try:
-                # Show animated progress with elapsed time
-                bot.edit_message_text(
+                # Show animated progress with elapsed time; queued at the
+                # lowest priority and superseded by the next frame if not sent yet
+                bot.submit(
+                    'edit_message_text',
                     f"{animation_chars[char_idx]} {LANG[lang]['encrypting']} {'.' * dots}\n({elapsed:.1f}s)",
                     message.chat.id, 
-                    status_msg.message_id
+                    status_msg.message_id,
+                    priority=PRIORITY_ANIMATION
                 )
             except:
                 pass
@@ -2288,7 +3603,7 @@ def handle_file(message):
         
         # Get encryption result
         try:
-            encryption_time = future.result()
+            encryption_time, file_size = future.result()
             # Show encryption completion message
             bot.edit_message_text(
                 LANG[lang]['encryption_complete'].format(encryption_time),
@@ -2297,19 +3612,12 @@ def handle_file(message):
             )
         except Exception as e:
             logger.error(f"Encryption failed: {str(e)}")
-            # If encryption in thread failed, try direct encryption as fallback
-            encrypted_data, _ = encrypt_file(downloaded_file)
-            with open(file_path, 'wb') as f:
-                f.write(encrypted_data)
+            # If encryption in thread failed, retry the streaming download once
+            _, file_size = async_encrypt_file(file_info, file_path)
 
         # Store original name and secure path in database
         try:
-            conn = sqlite3.connect('files.db', timeout=10.0)
-            cursor = conn.execute('INSERT INTO files (user_id, file_id, file_name, file_path, created_at) VALUES (?, ?, ?, ?, ?)',
-                        (message.from_user.id, file_info.file_id, original_name, file_path, datetime.now()))
-            db_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            db_id = file_repo.add(message.from_user.id, file_info.file_id, original_name, file_path)
         except Exception as db_error:
             logger.error(f"Database insert failed: {str(db_error)}")
             cleanup_failed_file(file_path)
@@ -2388,7 +3696,8 @@ def handle_file(message):
         markup.add(types.InlineKeyboardButton(LANG[lang]['cancel'], callback_data=f"cancel_{db_id}"))
 
         # Create contextual file message based on file type
-        file_size_text = f" ({get_file_size_mb(downloaded_file):.1f} MB)" if get_file_size_mb(downloaded_file) >= 0.1 else ""
+        file_size_mb = file_size / (1024 * 1024)
+        file_size_text = f" ({file_size_mb:.1f} MB)" if file_size_mb >= 0.1 else ""
         file_message = f"✅ **{original_name}**{file_size_text}\n\n{options_text}\n\n{LANG[lang]['security_reminder']}"
         
         reply_msg = bot.reply_to(message, file_message, parse_mode='Markdown', reply_markup=markup)
@@ -2400,15 +3709,296 @@ def handle_file(message):
         logger.error(f"File handling error for user {message.from_user.id}: {str(e)}")
         lang = get_user_lang(message.from_user.language_code)
         
-        # Clean up any partially created files
+        # Clean up any partially created files
+        try:
+            if 'file_path' in locals():
+                cleanup_failed_file(file_path)
+        except:
+            pass
+            
+        # Send user-friendly error message with restart button
+        send_error_with_restart(message.chat.id, LANG[lang]['error_upload'], lang)
+
+def get_conversion_job(action, file_path, original_name, lang='en'):
+    """
+    Memetakan aksi tombol ke job konversi untuk ConversionExecutor.
+    
+    Parameter:
+        action (str): Nomor aksi dari callback_data ("1" - "11")
+        file_path (str): Path file terenkripsi milik pengguna
+        original_name (str): Nama file asli
+        lang (str): Kode bahasa untuk pesan status
+    
+    Return:
+        tuple: (job_type, params, status_text)
+    
+    Catatan:
+        - Akan raise ValueError jika aksi tidak dikenal
+    """
+    params = {'input_path': file_path}
+    if action == "1":
+        params['format'] = 'JPEG'
+        return 'image_convert', params, '🔄 **Converting to JPG...**\n\nProcessing your image...'
+    elif action == "2":
+        params['format'] = 'PNG'
+        return 'image_convert', params, '🔄 **Converting to PNG...**\n\nProcessing your image...'
+    elif action == "3":
+        params['format'] = 'WEBP'
+        return 'image_convert', params, '🔄 **Converting to WebP...**\n\nProcessing your image...'
+    elif action == "4":
+        return 'image_compress', params, '🗜️ **Compressing image...**\n\nOptimizing file size...'
+    elif action == "5":
+        return 'pdf_compress', params, LANG[lang]['compressing']
+    elif action == "6":
+        return 'extract_audio', params, '🎵 **Extracting audio...**\n\nExtracting MP3 from video...'
+    elif action == "7":
+        params['original_name'] = original_name
+        return 'zip_file', params, '📦 **Creating ZIP archive...**\n\nCompressing file...'
+    elif action == "8":
+        params['use_pdf2docx'] = importlib.util.find_spec("pdf2docx") is not None
+        return 'pdf_to_word', params, LANG[lang]['compressing']
+    elif action == "9":
+        params['ext'] = get_file_type(original_name)[1]
+        return 'document_to_pdf', params, LANG[lang]['converting_to_pdf']
+    elif action == "10":
+        return 'video_mp4', params, '🎬 **Converting to MP4...**\n\nThis may take a moment for large videos...'
+    elif action == "11":
+        return 'audio_mp3', params, '🎵 **Converting to MP3...**\n\nProcessing audio...'
+    raise ValueError(f"Unknown action: {action}")
+
+def format_progress_bar(fraction, width=10):
+    """
+    Memformat fraksi 0-1 sebagai bar progress teks, misalnya '▰▰▰▱▱▱▱▱▱▱ 30%'.
+    """
+    fraction = max(0.0, min(1.0, fraction))
+    filled = int(fraction * width)
+    return f"{'▰' * filled}{'▱' * (width - filled)} {int(fraction * 100)}%"
+
+def create_job_cancel_markup(job):
+    """
+    Membuat tombol Cancel untuk pesan status satu job konversi.
+    
+    Return:
+        InlineKeyboardMarkup: Tombol stopjob_<job_id>
+    """
+    markup = types.InlineKeyboardMarkup()
+    markup.add(types.InlineKeyboardButton('❌ Cancel', callback_data=f"stopjob_{job.job_id}"))
+    return markup
+
+def show_conversion_progress(chat_id, status_msg_id, status_text, markup, fraction):
+    """
+    Menampilkan progress job konversi di pesan status.
+    
+    Parameter:
+        chat_id (int): ID chat Telegram
+        status_msg_id (int): ID pesan status job
+        status_text (str): Teks status awal dari get_conversion_job()
+        markup: Tombol Cancel job yang harus tetap ada
+        fraction (float): Fraksi selesai 0-1
+    
+    Catatan:
+        - Edit diantrikan tanpa menunggu dengan prioritas animasi; edit yang
+          belum terkirim digantikan oleh edit berikutnya untuk pesan yang sama
+    """
+    bot.submit('edit_message_text', f"{status_text}\n\n{format_progress_bar(fraction)}",
+               chat_id, status_msg_id, parse_mode='Markdown', reply_markup=markup,
+               priority=PRIORITY_ANIMATION)
+
+def open_job_output(result, file_name):
+    """
+    Membuka output job terenkripsi sebagai file siap kirim ke Telegram.
+    
+    Parameter:
+        result (dict): Hasil job dari conversion_jobs.run_job()
+        file_name (str): Nama file yang terlihat oleh pengguna
+    
+    Return:
+        File-like object yang didekripsi secara streaming
+    """
+    reader = open_encrypted_reader(result['output_path'])
+    reader.name = file_name
+    return reader
+
+def deliver_conversion_result(job, result, error, chat_id, status_msg_id, action, db_id,
+                              file_path, original_name, original_size, lang='en'):
+    """
+    Mengirim hasil job konversi ke pengguna dan membersihkan file.
+    
+    Parameter:
+        job (ConversionJob): Job yang sudah selesai
+        result (dict): Hasil job, None jika gagal
+        error (Exception): Error job, None jika berhasil
+        chat_id (int): ID chat pengguna
+        status_msg_id (int): ID pesan status yang akan dihapus
+        action (str): Nomor aksi dari callback_data
+        db_id (str): ID file di database
+        file_path (str): Path file terenkripsi milik pengguna
+        original_name (str): Nama file asli
+        original_size (float): Ukuran file asli dalam MB
+        lang (str): Kode bahasa
+    
+    Return:
+        Tidak ada
+    
+    Catatan:
+        - Dipanggil dari thread hasil ConversionExecutor, bukan thread polling
+        - Pesan sukses/gagal per aksi sama dengan versi inline sebelumnya
+        - File asli dan baris database selalu dihapus setelah job selesai
+    """
+    try:
+        if isinstance(error, conversion_jobs.JobCancelled):
+            bot.send_message(chat_id, "❌ Operation cancelled. File deleted for security.")
+        elif isinstance(error, conversion_jobs.JobTimeout):
+            logger.error(f"Conversion job {job.job_id} ({job.job_type}) timed out")
+            send_error_with_restart(chat_id, "⏱️ Processing took too long and was stopped.", lang)
+        elif error is not None:
+            logger.error(f"Conversion job {job.job_id} ({job.job_type}) failed: {str(error)}")
+            if action in ["1", "2", "3"]:
+                target = {"1": "JPG", "2": "PNG", "3": "WebP"}[action]
+                bot.send_message(chat_id, f"❌ {target} conversion failed: {str(error)}")
+            elif action == "4":
+                bot.send_message(chat_id, f"❌ Image compression failed: {str(error)}")
+            elif action == "6":
+                bot.send_message(chat_id, '❌ **Audio extraction failed**\n\nFFmpeg may not be installed or the video has no audio track.', parse_mode='Markdown')
+            elif action == "7":
+                bot.send_message(chat_id, f"❌ ZIP compression failed: {str(error)}")
+            elif action == "8":
+                send_error_with_restart(chat_id, f"❌ PDF to Word conversion failed. {LANG[lang]['try_again']}", lang)
+            elif action == "9":
+                send_error_with_restart(chat_id, LANG[lang]['pdf_conversion_failed'], lang)
+            elif action in ["10", "11"]:
+                media = "Video" if action == "10" else "Audio"
+                bot.send_message(chat_id, f"❌ {media} conversion failed. FFmpeg may not be installed.")
+            else:
+                send_error_with_restart(chat_id, LANG[lang]['error_processing'], lang)
+        else:
+            converted_size = result['output_size'] / (1024 * 1024) if result.get('output_path') else original_size
+            ratio = calculate_compression_ratio(original_size, converted_size)
+            
+            if action in ["1", "2", "3"]:
+                extension, target = {"1": ("jpg", "JPG"), "2": ("png", "PNG"), "3": ("webp", "WebP")}[action]
+                with open_job_output(result, f"converted.{extension}") as output:
+                    bot.send_document(chat_id, output, visible_file_name=f"converted.{extension}")
+                bot.send_message(chat_id, f'✅ **{target} conversion complete!**\n\n📄 File size: {converted_size:.1f} MB', parse_mode='Markdown')
+            
+            elif action == "4":
+                with open_job_output(result, "compressed.jpg") as output:
+                    bot.send_document(chat_id, output, visible_file_name="compressed.jpg")
+                
+                # Show appropriate message based on compression ratio
+                if ratio < 0.1:  # Less than 10% compression
+                    bot.send_message(chat_id, f'ℹ️ **Image already optimized**\n\nOriginal: {original_size:.1f} MB\nCompressed: {converted_size:.1f} MB\n\nThis image is already well-optimized!', parse_mode='Markdown')
+                else:
+                    savings = ((original_size - converted_size) / original_size) * 100
+                    bot.send_message(chat_id, f'✅ **Image compressed successfully!**\n\n📉 {original_size:.1f} MB → {converted_size:.1f} MB\n💾 Space saved: {savings:.1f}%', parse_mode='Markdown')
+            
+            elif action == "5":
+                for error in result.get('errors', []):
+                    logger.warning(f"PDF compression engine failed for chat {chat_id}: {error}")
+                if result['engine'] == 'original':
+                    # Nothing came out smaller (or every engine failed), return the original file
+                    bot.send_message(chat_id, LANG[lang]['already_optimized'])
+                    with open_encrypted_reader(file_path) as output:
+                        bot.send_document(chat_id, output, visible_file_name="compressed.pdf")
+                else:
+                    if ratio < 0.1:  # Less than 10% compression
+                        bot.send_message(chat_id, LANG[lang]['already_optimized'])
+                    else:
+                        bot.send_message(chat_id, LANG[lang]['compression_result'].format(original_size, converted_size))
+                    with open_job_output(result, "compressed.pdf") as output:
+                        bot.send_document(chat_id, output, visible_file_name="compressed.pdf")
+                    bot.send_message(chat_id, LANG[lang]['files_deleted'])
+            
+            elif action == "6":
+                with open_job_output(result, "audio.mp3") as output:
+                    bot.send_audio(chat_id, output)
+                bot.send_message(chat_id, f'✅ **Audio extracted successfully!**\n\n📄 File size: {converted_size:.1f} MB', parse_mode='Markdown')
+            
+            elif action == "7":
+                with open_job_output(result, "compressed.zip") as output:
+                    bot.send_document(chat_id, output, visible_file_name="compressed.zip")
+                
+                if ratio < 0.1:  # Less than 10% compression
+                    bot.send_message(chat_id, f'ℹ️ **File already compressed**\n\nOriginal: {original_size:.1f} MB\nZIP: {converted_size:.1f} MB\n\nThis file type doesn\'t compress much further.', parse_mode='Markdown')
+                else:
+                    savings = ((original_size - converted_size) / original_size) * 100
+                    bot.send_message(chat_id, f'✅ **ZIP created successfully!**\n\n📉 {original_size:.1f} MB → {converted_size:.1f} MB\n💾 Space saved: {savings:.1f}%', parse_mode='Markdown')
+            
+            elif action == "8":
+                with open_job_output(result, "converted.docx") as output:
+                    bot.send_document(chat_id, output, visible_file_name="converted.docx")
+                if result.get('enhanced') and result.get('fallback_pages'):
+                    bot.send_message(chat_id, f"✅ PDF converted to Word using enhanced conversion engine\n\n"
+                                              f"ℹ️ {result['fallback_pages']} page(s) were converted as text only to finish in time")
+                elif result.get('enhanced'):
+                    bot.send_message(chat_id, "✅ PDF converted to Word using enhanced conversion engine")
+                else:
+                    bot.send_message(chat_id, "✅ PDF converted to Word (basic conversion)")
+                bot.send_message(chat_id, LANG[lang]['files_deleted'])
+            
+            elif action == "9":
+                filename = original_name.rsplit('.', 1)[0] + '.pdf'
+                with open_job_output(result, filename) as output:
+                    bot.send_document(chat_id, output, visible_file_name=filename)
+                bot.send_message(chat_id, LANG[lang]['pdf_conversion_success'])
+                bot.send_message(chat_id, LANG[lang]['file_ready'])
+                bot.send_message(chat_id, f"📄 PDF created ({converted_size:.1f} MB)")
+                bot.send_message(chat_id, LANG[lang]['files_deleted'])
+            
+            elif action == "10":
+                with open_job_output(result, "converted.mp4") as output:
+                    bot.send_document(chat_id, output, visible_file_name="converted.mp4")
+                bot.send_message(chat_id, f'✅ **MP4 conversion complete!**\n\n📄 File size: {converted_size:.1f} MB', parse_mode='Markdown')
+            
+            elif action == "11":
+                with open_job_output(result, "converted.mp3") as output:
+                    bot.send_audio(chat_id, output, title="Converted Audio")
+                bot.send_message(chat_id, f'✅ **MP3 conversion complete!**\n\n📄 File size: {converted_size:.1f} MB', parse_mode='Markdown')
+    except Exception as e:
+        logger.error(f"Failed to deliver conversion result for job {job.job_id}: {str(e)}", exc_info=True)
+        send_error_with_restart(chat_id, LANG[lang]['oops_error'], lang)
+    
+    # Clean up original file after processing
+    try:
+        file_repo.delete(db_id)
+        
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            logger.info(f"Original file deleted after processing: {file_path}")
+    except Exception as e:
+        logger.error(f"Failed to delete original file {file_path}: {str(e)}")
+    
+    if isinstance(error, conversion_jobs.JobCancelled):
         try:
-            if 'file_path' in locals():
-                cleanup_failed_file(file_path)
-        except:
-            pass
-            
-        # Send user-friendly error message with restart button
-        send_error_with_restart(message.chat.id, LANG[lang]['error_upload'], lang)
+            bot.delete_message(chat_id, status_msg_id)
+        except Exception as delete_error:
+            logger.debug(f"Could not delete status message: {str(delete_error)}")
+        return
+    
+    # Update status message to cleaning
+    try:
+        bot.edit_message_text(LANG[lang]['cleaning'], chat_id, status_msg_id)
+    except:
+        pass
+    
+    try:
+        # Send completion message with Yes/No buttons
+        markup = types.InlineKeyboardMarkup()
+        markup.add(
+            types.InlineKeyboardButton(LANG[lang]['yes_more'], callback_data="yes_more"),
+            types.InlineKeyboardButton(LANG[lang]['no_thanks'], callback_data="no_thanks")
+        )
+        
+        bot.send_message(chat_id, LANG[lang]['complete'])
+        bot.send_message(chat_id, LANG[lang]['help_more'], reply_markup=markup)
+    except Exception as e:
+        logger.error(f"Failed to send completion message: {str(e)}")
+    
+    # Delete status message
+    try:
+        bot.delete_message(chat_id, status_msg_id)
+    except Exception as delete_error:
+        logger.debug(f"Could not delete status message: {str(delete_error)}")
 
 @bot.callback_query_handler(func=lambda call: True)
 def callback_handler(call):
@@ -2426,14 +4016,14 @@ def callback_handler(call):
         - Memproses berbagai aksi: konversi, kompresi, PDF merge, dll.
         - Melakukan validasi dan security check
         - Mengupdate aktivitas pengguna
-        - Menangani file processing dengan status update
-        - Membersihkan file temporary dan original setelah processing
-        - Menampilkan hasil dengan opsi untuk processing lebih lanjut
+        - Mengirim konversi berat ke ConversionExecutor (proses terpisah)
+          dan langsung kembali, dengan tombol cancel di pesan status
+        - Hasil, cleanup file, dan opsi processing lebih lanjut ditangani
+          oleh deliver_conversion_result()
         - Menangani error dengan cleanup yang aman
     """
     user_id = call.from_user.id
     username = call.from_user.username or 'Unknown'
-    temp_files = []  # Track temporary files for cleanup
     
     try:
         logger.info(f"User {user_id} ({username}) clicked: {call.data}")
@@ -2451,6 +4041,16 @@ def callback_handler(call):
             if user_id in pdf_merge_sessions:
                 clear_pdf_merge_session(user_id)
             
+            # Clear any album image batch that is still waiting for an operation
+            clear_image_batch_session(user_id)
+            
+            # Clear any multi-file ZIP session that is still collecting
+            clear_zip_session(user_id)
+            
+            # Stop conversions the user is walking away from
+            if conversion_executor:
+                conversion_executor.cancel_owner(user_id)
+            
             # Clear any existing sessions to prevent duplication
             if user_id in active_sessions:
                 try:
@@ -2529,7 +4129,7 @@ def callback_handler(call):
             markup = types.InlineKeyboardMarkup()
             markup.add(types.InlineKeyboardButton('🔙 Back to Main Menu', callback_data="back_to_start"))
             
-            bot.edit_message_text('📦 **ZIP Archive Creation**\n\nSend me any file to create a compressed ZIP archive.\n\n• Universal file compression\n• Maximum compression level\n• Works with any file type\n• Easy to share and store\n\n📁 **Ready for your file!**', call.message.chat.id, call.message.message_id, parse_mode='Markdown', reply_markup=markup)
+            bot.edit_message_text('📦 **ZIP Archive Creation**\n\nSend me one or more files to pack them into one compressed ZIP archive.\n\n• Universal file compression\n• Up to 20 files per archive\n• Works with any file type\n• Easy to share and store\n\n📁 **Ready for your file!**', call.message.chat.id, call.message.message_id, parse_mode='Markdown', reply_markup=markup)
             bot.answer_callback_query(call.id)
             return
         
@@ -2576,7 +4176,7 @@ def callback_handler(call):
                 bot.answer_callback_query(call.id, "PDF merger not available")
                 return
                 
-            db_id = call.data.split('_')[2]
+            db_id = int(call.data.split('_')[2])
             # Start PDF merge session
             create_pdf_merge_session(user_id, call.message.chat.id, lang)
             add_pdf_to_merge_session(user_id, db_id)
@@ -2642,14 +4242,16 @@ def callback_handler(call):
             
             status_msg = bot.send_message(call.message.chat.id, f"🔄 **Merging {len(session['pdfs'])} PDFs...**\n\nPlease wait while I combine your files.", parse_mode='Markdown')
             
-            merged_data, error = merge_pdfs(user_id, lang)
-            if merged_data:
-                # Send merged PDF
-                output = BytesIO(merged_data)
-                bot.send_document(call.message.chat.id, output, visible_file_name="merged.pdf")
+            merged_path, error = merge_pdfs(user_id, lang)
+            if merged_path:
+                # Send merged PDF straight from the encrypted temp file
+                try:
+                    file_size_mb = get_stored_file_size(merged_path) / (1024 * 1024)
+                    with open_encrypted_reader(merged_path) as output:
+                        bot.send_document(call.message.chat.id, output, visible_file_name="merged.pdf")
+                finally:
+                    cleanup_failed_file(merged_path)
                 
-                # Calculate file size
-                file_size_mb = get_file_size_mb(merged_data)
                 bot.send_message(call.message.chat.id, f"✅ **PDFs merged successfully!**\n\n📄 Final file size: {file_size_mb:.1f} MB\n🔒 Original files deleted for security.", parse_mode='Markdown')
                 
                 # Clean up
@@ -2734,24 +4336,17 @@ def callback_handler(call):
             if session and 0 <= index < len(session['pdfs']):
                 # Get filename for confirmation
                 pdf_id = session['pdfs'][index]
-                conn = sqlite3.connect('files.db')
-                cursor = conn.execute('SELECT file_name FROM files WHERE id = ?', (pdf_id,))
-                result = cursor.fetchone()
-                filename = result[0] if result else "Unknown file"
-                conn.close()
+                info = session['pdf_info'].pop(pdf_id, None)
+                release_merge_pdf_info(info)
+                filename = info['name'] if info else "Unknown file"
                 
                 # Remove PDF from session and clean up file
                 session['pdfs'].pop(index)
                 
                 try:
-                    conn = sqlite3.connect('files.db')
-                    cursor = conn.execute('SELECT file_path FROM files WHERE id = ?', (pdf_id,))
-                    result = cursor.fetchone()
-                    if result:
-                        cleanup_failed_file(result[0])
-                        conn.execute('DELETE FROM files WHERE id = ?', (pdf_id,))
-                        conn.commit()
-                    conn.close()
+                    removed_path = file_repo.pop(pdf_id)
+                    if removed_path:
+                        cleanup_failed_file(removed_path)
                 except Exception as e:
                     logger.error(f"Error removing PDF {pdf_id}: {str(e)}")
                 
@@ -2783,6 +4378,37 @@ def callback_handler(call):
             bot.answer_callback_query(call.id)
             return
         
+        # Handle album image batches
+        if call.data == "batch_cancel":
+            clear_image_batch_session(user_id)
+            bot.edit_message_text("❌ Operation cancelled. File deleted for security.",
+                                call.message.chat.id, call.message.message_id)
+            bot.answer_callback_query(call.id, "Cancelled")
+            return
+        if call.data.startswith("batch_"):
+            start_image_batch(call, user_id, call.data.split('_', 1)[1], lang)
+            return
+        
+        # Handle multi-file ZIP sessions
+        if call.data == "zipbundle_cancel":
+            clear_zip_session(user_id)
+            bot.edit_message_text("❌ Operation cancelled. File deleted for security.",
+                                call.message.chat.id, call.message.message_id)
+            bot.answer_callback_query(call.id, "Cancelled")
+            return
+        if call.data == "zipbundle_create":
+            start_zip_bundle(call, user_id, lang)
+            return
+        
+        # Handle cancellation of a running conversion job
+        if call.data.startswith("stopjob_"):
+            job_id = call.data.split('_', 1)[1]
+            if conversion_executor and conversion_executor.cancel(job_id):
+                bot.answer_callback_query(call.id, "Cancelling...")
+            else:
+                bot.answer_callback_query(call.id, "❌ Nothing to cancel")
+            return
+        
         # Handle document conversion callbacks
         if call.data.startswith("convert_pdf_"):
             db_id = call.data.split('_')[2]
@@ -2843,6 +4469,7 @@ def callback_handler(call):
             # Clear any PDF merge sessions
             if user_id in pdf_merge_sessions:
                 clear_pdf_merge_session(user_id)
+            clear_zip_session(user_id)
             
             markup = types.InlineKeyboardMarkup()
             markup.add(types.InlineKeyboardButton('📄 PDF Tools', callback_data="service_pdf"))
@@ -2867,16 +4494,13 @@ def callback_handler(call):
         # Handle cancel action
         if call.data.startswith("cancel_"):
             db_id = call.data.split('_')[1]
+            # Stop conversions of this file before deleting it
+            if conversion_executor:
+                conversion_executor.cancel_file(db_id)
             # Clean up file
-            conn = sqlite3.connect('files.db')
-            cursor = conn.execute('SELECT file_path FROM files WHERE id = ?', (db_id,))
-            result = cursor.fetchone()
-            if result:
-                file_path = result[0]
+            file_path = file_repo.pop(db_id)
+            if file_path:
                 cleanup_failed_file(file_path)
-                conn.execute('DELETE FROM files WHERE id = ?', (db_id,))
-                conn.commit()
-            conn.close()
             
             bot.edit_message_text("❌ Operation cancelled. File deleted for security.", 
                                 call.message.chat.id, call.message.message_id)
@@ -2889,10 +4513,7 @@ def callback_handler(call):
             bot.answer_callback_query(call.id, "❌ Invalid action format!")
             return
         
-        conn = sqlite3.connect('files.db')
-        cursor = conn.execute('SELECT file_path, file_name FROM files WHERE id = ?', (db_id,))
-        result = cursor.fetchone()
-        conn.close()
+        result = file_repo.get(db_id)
         
         if not result:
             bot.answer_callback_query(call.id, "❌ File not found!")
@@ -2903,22 +4524,18 @@ def callback_handler(call):
         # Show processing status
         status_msg = bot.send_message(call.message.chat.id, LANG[lang]['compressing'])
         
-        # Read and decrypt the file
+        # Get original file size for compression ratio calculation (no decryption needed)
         try:
-            with open(file_path, 'rb') as f:
-                encrypted_data = f.read()
+            original_size = get_stored_file_size(file_path) / (1024 * 1024)
             
             # Check if file is empty
-            if not encrypted_data:
+            if original_size == 0:
                 raise ValueError("File is empty")
-                
-            file_data = decrypt_file(encrypted_data)
-            
-            # Get original file size for compression ratio calculation
-            original_size = get_file_size_mb(file_data)
-            
+            if conversion_executor is None:
+                raise RuntimeError("Conversion workers require AES storage")
+            job_type, job_params, status_text = get_conversion_job(action, file_path, original_name, lang)
         except Exception as e:
-            logger.error(f"Failed to read or decrypt file {file_path}: {str(e)}")
+            logger.error(f"Failed to prepare file {file_path}: {str(e)}")
             
             # Clean up the corrupted file
             cleanup_failed_file(file_path)
@@ -2928,719 +4545,37 @@ def callback_handler(call):
             bot.answer_callback_query(call.id, "File processing error")
             return
         
-        if action == "1":
-            try:
-                bot.edit_message_text('🔄 **Converting to JPG...**\n\nProcessing your image...', call.message.chat.id, status_msg.message_id, parse_mode='Markdown')
-                
-                img_io = BytesIO(file_data)
-                with Image.open(img_io) as img:
-                    # Handle different image modes properly
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        # Create white background for transparency
-                        background = Image.new('RGB', img.size, (255, 255, 255))
-                        if img.mode == 'P':
-                            img = img.convert('RGBA')
-                        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                        img = background
-                    elif img.mode != 'RGB':
-                        img = img.convert('RGB')
-                    
-                    output = BytesIO()
-                    img.save(output, format='JPEG', quality=95, optimize=True)
-                    output.seek(0)
-                    
-                    converted_size = get_file_size_mb(output.getvalue())
-                    bot.send_document(call.message.chat.id, output, visible_file_name="converted.jpg")
-                    bot.send_message(call.message.chat.id, f'✅ **JPG conversion complete!**\n\n📄 File size: {converted_size:.1f} MB', parse_mode='Markdown')
-            except Exception as e:
-                logger.error(f"JPG conversion error: {str(e)}")
-                bot.send_message(call.message.chat.id, f"❌ JPG conversion failed: {str(e)}")
-        
-        elif action == "2":
-            try:
-                bot.edit_message_text('🔄 **Converting to PNG...**\n\nProcessing your image...', call.message.chat.id, status_msg.message_id, parse_mode='Markdown')
-                
-                img_io = BytesIO(file_data)
-                with Image.open(img_io) as img:
-                    # Ensure proper PNG format
-                    if img.mode not in ('RGBA', 'RGB', 'L', 'P'):
-                        img = img.convert('RGBA')
-                    
-                    output = BytesIO()
-                    img.save(output, format='PNG', optimize=True)
-                    output.seek(0)
-                    
-                    converted_size = get_file_size_mb(output.getvalue())
-                    bot.send_document(call.message.chat.id, output, visible_file_name="converted.png")
-                    bot.send_message(call.message.chat.id, f'✅ **PNG conversion complete!**\n\n📄 File size: {converted_size:.1f} MB', parse_mode='Markdown')
-            except Exception as e:
-                logger.error(f"PNG conversion error: {str(e)}")
-                bot.send_message(call.message.chat.id, f"❌ PNG conversion failed: {str(e)}")
-        
-        elif action == "3":
-            try:
-                bot.edit_message_text('🔄 **Converting to WebP...**\n\nProcessing your image...', call.message.chat.id, status_msg.message_id, parse_mode='Markdown')
-                
-                img_io = BytesIO(file_data)
-                with Image.open(img_io) as img:
-                    # WebP supports both RGB and RGBA
-                    if img.mode not in ('RGB', 'RGBA'):
-                        img = img.convert('RGB')
-                    
-                    output = BytesIO()
-                    img.save(output, format='WEBP', quality=95, method=6)
-                    output.seek(0)
-                    
-                    converted_size = get_file_size_mb(output.getvalue())
-                    bot.send_document(call.message.chat.id, output, visible_file_name="converted.webp")
-                    bot.send_message(call.message.chat.id, f'✅ **WebP conversion complete!**\n\n📄 File size: {converted_size:.1f} MB', parse_mode='Markdown')
-            except Exception as e:
-                logger.error(f"WebP conversion error: {str(e)}")
-                bot.send_message(call.message.chat.id, f"❌ WebP conversion failed: {str(e)}")
-        
-        elif action == "4":
-            try:
-                bot.edit_message_text('🗜️ **Compressing image...**\n\nOptimizing file size...', call.message.chat.id, status_msg.message_id, parse_mode='Markdown')
-                
-                img_io = BytesIO(file_data)
-                with Image.open(img_io) as img:
-                    # Handle transparency properly
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        background = Image.new('RGB', img.size, (255, 255, 255))
-                        if img.mode == 'P':
-                            img = img.convert('RGBA')
-                        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                        img = background
-                    elif img.mode != 'RGB':
-                        img = img.convert('RGB')
-                    
-                    width, height = img.size
-                    
-                    # Smart compression based on image size
-                    if width * height > 2000000:  # Large image (>2MP)
-                        # Aggressive compression for large images
-                        new_size = (int(width * 0.5), int(height * 0.5))
-                        quality = 60
-                    elif width * height > 500000:  # Medium image (>0.5MP)
-                        # Moderate compression
-                        new_size = (int(width * 0.7), int(height * 0.7))
-                        quality = 70
-                    else:
-                        # Light compression for small images
-                        new_size = (int(width * 0.8), int(height * 0.8))
-                        quality = 80
-                    
-                    # Resize image
-                    img_resized = img.resize(new_size, Image.Resampling.LANCZOS)
-                    
-                    output = BytesIO()
-                    img_resized.save(output, format='JPEG', quality=quality, optimize=True)
-                    output.seek(0)
-                    
-                    # Calculate compression ratio
-                    compressed_size = get_file_size_mb(output.getvalue())
-                    ratio = calculate_compression_ratio(original_size, compressed_size)
-                    
-                    # If still not compressed enough, try more aggressive settings
-                    if ratio < MIN_COMPRESSION_TARGET and original_size > 1.0:  # Only for files > 1MB
-                        output = BytesIO()
-                        more_aggressive_size = (int(width * 0.4), int(height * 0.4))
-                        img_more_compressed = img.resize(more_aggressive_size, Image.Resampling.LANCZOS)
-                        img_more_compressed.save(output, format='JPEG', quality=50, optimize=True)
-                        output.seek(0)
-                        
-                        # Recalculate compression ratio
-                        new_compressed_size = get_file_size_mb(output.getvalue())
-                        new_ratio = calculate_compression_ratio(original_size, new_compressed_size)
-                        
-                        # Use the better compression if it's significantly better
-                        if new_ratio > ratio * 1.2:  # At least 20% better
-                            compressed_size = new_compressed_size
-                            ratio = new_ratio
-                        else:
-                            # Revert to previous compression
-                            output = BytesIO()
-                            img_resized.save(output, format='JPEG', quality=quality, optimize=True)
-                            output.seek(0)
-                    
-                    # Send the compressed file
-                    bot.send_document(call.message.chat.id, output, visible_file_name="compressed.jpg")
-                    
-                    # Show appropriate message based on compression ratio
-                    if ratio < 0.1:  # Less than 10% compression
-                        bot.send_message(call.message.chat.id, f'ℹ️ **Image already optimized**\n\nOriginal: {original_size:.1f} MB\nCompressed: {compressed_size:.1f} MB\n\nThis image is already well-optimized!', parse_mode='Markdown')
-                    else:
-                        # Show compression result with file sizes
-                        savings = ((original_size - compressed_size) / original_size) * 100
-                        bot.send_message(call.message.chat.id, f'✅ **Image compressed successfully!**\n\n📉 {original_size:.1f} MB → {compressed_size:.1f} MB\n💾 Space saved: {savings:.1f}%', parse_mode='Markdown')
-                    
-            except Exception as e:
-                logger.error(f"Image compression error: {str(e)}")
-                bot.send_message(call.message.chat.id, f"❌ Image compression failed: {str(e)}")
-        
-        elif action == "5":
-            try:
-                import fitz  # PyMuPDF
-                pdf_io = BytesIO(file_data)
-                doc = fitz.open(stream=pdf_io, filetype="pdf")
-                output = BytesIO()
-                
-                new_doc = fitz.open()
-                
-                # More aggressive compression settings
-                compression_matrix = fitz.Matrix(0.25, 0.25)  # 25% of original size
-                jpg_quality = 10  # Lower quality for better compression
-                
-                for page_num in range(len(doc)):
-                    page = doc[page_num]
-                    pix = page.get_pixmap(matrix=compression_matrix)
-                    img_data = pix.tobytes("jpeg", jpg_quality=jpg_quality)
-                    
-                    new_page = new_doc.new_page(width=page.rect.width, height=page.rect.height)
-                    new_page.insert_image(new_page.rect, stream=img_data)
-                
-                # Use maximum compression settings
-                new_doc.save(output, garbage=4, deflate=True, clean=True, linear=True)
-                new_doc.close()
-                doc.close()
-                output.seek(0)
-                
-                # Calculate compression ratio
-                compressed_size = get_file_size_mb(output.getvalue())
-                ratio = calculate_compression_ratio(original_size, compressed_size)
-                
-                # Check if we need better compression
-                doc_pages = len(doc) if 'doc' in locals() else 1
-                if ratio < MIN_COMPRESSION_TARGET and doc_pages > 1:
-                    output = BytesIO()
-                    doc = fitz.open(stream=pdf_io, filetype="pdf")
-                    new_doc = fitz.open()
-                    
-                    # More balanced settings to maintain readability
-                    compression_matrix = fitz.Matrix(0.3, 0.3)  # 30% of original size for better readability
-                    jpg_quality = 20  # Better quality for readability
-                    
-                    for page_num in range(len(doc)):
-                        page = doc[page_num]
-                        pix = page.get_pixmap(matrix=compression_matrix)
-                        img_data = pix.tobytes("jpeg", jpg_quality=jpg_quality)
-                        
-                        new_page = new_doc.new_page(width=page.rect.width, height=page.rect.height)
-                        new_page.insert_image(new_page.rect, stream=img_data)
-                    
-                    new_doc.save(output, garbage=4, deflate=True, clean=True, linear=True)
-                    new_doc.close()
-                    doc.close()
-                    output.seek(0)
-                    
-                    # Recalculate compression ratio
-                    compressed_size = get_file_size_mb(output.getvalue())
-                    ratio = calculate_compression_ratio(original_size, compressed_size)
-                
-                # Show appropriate message based on compression ratio
-                if ratio < 0.1:  # Less than 10% compression
-                    bot.send_message(call.message.chat.id, LANG[lang]['already_optimized'])
-                else:
-                    # Show compression result with file sizes
-                    bot.send_message(call.message.chat.id, 
-                                    LANG[lang]['compression_result'].format(original_size, compressed_size))
-                
-                # Send the compressed file
-                bot.send_document(call.message.chat.id, output, visible_file_name="compressed.pdf")
-                
-                # Confirm file deletion for security
-                bot.send_message(call.message.chat.id, LANG[lang]['files_deleted'])
-            except Exception as fitz_error:
-                logger.warning(f"PyMuPDF compression failed: {str(fitz_error)}")
-                try:
-                    temp_pdf = f"temp/temp_{db_id}_{int(time.time())}.pdf"
-                    temp_files.append(temp_pdf)  # Track for cleanup
-                    with open(temp_pdf, 'wb') as f:
-                        f.write(file_data)
-                    compressed_path = f"temp/compressed_{db_id}_{int(time.time())}.pdf"
-                    temp_files.append(compressed_path)  # Track for cleanup
-                    # Use more aggressive compression settings
-                    subprocess.run(['gs', '-sDEVICE=pdfwrite', '-dPDFSETTINGS=/screen', 
-                                  '-dDownsampleColorImages=true', '-dColorImageResolution=72',
-                                  '-dCompatibilityLevel=1.4', '-dEmbedAllFonts=false',
-                                  '-dSubsetFonts=true', '-dNOPAUSE', '-dQUIET', '-dBATCH', 
-                                  f'-sOutputFile={compressed_path}', temp_pdf], 
-                                 check=True, capture_output=True)
-                    with open(compressed_path, 'rb') as f:
-                        compressed_data = f.read()
-                    
-                    # Calculate compression ratio
-                    compressed_size = get_file_size_mb(compressed_data)
-                    ratio = calculate_compression_ratio(original_size, compressed_size)
-                    
-                    # If compression target not met but still preserving readability
-                    if ratio < MIN_COMPRESSION_TARGET:
-                        # Try with more balanced settings
-                        more_compressed_path = f"temp/more_compressed_{db_id}_{int(time.time())}.pdf"
-                        temp_files.append(more_compressed_path)
-                        
-                        # Use more balanced settings to maintain readability
-                        subprocess.run(['gs', '-sDEVICE=pdfwrite', '-dPDFSETTINGS=/ebook', 
-                                      '-dDownsampleColorImages=true', '-dColorImageResolution=150',
-                                      '-dDownsampleGrayImages=true', '-dGrayImageResolution=150',
-                                      '-dDownsampleMonoImages=true', '-dMonoImageResolution=150',
-                                      '-dCompatibilityLevel=1.5', '-dEmbedAllFonts=true',
-                                      '-dSubsetFonts=true', '-dNOPAUSE', '-dQUIET', '-dBATCH', 
-                                      f'-sOutputFile={more_compressed_path}', temp_pdf], 
-                                     check=True, capture_output=True)
-                        
-                        with open(more_compressed_path, 'rb') as f:
-                            more_compressed_data = f.read()
-                        
-                        more_compressed_size = get_file_size_mb(more_compressed_data)
-                        more_ratio = calculate_compression_ratio(original_size, more_compressed_size)
-                        
-                        # Use the better compression while maintaining readability
-                        if more_ratio > ratio * 0.8:  # Accept if at least 80% as effective
-                            compressed_data = more_compressed_data
-                            compressed_size = more_compressed_size
-                            ratio = more_ratio
-                            os.remove(compressed_path)
-                        else:
-                            os.remove(more_compressed_path)
-                    
-                    # Show appropriate message based on compression ratio
-                    if ratio < 0.1:  # Less than 10% compression
-                        bot.send_message(call.message.chat.id, LANG[lang]['already_optimized'])
-                    else:
-                        # Show compression result with file sizes
-                        bot.send_message(call.message.chat.id, 
-                                        LANG[lang]['compression_result'].format(original_size, compressed_size))
-                    
-                    # Send as BytesIO to avoid file access issues
-                    output = BytesIO(compressed_data)
-                    output.seek(0)
-                    bot.send_document(call.message.chat.id, output, visible_file_name="compressed.pdf")
-                    
-                    # Confirm file deletion for security
-                    bot.send_message(call.message.chat.id, LANG[lang]['files_deleted'])
-                    os.remove(compressed_path)
-                    os.remove(temp_pdf)
-                except Exception as e:
-                    logger.error(f"PDF compression error: {str(e)}")
-                    output = BytesIO(file_data)
-                    output.seek(0)
-                    bot.send_document(call.message.chat.id, output, visible_file_name="compressed.pdf")
-        
-        elif action == "6":
-            try:
-                bot.edit_message_text('🎵 **Extracting audio...**\n\nExtracting MP3 from video...', call.message.chat.id, status_msg.message_id, parse_mode='Markdown')
-                
-                output_path = f"temp/audio_{db_id}_{int(time.time())}.mp3"
-                temp_files.append(output_path)  # Track for cleanup
-                temp_video = f"temp/temp_video_{db_id}_{int(time.time())}"
-                temp_files.append(temp_video)  # Track for cleanup
-                
-                with open(temp_video, 'wb') as f:
-                    f.write(file_data)
-                subprocess.run(['ffmpeg', '-i', temp_video, '-q:a', '0', '-map', 'a', output_path], 
-                             check=True, capture_output=True)
-                
-                with open(output_path, 'rb') as f:
-                    audio_data = f.read()
-                    audio_size = get_file_size_mb(audio_data)
-                    f.seek(0)
-                    bot.send_audio(call.message.chat.id, f)
-                
-                bot.send_message(call.message.chat.id, f'✅ **Audio extracted successfully!**\n\n📄 File size: {audio_size:.1f} MB', parse_mode='Markdown')
-                
-                os.remove(output_path)
-                os.remove(temp_video)
-            except Exception as ffmpeg_error:
-                logger.error(f"FFmpeg audio extraction failed: {str(ffmpeg_error)}")
-                bot.answer_callback_query(call.id, "❌ Audio extraction failed!")
-                bot.send_message(call.message.chat.id, '❌ **Audio extraction failed**\n\nFFmpeg may not be installed or the video has no audio track.', parse_mode='Markdown')
-                return
-        
-        elif action == "7":
-            try:
-                bot.edit_message_text('📦 **Creating ZIP archive...**\n\nCompressing file...', call.message.chat.id, status_msg.message_id, parse_mode='Markdown')
-                
-                output = BytesIO()
-                temp_file = f"temp/temp_zip_{db_id}_{int(time.time())}"
-                temp_files.append(temp_file)  # Track for cleanup
-                with open(temp_file, 'wb') as f:
-                    f.write(file_data)
-                    
-                # Use maximum compression level (9) for better compression
-                with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED, compresslevel=9) as zipf:
-                    zipf.write(temp_file, original_name)
-                os.remove(temp_file)
-                output.seek(0)
-                
-                # Calculate compression ratio
-                compressed_size = get_file_size_mb(output.getvalue())
-                ratio = calculate_compression_ratio(original_size, compressed_size)
-                
-                # Send the compressed file
-                bot.send_document(call.message.chat.id, output, visible_file_name="compressed.zip")
-                
-                # Show appropriate message based on compression ratio
-                if ratio < 0.1:  # Less than 10% compression
-                    bot.send_message(call.message.chat.id, f'ℹ️ **File already compressed**\n\nOriginal: {original_size:.1f} MB\nZIP: {compressed_size:.1f} MB\n\nThis file type doesn\'t compress much further.', parse_mode='Markdown')
-                else:
-                    savings = ((original_size - compressed_size) / original_size) * 100
-                    bot.send_message(call.message.chat.id, f'✅ **ZIP created successfully!**\n\n📉 {original_size:.1f} MB → {compressed_size:.1f} MB\n💾 Space saved: {savings:.1f}%', parse_mode='Markdown')
-            except Exception as e:
-                logger.error(f"ZIP compression error: {str(e)}")
-                bot.send_message(call.message.chat.id, f"❌ ZIP compression failed: {str(e)}")
-        
-        # PDF to Word conversion
-        elif action == "8":
-            try:
-                # Create a secure temporary directory that will be automatically cleaned up
-                temp_dir = tempfile.mkdtemp(prefix="rupaganti_")
-                try:
-                    # Create temp PDF file with unique name - use normalized path
-                    temp_pdf = os.path.normpath(os.path.join(temp_dir, f"temp_{db_id}.pdf"))
-                    with open(temp_pdf, 'wb') as f:
-                        f.write(file_data)
-                    
-                    # Output DOCX path - use normalized path
-                    output_docx = os.path.normpath(os.path.join(temp_dir, f"converted_{db_id}.docx"))
-                    
-                    # Use pdf2docx for better conversion if available
-                    pdf_conversion_success = False
-                    if 'pdf2docx' in globals() or 'Converter' in globals():
-                        try:
-                            # Convert PDF to DOCX using pdf2docx
-                            from pdf2docx import Converter
-                            cv = Converter(temp_pdf)
-                            cv.convert(output_docx, start=0, end=None)
-                            cv.close()
-                            pdf_conversion_success = True
-                        except Exception as pdf_error:
-                            logger.error(f"pdf2docx conversion failed: {str(pdf_error)}")
-                            # Fall back to basic conversion
-                            pdf_conversion_success = False
-                    if not pdf_conversion_success:
-                        # Fallback to basic conversion using python-docx and PyMuPDF
-                        try:
-                            from docx import Document
-                            import fitz
-                            
-                            doc = Document()
-                            with fitz.open(temp_pdf) as pdf_document:
-                                for page_num in range(len(pdf_document)):
-                                    page = pdf_document[page_num]
-                                    # Get text with more formatting options
-                                    text = page.get_text("text")
-                                    if text.strip():  # Only add non-empty text
-                                        doc.add_paragraph(text)
-                                        
-                                    # Try to extract images if text is limited
-                                    if len(text.strip()) < 100:  # Likely image-heavy page
-                                        try:
-                                            # Add a note about possible image content
-                                            doc.add_paragraph("[This page may contain images that couldn't be converted to text]")
-                                        except:
-                                            pass
-                            
-                            doc.save(output_docx)
-                        except Exception as basic_error:
-                            logger.error(f"Basic PDF conversion failed: {str(basic_error)}")
-                            # Create an empty document with error message
-                            try:
-                                from docx import Document
-                                doc = Document()
-                                doc.add_paragraph("Error converting PDF. The file may be encrypted or contain only images.")
-                                doc.save(output_docx)
-                            except Exception:
-                                # If even this fails, create a simple text file
-                                with open(output_docx, 'w') as f:
-                                    f.write("Error converting PDF. The file may be encrypted or contain only images.")
-                    
-                    # Make sure to close all file handles before sending
-                    with open(output_docx, 'rb') as f:
-                        file_content = f.read()
-                    
-                    # Send as BytesIO to avoid file access issues
-                    output = BytesIO(file_content)
-                    output.name = "converted.docx"
-                    bot.send_document(call.message.chat.id, output, visible_file_name="converted.docx")
-                    
-                    # Clean up temporary directory manually
-                finally:
-                    try:
-                        shutil.rmtree(temp_dir)
-                    except Exception as cleanup_error:
-                        logger.error(f"Failed to clean up temp directory: {str(cleanup_error)}")
-                
-                # Send a message about the conversion quality
-                if pdf_conversion_success:
-                    bot.send_message(call.message.chat.id, "✅ PDF converted to Word using enhanced conversion engine")
-                else:
-                    bot.send_message(call.message.chat.id, "✅ PDF converted to Word (basic conversion)")
-                    
-                # Confirm file deletion for security
-                bot.send_message(call.message.chat.id, LANG[lang]['files_deleted'])
-                    
-                # Securely delete the original file immediately
-                if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"Original file deleted after processing: {file_path}")
-                    except Exception as e:
-                        logger.error(f"Failed to delete original file {file_path}: {str(e)}")
-                
-            except Exception as e:
-                logger.error(f"PDF to Word conversion error: {str(e)}")
-                send_error_with_restart(call.message.chat.id, f"❌ PDF to Word conversion failed. {LANG[lang]['try_again']}", lang)
-        
-        # Video to MP4 conversion
-        elif action == "10":
-            try:
-                bot.edit_message_text('🎬 **Converting to MP4...**\n\nThis may take a moment for large videos...', call.message.chat.id, status_msg.message_id, parse_mode='Markdown')
-                
-                temp_input = f"temp/input_{db_id}_{int(time.time())}"
-                temp_output = f"temp/output_{db_id}_{int(time.time())}.mp4"
-                temp_files.extend([temp_input, temp_output])
-                
-                with open(temp_input, 'wb') as f:
-                    f.write(file_data)
-                
-                # Convert to MP4 using ffmpeg
-                subprocess.run(['ffmpeg', '-i', temp_input, '-c:v', 'libx264', '-c:a', 'aac', 
-                               '-preset', 'fast', '-crf', '23', temp_output], 
-                              check=True, capture_output=True)
-                
-                with open(temp_output, 'rb') as f:
-                    converted_data = f.read()
-                
-                converted_size = get_file_size_mb(converted_data)
-                output = BytesIO(converted_data)
-                bot.send_document(call.message.chat.id, output, visible_file_name="converted.mp4")
-                bot.send_message(call.message.chat.id, f'✅ **MP4 conversion complete!**\n\n📄 File size: {converted_size:.1f} MB', parse_mode='Markdown')
-                
-                # Clean up temp files
-                for temp_file in [temp_input, temp_output]:
-                    try:
-                        if os.path.exists(temp_file):
-                            os.remove(temp_file)
-                    except Exception as cleanup_error:
-                        logger.error(f"Failed to cleanup temp file {temp_file}: {str(cleanup_error)}")
-                        
-            except Exception as e:
-                logger.error(f"Video conversion error: {str(e)}")
-                bot.send_message(call.message.chat.id, f"❌ Video conversion failed. FFmpeg may not be installed.")
-        
-        # Audio to MP3 conversion
-        elif action == "11":
-            try:
-                bot.edit_message_text('🎵 **Converting to MP3...**\n\nProcessing audio...', call.message.chat.id, status_msg.message_id, parse_mode='Markdown')
-                
-                temp_input = f"temp/input_{db_id}_{int(time.time())}"
-                temp_output = f"temp/output_{db_id}_{int(time.time())}.mp3"
-                temp_files.extend([temp_input, temp_output])
-                
-                with open(temp_input, 'wb') as f:
-                    f.write(file_data)
-                
-                # Convert to MP3 using ffmpeg
-                subprocess.run(['ffmpeg', '-i', temp_input, '-c:a', 'libmp3lame', 
-                               '-b:a', '192k', temp_output], 
-                              check=True, capture_output=True)
-                
-                with open(temp_output, 'rb') as f:
-                    converted_data = f.read()
-                
-                converted_size = get_file_size_mb(converted_data)
-                output = BytesIO(converted_data)
-                bot.send_audio(call.message.chat.id, output, title="Converted Audio")
-                bot.send_message(call.message.chat.id, f'✅ **MP3 conversion complete!**\n\n📄 File size: {converted_size:.1f} MB', parse_mode='Markdown')
-                
-                # Clean up temp files
-                for temp_file in [temp_input, temp_output]:
-                    try:
-                        if os.path.exists(temp_file):
-                            os.remove(temp_file)
-                    except Exception as cleanup_error:
-                        logger.error(f"Failed to cleanup temp file {temp_file}: {str(cleanup_error)}")
-                        
-            except Exception as e:
-                logger.error(f"Audio conversion error: {str(e)}")
-                bot.send_message(call.message.chat.id, f"❌ Audio conversion failed. FFmpeg may not be installed.")
-        
-        # Word to PDF conversion
-        elif action == "9":
-            try:
-                bot.edit_message_text(LANG[lang]['converting_to_pdf'], call.message.chat.id, status_msg.message_id)
-            except:
-                pass
-                
-            try:
-                temp_dir = tempfile.mkdtemp(prefix="rupaganti_")
-                temp_docx = os.path.join(temp_dir, f"input_{db_id}.docx")
-                output_pdf = os.path.join(temp_dir, f"output_{db_id}.pdf")
-                
-                try:
-                    # Save DOCX file
-                    with open(temp_docx, 'wb') as f:
-                        f.write(file_data)
-                    
-                    conversion_success = False
-                    
-                    # Try docx2pdf first
-                    try:
-                        import importlib.util
-                        if importlib.util.find_spec("docx2pdf"):
-                            from docx2pdf import convert
-                            convert(temp_docx, output_pdf)
-                            if os.path.exists(output_pdf) and os.path.getsize(output_pdf) > 0:
-                                conversion_success = True
-                    except Exception as e:
-                        logger.warning(f"docx2pdf failed: {str(e)}")
-                    
-                    # Fallback to basic conversion for all document types
-                    if not conversion_success:
-                        try:
-                            file_type, ext = get_file_type(original_name)
-                            if ext in ['docx', 'doc']:
-                                from docx import Document
-                                doc = Document(temp_docx)
-                                text_content = [para.text for para in doc.paragraphs if para.text.strip()]
-                            elif ext in ['txt', 'rtf']:
-                                with open(temp_docx, 'r', encoding='utf-8', errors='ignore') as f:
-                                    text_content = f.readlines()
-                            elif ext in ['xlsx', 'xls']:
-                                try:
-                                    import pandas as pd
-                                    df = pd.read_excel(temp_docx)
-                                    text_content = [df.to_string()]
-                                except:
-                                    text_content = ["Excel file content (conversion limited)"]
-                            elif ext in ['pptx', 'ppt']:
-                                try:
-                                    from pptx import Presentation
-                                    prs = Presentation(temp_docx)
-                                    text_content = []
-                                    for slide in prs.slides:
-                                        for shape in slide.shapes:
-                                            if hasattr(shape, "text"):
-                                                text_content.append(shape.text)
-                                except:
-                                    text_content = ["PowerPoint file content (conversion limited)"]
-                            else:
-                                text_content = ["Document content"]
-                            
-                            # Create PDF with extracted content
-                            from reportlab.pdfgen import canvas
-                            from reportlab.lib.pagesizes import letter
-                            
-                            c = canvas.Canvas(output_pdf, pagesize=letter)
-                            width, height = letter
-                            y = height - 50
-                            
-                            for line in text_content:
-                                if line and line.strip():
-                                    text = line.strip()[:80]  # Limit line length
-                                    c.drawString(50, y, text)
-                                    y -= 20
-                                    if y < 50:
-                                        c.showPage()
-                                        y = height - 50
-                            
-                            c.save()
-                            conversion_success = True
-                        except Exception as e:
-                            logger.error(f"Fallback conversion failed: {str(e)}")
-                    
-                    if not conversion_success:
-                        raise Exception("Conversion failed")
-                    
-                    # Send PDF
-                    with open(output_pdf, 'rb') as f:
-                        file_content = f.read()
-                    
-                    output = BytesIO(file_content)
-                    filename = original_name.rsplit('.', 1)[0] + '.pdf'
-                    bot.send_document(call.message.chat.id, output, visible_file_name=filename)
-                    
-                    bot.send_message(call.message.chat.id, LANG[lang]['pdf_conversion_success'])
-                    bot.send_message(call.message.chat.id, LANG[lang]['file_ready'])
-                    
-                    file_size_mb = get_file_size_mb(file_content)
-                    bot.send_message(call.message.chat.id, f"📄 PDF created ({file_size_mb:.1f} MB)")
-                    
-                finally:
-                    try:
-                        shutil.rmtree(temp_dir)
-                    except Exception as cleanup_error:
-                        logger.error(f"Failed to cleanup temp directory: {str(cleanup_error)}")
-                
-                cleanup_failed_file(file_path)
-                bot.send_message(call.message.chat.id, LANG[lang]['files_deleted'])
-                
-            except Exception as e:
-                logger.error(f"Word to PDF error: {str(e)}")
-                cleanup_failed_file(file_path)
-                send_error_with_restart(call.message.chat.id, LANG[lang]['pdf_conversion_failed'], lang)
-        
-        # Clean up original file after processing
-        if action not in ["8", "9"]:
-            try:
-                conn = sqlite3.connect('files.db')
-                conn.execute('DELETE FROM files WHERE id = ?', (db_id,))
-                conn.commit()
-                conn.close()
-                
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logger.info(f"Original file deleted after processing: {file_path}")
-            except Exception as e:
-                logger.error(f"Failed to delete original file {file_path}: {str(e)}")
-        
-        # Update status message to cleaning
-        try:
-            bot.edit_message_text(LANG[lang]['cleaning'], call.message.chat.id, status_msg.message_id)
-        except:
-            pass
-            
-        # Send completion message with Yes/No buttons
-        markup = types.InlineKeyboardMarkup()
-        markup.add(
-            types.InlineKeyboardButton(LANG[lang]['yes_more'], callback_data="yes_more"),
-            types.InlineKeyboardButton(LANG[lang]['no_thanks'], callback_data="no_thanks")
+        # Hand the heavy work to the process pool; the result is delivered
+        # by deliver_conversion_result() without blocking this thread
+        # Keep the sweep away from the input until the job can no longer need it
+        job_timeout = CONVERSION_TIMEOUTS.get(job_type, 0) + CONVERSION_RESULT_GRACE
+        file_repo.set_state(db_id, STATE_PROCESSING, expires_at=datetime.now() + timedelta(seconds=job_timeout))
+        job = conversion_executor.submit(
+            job_type, job_params, owner=user_id, db_id=db_id,
+            on_done=lambda job, result, error: deliver_conversion_result(
+                job, result, error, call.message.chat.id, status_msg.message_id,
+                action, db_id, file_path, original_name, original_size, lang),
+            on_progress=lambda job, fraction: show_conversion_progress(
+                call.message.chat.id, status_msg.message_id, status_text, create_job_cancel_markup(job), fraction)
         )
-        
-        bot.send_message(call.message.chat.id, LANG[lang]['complete'])
-        bot.send_message(call.message.chat.id, LANG[lang]['help_more'], reply_markup=markup)
-        bot.answer_callback_query(call.id, LANG[lang]['done'])
-        
-        # Delete status message
+        markup = create_job_cancel_markup(job)
         try:
-            if 'status_msg' in locals():
-                bot.delete_message(call.message.chat.id, status_msg.message_id)
-        except Exception as delete_error:
-            logger.debug(f"Could not delete status message: {str(delete_error)}")
+            bot.edit_message_text(status_text, call.message.chat.id, status_msg.message_id, parse_mode='Markdown', reply_markup=markup)
+        except Exception as edit_error:
+            logger.debug(f"Could not update status message: {str(edit_error)}")
+        
+        bot.answer_callback_query(call.id)
         
     except Exception as e:
         logger.error(f"Callback handler error for user {user_id}: {str(e)}", exc_info=True)
         logger.error(f"Error details: {type(e).__name__}: {str(e)}")
         
-        # Clean up any temporary files that might have been created
-        for temp_file in temp_files:
-            try:
-                if temp_file and os.path.exists(temp_file):
-                    os.remove(temp_file)
-                    logger.info(f"Cleaned up temp file after error: {temp_file}")
-            except Exception as cleanup_error:
-                logger.error(f"Failed to clean up temp file {temp_file}: {str(cleanup_error)}")
-        
         # Clean up original file if it exists
         try:
             if 'file_path' in locals() and file_path:
                 cleanup_failed_file(file_path)
                 if 'db_id' in locals():
-                    conn = sqlite3.connect('files.db')
-                    conn.execute('DELETE FROM files WHERE id = ?', (db_id,))
-                    conn.commit()
-                    conn.close()
+                    file_repo.delete(db_id)
         except Exception as cleanup_error:
             logger.error(f"Failed to cleanup after error: {str(cleanup_error)}")
                 
@@ -3652,6 +4587,141 @@ def callback_handler(call):
             logger.error(f"Failed to send error message: {str(error_send_error)}")
 
 
+class AsyncBotBridge:
+    """
+    Pengganti objek bot global saat mode asyncio aktif.
+    
+    Parameter:
+        runtime (AsyncRuntime): Runtime pemilik AsyncTeleBot dan event loop
+        handler_bot (TeleBot): Bot sync yang menyimpan semua handler
+    
+    Catatan:
+        - Method API Telegram (send_message, edit_message_text, ...) dijalankan
+          sebagai coroutine AsyncTeleBot di event loop; thread pemanggil
+          menunggu hasilnya sehingga kode handler yang ada tidak berubah
+        - Atribut lain (decorator handler, dll.) diteruskan ke handler_bot
+    """
+    
+    def __init__(self, runtime, handler_bot):
+        self._runtime = runtime
+        self._handler_bot = handler_bot
+    
+    def __getattr__(self, name):
+        method = getattr(self._runtime.async_bot, name, None)
+        if method is None or not asyncio.iscoroutinefunction(method):
+            return getattr(self._handler_bot, name)
+        
+        def call_api(*args, **kwargs):
+            return self._runtime.call(method(*args, **kwargs))
+        return call_api
+
+class AsyncRuntime:
+    """
+    Runtime asyncio: polling, timer, dan cleanup dalam satu event loop.
+    
+    Parameter:
+        handler_bot (TeleBot): Bot sync yang menyimpan semua handler
+    
+    Catatan:
+        - Update diambil dengan AsyncTeleBot.get_updates() (aiohttp)
+        - Setiap update diproses handler sync di handler pool berukuran tetap,
+          sehingga jumlah thread tidak bertambah seiring jumlah pengguna
+        - timer_wheel dimajukan dari event loop, callback-nya dijalankan
+          di handler pool
+        - Cleanup berkala berjalan sebagai coroutine, pekerjaan blocking-nya
+          dijalankan di executor
+        - Konversi berat tetap di ConversionExecutor (pool proses)
+    """
+    
+    def __init__(self, handler_bot):
+        self.handler_bot = handler_bot
+        self.async_bot = None
+        self.loop = None
+        self._loop_thread = None
+        self._pending = set()
+        self.handler_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=ASYNC_HANDLER_WORKERS, thread_name_prefix='handler')
+    
+    def call(self, coro):
+        """
+        Menjalankan coroutine di event loop dari thread lain dan menunggu hasilnya.
+        """
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError("Blocking bot call made on the event loop thread")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+    
+    async def _periodic(self, interval, task, name):
+        while True:
+            try:
+                await self.loop.run_in_executor(None, task)
+            except Exception as e:
+                logger.error(f"{name} error: {str(e)}")
+            await asyncio.sleep(interval)
+    
+    async def _drive_timers(self):
+        # The event loop replaces the timer wheel's own thread
+        while True:
+            timer_wheel.advance()
+            await asyncio.sleep(timer_wheel.tick)
+    
+    async def _dispatch(self, updates):
+        try:
+            await self.loop.run_in_executor(self.handler_pool, self.handler_bot.process_new_updates, updates)
+        except Exception as e:
+            logger.error(f"Update handler error: {str(e)}", exc_info=True)
+    
+    async def run(self, polling_timeout=20):
+        """
+        Menjalankan bot sampai dihentikan.
+        
+        Parameter:
+            polling_timeout (int): Timeout long polling getUpdates dalam detik
+        """
+        global async_runtime
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread = threading.current_thread()
+        self.async_bot = AsyncTeleBot(BOT_TOKEN)
+        
+        # Existing code keeps calling the global bot; its scheduler now
+        # sends through the event loop
+        bot.transport = AsyncBotBridge(self, self.handler_bot)
+        async_runtime = self
+        
+        timer_wheel.executor = self.handler_pool
+        background = [
+            asyncio.create_task(self._drive_timers()),
+            asyncio.create_task(self._periodic(180, cleanup_files_once, "Cleanup")),
+            asyncio.create_task(self._periodic(60, cleanup_inactive_users_once, "Inactive user cleanup")),
+            asyncio.create_task(self._periodic(60, cleanup_expired_merge_sessions, "Merge session cleanup")),
+        ]
+        
+        offset = None
+        try:
+            while True:
+                try:
+                    updates = await self.async_bot.get_updates(offset=offset, timeout=polling_timeout,
+                                                               request_timeout=polling_timeout + 10)
+                except Exception as e:
+                    if "401" in str(e) or "404" in str(e):
+                        raise
+                    logger.error(f"Polling error: {str(e)}")
+                    await asyncio.sleep(3)
+                    continue
+                
+                if updates:
+                    offset = updates[-1].update_id + 1
+                    for update in updates:
+                        # Keep a reference so pending dispatches are not garbage collected
+                        task = asyncio.create_task(self._dispatch([update]))
+                        self._pending.add(task)
+                        task.add_done_callback(self._pending.discard)
+        finally:
+            for task in background:
+                task.cancel()
+            await self.async_bot.close_session()
+            self.handler_pool.shutdown(wait=False)
+
+
 if __name__ == "__main__":
     """
     Entry point utama aplikasi bot.
@@ -3667,11 +4737,12 @@ if __name__ == "__main__":
         - Menggunakan AES-256 jika tersedia, fallback ke Fernet
         - Membersihkan direktori 'files' dan 'temp' saat startup
         - Polling dengan interval 1 detik dan timeout 20 detik
+        - RUPAGANTI_RUNTIME=asyncio menjalankan AsyncRuntime sebagai gantinya
         - Memberikan pesan error yang spesifik untuk troubleshooting
         - Exit dengan kode 1 jika terjadi error kritis
     """
     # Security startup message
-    encryption_type = "AES-256 with hardware acceleration" if HAS_AES else "Fernet"
+    encryption_type = "AES-256-GCM streaming encryption" if HAS_AES else "Fernet"
     print(f"🚀 Bot started securely with {encryption_type}... waiting for file uploads 🛡️")
     logger.info(f"Secure RupaGanti Bot starting with enhanced {encryption_type} encryption...")
     
@@ -3679,10 +4750,7 @@ if __name__ == "__main__":
     try:
         # First clean the database to remove references to files that might not exist
         try:
-            conn = sqlite3.connect('files.db')
-            conn.execute('DELETE FROM files')
-            conn.commit()
-            conn.close()
+            file_repo.clear()
             logger.info("Database cleaned on startup")
         except Exception as db_error:
             logger.error(f"Database cleanup error: {str(db_error)}")
@@ -3709,8 +4777,15 @@ if __name__ == "__main__":
         exit(1)
         
     try:
-        # Use more robust polling settings
-        bot.polling(none_stop=True, interval=1, timeout=20)
+        if RUNTIME_MODE == 'asyncio':
+            if not HAS_ASYNC_BOT:
+                print("ERROR: asyncio runtime requires aiohttp. Install with: pip install aiohttp")
+                exit(1)
+            logger.info("Using asyncio runtime")
+            asyncio.run(AsyncRuntime(bot.transport).run(polling_timeout=20))
+        else:
+            # Use more robust polling settings
+            bot.polling(none_stop=True, interval=1, timeout=20)
     except Exception as e:
         logger.critical(f"Bot crashed: {str(e)}", exc_info=True)
         print(f"ERROR: {str(e)}")
@@ -0,0 +1,432 @@
+"""
+Mesin penyimpanan terenkripsi untuk RupaGanti.
+
+Format file di folder 'files/' (versi 1):
+
+    header  : MAGIC (4) | VERSION (1) | CHUNK_SIZE (4, big-endian) | NONCE_PREFIX (8)
+    chunk i : AES-256-GCM(plaintext_i) + tag 16 byte
+
+Catatan:
+    - Setiap file mendapat NONCE_PREFIX acak sendiri; nonce per chunk adalah
+      NONCE_PREFIX + nomor chunk (4 byte), jadi tidak ada nonce yang dipakai ulang
+    - Semua chunk kecuali yang terakhir berisi tepat CHUNK_SIZE byte plaintext,
+      sehingga posisi chunk bisa dihitung tanpa indeks dan file bisa dibaca
+      secara acak (random access) dengan hanya mendekripsi chunk yang dibutuhkan
+    - Header dan flag "chunk terakhir" ikut diautentikasi (AAD), sehingga
+      pemotongan, penukaran urutan, atau perubahan header akan terdeteksi
+"""
+
+import io
+import os
+import struct
+import secrets
+from collections import OrderedDict
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+MAGIC = b'RGSF'
+VERSION = 1
+DEFAULT_CHUNK_SIZE = 64 * 1024  # 64KB plaintext per chunk
+DEFAULT_CACHE_CHUNKS = 4  # Decrypted chunks kept per reader for back-and-forth seeks
+NONCE_PREFIX_SIZE = 8
+TAG_SIZE = 16
+HEADER_STRUCT = struct.Struct('>4sBI8s')
+HEADER_SIZE = HEADER_STRUCT.size
+
+_FLAG_MIDDLE = b'\x00'
+_FLAG_FINAL = b'\x01'
+
+
+def _chunk_nonce(nonce_prefix, index):
+    """
+    Membentuk nonce 96-bit untuk chunk tertentu.
+
+    Parameter:
+        nonce_prefix (bytes): Prefix acak 8 byte milik file
+        index (int): Nomor urut chunk
+
+    Return:
+        bytes: Nonce 12 byte
+    """
+    if index > 0xFFFFFFFF:
+        raise ValueError("Encrypted file has too many chunks")
+    return nonce_prefix + struct.pack('>I', index)
+
+
+def _parse_header(header):
+    """
+    Memvalidasi dan mengurai header file terenkripsi.
+
+    Parameter:
+        header (bytes): HEADER_SIZE byte pertama file
+
+    Return:
+        tuple: (chunk_size, nonce_prefix)
+
+    Catatan:
+        - Akan raise ValueError jika magic, versi, atau ukuran chunk tidak valid
+    """
+    if len(header) != HEADER_SIZE:
+        raise ValueError("Encrypted file header is truncated")
+    magic, version, chunk_size, nonce_prefix = HEADER_STRUCT.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Not a RupaGanti encrypted file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported encrypted file version: {version}")
+    if chunk_size <= 0:
+        raise ValueError("Invalid chunk size in encrypted file header")
+    return chunk_size, nonce_prefix
+
+
+def _layout(total_size, chunk_size):
+    """
+    Menghitung jumlah chunk dan ukuran plaintext dari ukuran file terenkripsi.
+
+    Parameter:
+        total_size (int): Ukuran file terenkripsi dalam byte
+        chunk_size (int): Ukuran plaintext per chunk
+
+    Return:
+        tuple: (jumlah_chunk, ukuran_plaintext)
+
+    Catatan:
+        - Minimal ada satu chunk (file kosong tetap punya chunk akhir berisi tag)
+    """
+    body = total_size - HEADER_SIZE
+    frame = chunk_size + TAG_SIZE
+    if body < TAG_SIZE:
+        raise ValueError("Encrypted file is truncated")
+    chunk_count = body // frame
+    if body % frame:
+        if body % frame < TAG_SIZE:
+            raise ValueError("Encrypted file is truncated")
+        chunk_count += 1
+    return chunk_count, body - chunk_count * TAG_SIZE
+
+
+class EncryptedFileWriter(io.RawIOBase):
+    """
+    File-like object write-only yang mengenkripsi data secara streaming.
+
+    Parameter:
+        path (str): Path tujuan file terenkripsi
+        key (bytes): Kunci AES-256 (32 byte)
+        chunk_size (int): Ukuran plaintext per chunk
+
+    Catatan:
+        - Data ditulis ke '{path}.tmp' lalu di-rename saat close(), sehingga
+          pembaca tidak pernah melihat file setengah jadi
+        - Memori yang dipakai maksimal satu chunk, berapapun ukuran file
+        - Jika dipakai dengan 'with' dan terjadi exception, file temporary dihapus
+    """
+
+    def __init__(self, path, key, chunk_size=DEFAULT_CHUNK_SIZE):
+        super().__init__()
+        self.path = path
+        self.chunk_size = chunk_size
+        self.bytes_written = 0
+        self._aead = AESGCM(key)
+        self._nonce_prefix = secrets.token_bytes(NONCE_PREFIX_SIZE)
+        self._header = HEADER_STRUCT.pack(MAGIC, VERSION, chunk_size, self._nonce_prefix)
+        self._buffer = bytearray()
+        self._index = 0
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(self._header)
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        # Append-only stream: the position is the plaintext length written so far
+        return self.bytes_written
+
+    def _write_chunk(self, data, final):
+        nonce = _chunk_nonce(self._nonce_prefix, self._index)
+        aad = self._header + (_FLAG_FINAL if final else _FLAG_MIDDLE)
+        self._file.write(self._aead.encrypt(nonce, bytes(data), aad))
+        self._index += 1
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed file")
+        view = memoryview(data).cast('B')
+        self._buffer += view
+        self.bytes_written += len(view)
+        # Keep at least one byte buffered so the final chunk is never written early
+        while len(self._buffer) > self.chunk_size:
+            self._write_chunk(self._buffer[:self.chunk_size], final=False)
+            del self._buffer[:self.chunk_size]
+        return len(view)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._write_chunk(self._buffer, final=True)
+            self._buffer = bytearray()
+            self._file.close()
+            os.replace(self._tmp_path, self.path)
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            super().close()
+
+    def abort(self):
+        """
+        Membatalkan penulisan dan menghapus file temporary.
+        """
+        try:
+            self._file.close()
+        except Exception:
+            pass
+        try:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+        except Exception:
+            pass
+        self._buffer = bytearray()
+        if not self.closed:
+            super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
+
+
+class EncryptedFileReader(io.RawIOBase):
+    """
+    File-like object read-only dan seekable yang mendekripsi file secara lazy.
+
+    Parameter:
+        path (str): Path file terenkripsi
+        key (bytes): Kunci AES-256 (32 byte)
+        cache_chunks (int): Jumlah chunk terdekripsi yang disimpan (LRU)
+
+    Catatan:
+        - Hanya chunk yang benar-benar dibaca yang didekripsi; seek() tidak
+          mendekripsi apapun
+        - Offset chunk dihitung langsung dari posisi, sehingga membaca header
+          gambar atau trailer PDF cukup mendekripsi satu chunk (O(1))
+        - Setiap chunk diverifikasi tag GCM-nya sebelum datanya dikembalikan
+        - Atribut 'size' berisi ukuran plaintext tanpa perlu mendekripsi apapun
+        - Atribut 'chunks_decrypted' menghitung jumlah dekripsi untuk monitoring
+    """
+
+    def __init__(self, path, key, cache_chunks=DEFAULT_CACHE_CHUNKS):
+        super().__init__()
+        self.path = path
+        self._aead = AESGCM(key)
+        self._file = open(path, 'rb')
+        try:
+            self._header = self._file.read(HEADER_SIZE)
+            self.chunk_size, self._nonce_prefix = _parse_header(self._header)
+            total_size = os.fstat(self._file.fileno()).st_size
+            self.chunk_count, self.size = _layout(total_size, self.chunk_size)
+        except Exception:
+            self._file.close()
+            raise
+        self._position = 0
+        self._cache = OrderedDict()
+        self._cache_chunks = max(1, cache_chunks)
+        self.chunks_decrypted = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if self.closed:
+            raise ValueError("seek on closed file")
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("negative seek position")
+        self._position = position
+        return position
+
+    def _load_chunk(self, index):
+        data = self._cache.get(index)
+        if data is not None:
+            self._cache.move_to_end(index)
+            return data
+        frame = self.chunk_size + TAG_SIZE
+        self._file.seek(HEADER_SIZE + index * frame)
+        ciphertext = self._file.read(frame)
+        final = index == self.chunk_count - 1
+        aad = self._header + (_FLAG_FINAL if final else _FLAG_MIDDLE)
+        try:
+            data = self._aead.decrypt(_chunk_nonce(self._nonce_prefix, index), ciphertext, aad)
+        except InvalidTag:
+            raise ValueError(f"Encrypted file failed authentication at chunk {index}")
+        self.chunks_decrypted += 1
+        self._cache[index] = data
+        if len(self._cache) > self._cache_chunks:
+            self._cache.popitem(last=False)
+        return data
+
+    def readinto(self, buffer):
+        if self.closed:
+            raise ValueError("read from closed file")
+        view = memoryview(buffer).cast('B')
+        written = 0
+        while written < len(view) and self._position < self.size:
+            index, offset = divmod(self._position, self.chunk_size)
+            chunk = self._load_chunk(index)
+            count = min(len(chunk) - offset, len(view) - written)
+            view[written:written + count] = chunk[offset:offset + count]
+            written += count
+            self._position += count
+        return written
+
+    def readall(self):
+        result = bytearray(max(self.size - self._position, 0))
+        count = self.readinto(result)
+        del result[count:]
+        return bytes(result)
+
+    def iter_chunks(self):
+        """
+        Menghasilkan plaintext chunk demi chunk dari posisi saat ini.
+
+        Return:
+            generator: bytes per chunk, tanpa menyalin ke buffer tambahan
+        """
+        while self._position < self.size:
+            index, offset = divmod(self._position, self.chunk_size)
+            chunk = self._load_chunk(index)
+            self._position += len(chunk) - offset
+            yield chunk[offset:] if offset else chunk
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._file.close()
+            finally:
+                self._cache.clear()
+                super().close()
+
+
+def plaintext_size(path):
+    """
+    Mengambil ukuran plaintext file terenkripsi tanpa mendekripsi isinya.
+
+    Parameter:
+        path (str): Path file terenkripsi
+
+    Return:
+        int: Ukuran plaintext dalam byte
+    """
+    with open(path, 'rb') as f:
+        chunk_size, _ = _parse_header(f.read(HEADER_SIZE))
+        total_size = os.fstat(f.fileno()).st_size
+    return _layout(total_size, chunk_size)[1]
+
+
+def encrypt_chunks(chunks, path, key, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Mengenkripsi iterable berisi bytes langsung ke file.
+
+    Parameter:
+        chunks (iterable): Sumber data, misalnya response.iter_content()
+        path (str): Path tujuan file terenkripsi
+        key (bytes): Kunci AES-256
+        chunk_size (int): Ukuran plaintext per chunk
+
+    Return:
+        int: Jumlah byte plaintext yang ditulis
+    """
+    with EncryptedFileWriter(path, key, chunk_size) as writer:
+        for chunk in chunks:
+            if chunk:
+                writer.write(chunk)
+    return writer.bytes_written
+
+
+def decrypt_to_file(path, dest_path, key):
+    """
+    Mendekripsi file terenkripsi ke file lain secara streaming.
+
+    Parameter:
+        path (str): Path file terenkripsi
+        dest_path (str): Path file plaintext tujuan
+        key (bytes): Kunci AES-256
+
+    Return:
+        int: Jumlah byte plaintext yang ditulis
+    """
+    written = 0
+    with EncryptedFileReader(path, key) as reader, open(dest_path, 'wb') as out:
+        for chunk in reader.iter_chunks():
+            out.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def encrypt_bytes(data, key, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Mengenkripsi data in-memory ke format yang sama dengan file di disk.
+
+    Parameter:
+        data (bytes): Data plaintext
+        key (bytes): Kunci AES-256
+        chunk_size (int): Ukuran plaintext per chunk
+
+    Return:
+        bytes: Header + chunk terenkripsi
+    """
+    aead = AESGCM(key)
+    nonce_prefix = secrets.token_bytes(NONCE_PREFIX_SIZE)
+    header = HEADER_STRUCT.pack(MAGIC, VERSION, chunk_size, nonce_prefix)
+    view = memoryview(data)
+    parts = [header]
+    offsets = range(0, max(len(view), 1), chunk_size)
+    last = len(offsets) - 1
+    for index, start in enumerate(offsets):
+        aad = header + (_FLAG_FINAL if index == last else _FLAG_MIDDLE)
+        parts.append(aead.encrypt(_chunk_nonce(nonce_prefix, index), bytes(view[start:start + chunk_size]), aad))
+    return b''.join(parts)
+
+
+def decrypt_bytes(blob, key):
+    """
+    Mendekripsi data in-memory hasil encrypt_bytes().
+
+    Parameter:
+        blob (bytes): Header + chunk terenkripsi
+        key (bytes): Kunci AES-256
+
+    Return:
+        bytes: Data plaintext
+    """
+    header = bytes(blob[:HEADER_SIZE])
+    chunk_size, nonce_prefix = _parse_header(header)
+    chunk_count, size = _layout(len(blob), chunk_size)
+    aead = AESGCM(key)
+    frame = chunk_size + TAG_SIZE
+    result = bytearray()
+    view = memoryview(blob)
+    for index in range(chunk_count):
+        start = HEADER_SIZE + index * frame
+        aad = header + (_FLAG_FINAL if index == chunk_count - 1 else _FLAG_MIDDLE)
+        try:
+            result += aead.decrypt(_chunk_nonce(nonce_prefix, index), bytes(view[start:start + frame]), aad)
+        except InvalidTag:
+            raise ValueError(f"Encrypted data failed authentication at chunk {index}")
+    return bytes(result)
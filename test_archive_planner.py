@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the adaptive ZIP method planner
+"""
+
+import os
+import random
+import zipfile
+from io import BytesIO
+
+from archive_planner import plan_zip, sample_blocks, FAST_LEVEL, BEST_LEVEL
+
+
+def _text(size):
+    """Create word-like text that level 9 compresses clearly better than level 1"""
+    rng = random.Random(1)
+    words = [''.join(rng.choice('abcdefghij klmnop') for _ in range(rng.randint(2, 9))) for _ in range(3000)]
+    return ' '.join(rng.choice(words) for _ in range(size // 4)).encode()[:size]
+
+
+def test_sample_blocks():
+    """Test that samples are spread across the file and small files are read whole"""
+    data = bytes(range(256)) * 8192  # 2 MB
+    blocks = sample_blocks(BytesIO(data), len(data), count=4, block_size=1000)
+    assert len(blocks) == 4 and all(len(block) == 1000 for block in blocks)
+    assert blocks[0] == data[:1000] and blocks[-1] == data[-1000:]
+
+    assert sample_blocks(BytesIO(b'small'), 5) == [b'small']
+    print("✅ Block sampling successful")
+
+
+def test_plan_zip():
+    """Test that incompressible data is stored and only real gains get level 9"""
+    method, level, ratio = plan_zip([os.urandom(64 * 1024) for _ in range(4)])
+    assert (method, level, ratio) == (zipfile.ZIP_STORED, None, 1.0)
+
+    # Trivially compressible: level 9 gains nothing over the fast level
+    method, level, ratio = plan_zip([b'\0' * 256 * 1024])
+    assert (method, level) == (zipfile.ZIP_DEFLATED, FAST_LEVEL) and ratio < 0.01
+
+    method, level, ratio = plan_zip([_text(256 * 1024)])
+    assert (method, level) == (zipfile.ZIP_DEFLATED, BEST_LEVEL) and ratio < 0.5
+
+    assert plan_zip([b''])[0] == zipfile.ZIP_STORED
+    print("✅ ZIP method planning successful")
+
+
+def main():
+    print("📦 Testing RupaGanti archive planner...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_sample_blocks, test_plan_zip):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All archive planner tests passed!")
+    else:
+        print("⚠️  Some archive planner tests failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the target-size compression planner
+"""
+
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from compression_planner import JpegSizeEstimator, plan_image, search_quality
+
+
+def _photo():
+    """Create a photo-like image: gradient, grain and a few shapes"""
+    img = Image.linear_gradient('L').resize((2400, 1600)).convert('RGB')
+    img = Image.blend(img, Image.effect_noise((2400, 1600), 30).convert('RGB'), 0.3)
+    draw = ImageDraw.Draw(img)
+    for i in range(40):
+        draw.ellipse((i * 55, (i * 37) % 1400, i * 55 + 150, (i * 37) % 1400 + 150), fill=(i * 6, 120, 220 - i * 5))
+    return img
+
+
+def _encoded_size(img, scale, quality):
+    size = (round(img.width * scale), round(img.height * scale))
+    output = BytesIO()
+    img.resize(size, Image.Resampling.LANCZOS).save(output, format='JPEG', quality=quality, optimize=True)
+    return output.tell()
+
+
+def test_search_quality():
+    """Test the binary search over a monotonic size curve"""
+    assert search_quality(lambda q: q * 10, 555, 10, 90) == 55
+    assert search_quality(lambda q: q * 10, 50, 10, 90) is None
+    assert search_quality(lambda q: q * 10, 10000, 10, 90) == 90
+    print("✅ Quality search successful")
+
+
+def test_estimate_matches_real_size():
+    """Test that tile sampling predicts the full encode within 20%"""
+    img = _photo()
+    estimator = JpegSizeEstimator(img)
+    for scale, quality in ((0.5, 60), (0.3, 40), (1.0, 85)):
+        estimate = estimator.estimate(scale, quality)
+        actual = _encoded_size(img, scale, quality)
+        assert abs(estimate - actual) / actual < 0.2, (scale, quality, estimate, actual)
+    print("✅ Size estimation successful")
+
+
+def test_plan_meets_target():
+    """Test that the planned settings land under the target in one encode"""
+    img = _photo()
+    target = _encoded_size(img, 0.5, 60) // 3
+    scale, quality, _ = plan_image(img, target, max_scale=0.5, max_quality=60)
+    assert (scale, quality) != (0.5, 60)
+    assert _encoded_size(img, scale, quality) <= target * 1.2
+    print("✅ Target-size planning successful")
+
+
+def main():
+    print("📐 Testing RupaGanti compression planner...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_search_quality, test_estimate_matches_real_size, test_plan_meets_target):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All compression planner tests passed!")
+    else:
+        print("⚠️  Some compression planner tests failed.")
+
+
+if __name__ == "__main__":
+    main()
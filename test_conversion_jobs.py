@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Test script for the conversion job handlers run inside worker processes
+"""
+
+import os
+import time
+import secrets
+import zipfile
+import tempfile
+from io import BytesIO
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+import secure_storage
+import conversion_jobs
+from conversion_jobs import JobContext, JobCancelled, JobTimeout
+
+KEY = secrets.token_bytes(32)
+conversion_jobs.init_worker(KEY)
+
+
+def _encrypt(path, data):
+    with secure_storage.EncryptedFileWriter(path, KEY) as writer:
+        writer.write(data)
+    return path
+
+
+def _decrypt(path):
+    with secure_storage.EncryptedFileReader(path, KEY) as reader:
+        return reader.read()
+
+
+def _text_pdf(pages=3):
+    """Uncompressed text-only PDF, so a deflating save is smaller"""
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Heading {number}", fontsize=20)
+        page.insert_textbox(fitz.Rect(72, 100, 520, 700), "Plain body text on the page. " * 60, fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _image_pdf():
+    """PDF whose size is one oversized noisy picture"""
+    picture = BytesIO()
+    Image.frombytes('RGB', (700, 700), os.urandom(700 * 700 * 3)).save(picture, format='PNG')
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_image(fitz.Rect(72, 72, 272, 272), stream=picture.getvalue())
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _compress(tmp, data):
+    ctx = JobContext('job', tmp)
+    return conversion_jobs.job_pdf_compress(ctx, {'input_path': _encrypt(os.path.join(tmp, 'in.enc'), data),
+                                                  'output_path': os.path.join(tmp, 'out.enc')})
+
+
+def _failing_optimizer(*args, **kwargs):
+    raise RuntimeError("optimizer broke")
+
+
+def test_pdf_compress_keeps_text_vector():
+    """Test that a text PDF is handled by the optimizer, not rasterized"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data = _text_pdf()
+        result = _compress(tmp, data)
+        assert result['engine'] == 'optimizer'
+        assert result['errors'] == []
+        assert result['output_size'] < len(data)
+        with fitz.open(stream=_decrypt(result['output_path']), filetype='pdf') as doc:
+            assert len(doc) == 3
+            assert "Heading 2" in doc[2].get_text()
+    print("✅ Text PDF kept as vector output")
+
+
+def test_pdf_compress_fallback_chain():
+    """Test that an optimizer failure is reported and falls back to rasterizing"""
+    original = conversion_jobs.optimize_pdf
+    conversion_jobs.optimize_pdf = _failing_optimizer
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = _compress(tmp, _image_pdf())
+            assert result['engine'] == 'pymupdf'
+            assert result['errors'][0].startswith("optimizer: RuntimeError")
+            with fitz.open(stream=_decrypt(result['output_path']), filetype='pdf') as doc:
+                assert len(doc) == 1
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Rasterized text is larger than the original: keep the original
+            result = _compress(tmp, _text_pdf())
+            assert result['engine'] == 'original' and result['output_path'] is None
+            assert not os.path.exists(os.path.join(tmp, 'out.enc'))
+    finally:
+        conversion_jobs.optimize_pdf = original
+    print("✅ PDF compression fallback successful")
+
+
+def test_image_batch():
+    """Test that a batch converts every readable image and reports the rest"""
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = []
+        for number, color in enumerate(('red', 'blue')):
+            picture = BytesIO()
+            Image.new('RGBA', (64, 48), color).save(picture, format='PNG')
+            inputs.append([_encrypt(os.path.join(tmp, f'in_{number}.enc'), picture.getvalue()), 'photo.png'])
+        inputs.append([_encrypt(os.path.join(tmp, 'broken.enc'), b'not an image'), 'broken.png'])
+        ctx = JobContext('job', tmp)
+
+        result = conversion_jobs.job_image_batch(ctx, {'inputs': inputs, 'operation': 'JPEG', 'archive': True,
+                                                       'output_path': os.path.join(tmp, 'out.enc')})
+        assert result['failed'] == ['broken.png']
+        with zipfile.ZipFile(BytesIO(_decrypt(result['output_path']))) as archive:
+            assert archive.namelist() == ['photo.jpg', 'photo_2.jpg']
+            assert Image.open(BytesIO(archive.read('photo_2.jpg'))).size == (64, 48)
+
+        result = conversion_jobs.job_image_batch(ctx, {'inputs': inputs[:2], 'operation': 'WEBP', 'archive': False,
+                                                       'output_path': os.path.join(tmp, 'unused.enc')})
+        assert result['output_path'] is None and result['failed'] == []
+        assert [item['name'] for item in result['outputs']] == ['photo.webp', 'photo_2.webp']
+        assert Image.open(BytesIO(_decrypt(result['outputs'][0]['output_path']))).format == 'WEBP'
+    print("✅ Image batch successful")
+
+
+def test_zip_file():
+    """Test that a single file is zipped from and to encrypted storage"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data = b'rupaganti single file archive ' * 50000
+        ctx = JobContext('job', tmp)
+        result = conversion_jobs.job_zip_file(ctx, {'input_path': _encrypt(os.path.join(tmp, 'in.enc'), data),
+                                                    'output_path': os.path.join(tmp, 'out.enc'),
+                                                    'original_name': 'notes.txt'})
+        assert result['output_size'] < len(data)
+        with zipfile.ZipFile(BytesIO(_decrypt(result['output_path']))) as archive:
+            assert archive.read('notes.txt') == data
+    print("✅ Single file ZIP successful")
+
+
+def test_word_ranges_budget_and_cancel():
+    """Test that pdf2docx ranges respect the time budget and cancellation"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, 'input.pdf')
+        with open(pdf_path, 'wb') as f:
+            f.write(_text_pdf(pages=2))
+
+        # Deadline not reached yet, but nothing is left for pdf2docx once the reserve is kept
+        ctx = JobContext('job', tmp, time.time() + conversion_jobs.PDF_TO_WORD_RESERVE - 5)
+        assert conversion_jobs._convert_word_ranges(ctx, pdf_path, [(0, 2)]) == [None]
+
+        open(os.path.join(tmp, JobContext.CANCEL_MARKER), 'w').close()
+        try:
+            conversion_jobs._convert_word_ranges(JobContext('job', tmp), pdf_path, [(0, 1), (1, 2)])
+            assert False, "Expected JobCancelled"
+        except JobCancelled:
+            pass
+    print("✅ Word range budget and cancel successful")
+
+
+def test_pdf_to_word_falls_back_to_text():
+    """Test that a small PDF out of pdf2docx budget still becomes a full text document"""
+    from docx import Document
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = JobContext('job', tmp, time.time() + conversion_jobs.PDF_TO_WORD_RESERVE - 5)
+        result = conversion_jobs.job_pdf_to_word(ctx, {'input_path': _encrypt(os.path.join(tmp, 'in.enc'), _text_pdf()),
+                                                       'output_path': os.path.join(tmp, 'out.enc'),
+                                                       'use_pdf2docx': True})
+        assert result['fallback_pages'] == 3 and not result['enhanced']
+        doc = Document(BytesIO(_decrypt(result['output_path'])))
+        headings = [p.text for p in doc.paragraphs if p.text.startswith('Heading')]
+        assert headings == ['Heading 0', 'Heading 1', 'Heading 2']
+    print("✅ PDF to Word text fallback successful")
+
+
+def test_run_job_cancel_and_timeout():
+    """Test run_job dispatch, cancellation, deadline and PID file cleanup"""
+    with tempfile.TemporaryDirectory() as tmp:
+        params = {'input_path': _encrypt(os.path.join(tmp, 'in.enc'), b'data'),
+                  'output_path': os.path.join(tmp, 'out.enc'), 'original_name': 'a.txt'}
+        pid_path = os.path.join(tmp, JobContext.PID_FILE)
+
+        result = conversion_jobs.run_job('zip_file', params, 'job', tmp, time.time() + 60)
+        assert result['output_path'] == params['output_path']
+        assert not os.path.exists(pid_path)
+
+        try:
+            conversion_jobs.run_job('zip_file', params, 'job', tmp, time.time() - 1)
+            assert False, "Expected JobTimeout"
+        except JobTimeout:
+            assert not os.path.exists(pid_path)
+
+        open(os.path.join(tmp, JobContext.CANCEL_MARKER), 'w').close()
+        try:
+            conversion_jobs.run_job('zip_file', params, 'job', tmp)
+            assert False, "Expected JobCancelled"
+        except JobCancelled:
+            assert not os.path.exists(pid_path)
+
+        try:
+            conversion_jobs.run_job('no_such_job', params, 'job', tmp)
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+    print("✅ Job dispatch, cancel and timeout successful")
+
+
+def main():
+    print("⚙️  Testing RupaGanti conversion jobs...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_pdf_compress_keeps_text_vector, test_pdf_compress_fallback_chain, test_image_batch,
+                 test_zip_file, test_word_ranges_budget_and_cancel, test_pdf_to_word_falls_back_to_text,
+                 test_run_job_cancel_and_timeout):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All conversion job tests passed!")
+    else:
+        print("⚠️  Some conversion job tests failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for stitching page-range DOCX parts into one document
+"""
+
+import os
+import base64
+import tempfile
+from io import BytesIO
+
+from docx import Document
+from docx.shared import Inches
+
+from docx_stitch import append_document, stitch_documents
+
+# 1x1 red PNG
+_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg==')
+
+
+def _part(texts, picture=False, landscape=False):
+    """Create a part document with one paragraph per text"""
+    doc = Document()
+    if landscape:
+        section = doc.sections[0]
+        section.page_width, section.page_height = section.page_height, section.page_width
+    for text in texts:
+        doc.add_paragraph(text)
+    if picture:
+        doc.add_picture(BytesIO(_PNG), width=Inches(1))
+    return doc
+
+
+def _reload(doc):
+    output = BytesIO()
+    doc.save(output)
+    output.seek(0)
+    return Document(output)
+
+
+def test_append_keeps_order_and_sections():
+    """Test that parts follow each other, each starting a section with its own page setup"""
+    master = _part(['page 1', 'page 2'])
+    portrait_width = master.sections[0].page_width
+    append_document(master, _part(['page 3'], landscape=True))
+    append_document(master, _part(['page 4']))
+    doc = _reload(master)
+
+    texts = [p.text for p in doc.paragraphs if p.text]
+    assert texts == ['page 1', 'page 2', 'page 3', 'page 4']
+    assert len(doc.sections) == 3
+    assert doc.sections[0].page_width == portrait_width
+    assert doc.sections[1].page_width != portrait_width
+    assert doc.sections[2].page_width == portrait_width
+    print("✅ Part order and sections successful")
+
+
+def test_append_moves_images():
+    """Test that pictures from a part are re-registered in the master"""
+    master = _part(['text'], picture=True)
+    append_document(master, _part(['more'], picture=True))
+    append_document(master, _part(['last'], picture=True))
+    doc = _reload(master)
+
+    assert len(doc.inline_shapes) == 3
+    images = [rel for rel in doc.part.rels.values() if rel.reltype.endswith('/image')]
+    assert len(images) == 1  # Identical pictures are stored once
+    for shape in doc.inline_shapes:
+        r_id = shape._inline.graphic.graphicData.pic.blipFill.blip.embed
+        assert doc.part.related_parts[r_id].blob == _PNG
+    print("✅ Image relationships successful")
+
+
+def test_stitch_documents():
+    """Test that stitched files open and keep every part"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = []
+        for number in range(3):
+            path = os.path.join(work_dir, f'part_{number}.docx')
+            _part([f'part {number}']).save(path)
+            paths.append(path)
+        output_path = os.path.join(work_dir, 'converted.docx')
+        stitch_documents(paths, output_path)
+
+        texts = [p.text for p in Document(output_path).paragraphs if p.text]
+    assert texts == ['part 0', 'part 1', 'part 2']
+    print("✅ Document stitching successful")
+
+
+def main():
+    print("📄 Testing RupaGanti DOCX stitching...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_append_keeps_order_and_sections, test_append_moves_images, test_stitch_documents):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All DOCX stitching tests passed!")
+    else:
+        print("⚠️  Some DOCX stitching tests failed.")
+
+
+if __name__ == "__main__":
+    main()
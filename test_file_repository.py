@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for the files.db repository layer
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from file_repository import FileRepository, SCHEMA_VERSION, STATE_PROCESSING
+
+
+@contextmanager
+def _repo():
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = FileRepository(os.path.join(tmp, 'files.db'))
+        repo.init_schema()
+        try:
+            yield repo
+        finally:
+            repo.close()
+
+
+def test_crud():
+    """Test insert, lookup, pop and batch delete"""
+    with _repo() as repo:
+        first = repo.add(1, 'f1', 'a.pdf', 'files/a')
+        second = repo.add(1, 'f2', 'b.pdf', 'files/b')
+        third = repo.add(2, 'f3', 'c.pdf', 'files/c')
+
+        assert repo.get(first) == ('files/a', 'a.pdf')
+        assert repo.get_name(str(second)) == 'b.pdf'  # Callback data ids arrive as strings
+        assert repo.pop(first) == 'files/a'
+        assert repo.pop(first) is None
+        assert repo.pop_many([third, 999, second]) == ['files/c', 'files/b']
+        assert repo.get(second) is None
+
+        ids = [repo.add(3, f'f{i}', f'{i}.jpg', f'files/{i}') for i in range(5)]
+        repo.delete_many(ids[:4])
+        assert [repo.get(db_id) is None for db_id in ids] == [True] * 4 + [False]
+    print("✅ Repository CRUD successful")
+
+
+def test_retention_sweep():
+    """Test batched expiry sweeps and extending a file's lifetime"""
+    with _repo() as repo:
+        now = datetime.now()
+        old = [repo.add(1, f'old{i}', 'old.pdf', f'files/old{i}', now - timedelta(hours=1)) for i in range(7)]
+        kept = repo.add(1, 'new', 'new.pdf', 'files/new', now)
+        repo.set_state(old[0], STATE_PROCESSING, expires_at=now + timedelta(minutes=5))
+
+        paths = repo.pop_expired(batch_size=2)
+        assert sorted(paths) == [f'files/old{i}' for i in range(1, 7)], paths
+        assert repo.get(old[0]) is not None and repo.get(kept) is not None
+        assert repo.pop_expired(now + timedelta(hours=1)) == ['files/old0', 'files/new']
+
+        plan = repo._connection().execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM files WHERE expires_at < ?', (str(now),)).fetchall()
+        assert 'idx_files_expires_at' in str(plan), plan
+    print("✅ Retention sweep successful")
+
+
+def test_schema_migration():
+    """Test upgrading a database created with the original schema"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'files.db')
+        conn = sqlite3.connect(path)
+        conn.execute('''CREATE TABLE files (id INTEGER PRIMARY KEY, user_id INTEGER, file_id TEXT,
+                        file_name TEXT, file_path TEXT, created_at TIMESTAMP)''')
+        conn.execute('INSERT INTO files (user_id, file_id, file_name, file_path, created_at) VALUES (?, ?, ?, ?, ?)',
+                     (9, 'f', 'legacy.pdf', 'files/legacy', str(datetime.now() - timedelta(hours=1))))
+        conn.commit()
+        conn.close()
+
+        repo = FileRepository(path)
+        repo.init_schema()
+        repo.init_schema()  # Already migrated: no-op
+        assert repo._connection().execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+        assert [row[2] for row in repo.list_for_user(9)] == ['legacy.pdf']
+        assert repo.pop_expired() == ['files/legacy']
+        repo.close()
+    print("✅ Schema migration successful")
+
+
+def test_thread_local_connections():
+    """Test WAL mode and one persistent connection per thread"""
+    with _repo() as repo:
+        assert repo._connection() is repo._connection()
+        assert repo._connection().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+        errors = []
+
+        def writer(user_id):
+            try:
+                for i in range(50):
+                    repo.add(user_id, f'{user_id}-{i}', 'x', 'files/x')
+                repo.pop_expired(datetime.now() + timedelta(hours=1))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                repo.close()
+
+        threads = [threading.Thread(target=writer, args=(user_id,)) for user_id in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == [], errors
+    print("✅ Concurrent thread-local access successful")
+
+
+def main():
+    print("🗄️ Testing RupaGanti file repository...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_crud, test_retention_sweep, test_schema_migration, test_thread_local_connections):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All file repository tests passed!")
+    else:
+        print("⚠️  Some file repository tests failed.")
+
+
+if __name__ == "__main__":
+    main()
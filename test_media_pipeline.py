@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for ffmpeg command planning (stream copy detection)
+"""
+
+import json
+
+from media_pipeline import (parse_probe, extract_audio_command, audio_mp3_command, video_mp4_command,
+                            ProgressParser)
+
+
+def _probe_output(format_name, *codecs):
+    streams = [{'index': index, 'codec_type': codec_type, 'codec_name': codec_name}
+               for index, (codec_type, codec_name) in enumerate(codecs)]
+    return json.dumps({'streams': streams,
+                       'format': {'format_name': format_name, 'duration': '12.5'}}).encode()
+
+
+def test_parse_probe():
+    """Test that ffprobe JSON is summarized per stream type"""
+    info = parse_probe(_probe_output('matroska,webm', ('video', 'h264'), ('audio', 'aac'), ('subtitle', 'ass')))
+    assert info == {'format': 'matroska,webm', 'duration': 12.5, 'video': ['h264'], 'audio': ['aac']}
+    assert parse_probe(b'{}')['video'] == []
+    print("✅ Probe parsing successful")
+
+
+def test_remux_compatible_streams():
+    """Test that H.264/AAC and MP3 tracks are copied, not re-encoded"""
+    mkv = parse_probe(_probe_output('matroska,webm', ('video', 'h264'), ('audio', 'aac')))
+    args, copied = video_mp4_command(mkv, 'in.mkv', 'out.mp4')
+    assert copied and args[args.index('-c:v') + 1] == 'copy' and args[args.index('-c:a') + 1] == 'copy'
+    assert 'libx264' not in args
+
+    # Stream copy failed: the retry re-encodes everything
+    args, copied = video_mp4_command(mkv, 'in.mkv', 'out.mp4', allow_copy=False)
+    assert not copied and 'libx264' in args
+
+    video = parse_probe(_probe_output('mov,mp4', ('video', 'hevc'), ('audio', 'mp3')))
+    args, copied = extract_audio_command(video, 'in.mp4')
+    assert copied and args[-3:] == ['-f', 'mp3', 'pipe:1'] and 'libmp3lame' not in args
+    args, copied = video_mp4_command(video, 'in.mp4', 'out.mp4')
+    assert not copied and 'libx264' in args and args[args.index('-c:a') + 1] == 'aac'
+    print("✅ Stream copy detection successful")
+
+
+def test_reencode_and_missing_tracks():
+    """Test re-encoding for other codecs and errors for missing tracks"""
+    flac = parse_probe(_probe_output('flac', ('audio', 'flac'), ('video', 'mjpeg')))
+    args, copied = audio_mp3_command(flac, 'in.flac')
+    assert not copied and args[args.index('-b:a') + 1] == '192k' and '0:a:0' in args
+
+    silent = parse_probe(_probe_output('mov,mp4', ('video', 'h264')))
+    args, copied = video_mp4_command(silent, 'in.mp4', 'out.mp4')
+    assert copied and '0:a:0' not in args
+    try:
+        extract_audio_command(silent, 'in.mp4')
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Re-encode planning successful")
+
+
+def test_progress_parser():
+    """Test that ffmpeg -progress blocks become completion fractions"""
+    parser = ProgressParser(10.0)
+    fractions = [parser.feed(line) for line in (
+        b'frame=10\n', b'out_time_us=N/A\n', b'progress=continue\n',
+        b'out_time_us=2500000\n', b'out_time_ms=2500000\n', b'progress=continue\n',
+        b'out_time_us=9999999\n', b'progress=end\n')]
+    assert [f for f in fractions if f is not None] == [0.0, 0.25, 1.0], fractions
+
+    # Unknown duration: only completion is reported
+    parser = ProgressParser(None)
+    assert parser.feed('out_time_us=5000000') is None
+    assert parser.feed('progress=continue') is None
+    assert parser.feed('progress=end') == 1.0
+    print("✅ Progress parsing successful")
+
+
+def main():
+    print("🎬 Testing RupaGanti media pipeline...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_parse_probe, test_remux_compatible_streams, test_reencode_and_missing_tracks,
+                 test_progress_parser):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All media pipeline tests passed!")
+    else:
+        print("⚠️  Some media pipeline tests failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test script for the outbound Telegram API scheduler
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from outbound_scheduler import (OutboundScheduler, ScheduledBot, TokenBucket,
+                                PRIORITY_ANIMATION, PRIORITY_RESULT)
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Too Many Requests: retry after {retry_after}")
+        self.retry_after = retry_after
+
+
+class FakeTransport:
+    """Records API calls instead of talking to Telegram"""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.fail_next = 0
+        self.upload_gate = None  # threading.Event that holds send_document until set
+
+    def _record(self, name, args):
+        with self.lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                raise RateLimited(0.2)
+            self.calls.append((time.monotonic(), name) + tuple(args))
+        return len(self.calls)
+
+    def send_message(self, chat_id, text, **kwargs):
+        return self._record('send_message', (chat_id, text, kwargs.get('reply_to_message_id')))
+
+    def send_document(self, chat_id, document, **kwargs):
+        if self.upload_gate is not None:
+            with self.lock:
+                self.calls.append((time.monotonic(), 'upload_started', chat_id))
+            self.upload_gate.wait(5)
+        return self._record('send_document', (chat_id, document))
+
+    def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        return self._record('edit_message_text', (chat_id, message_id, text))
+
+
+def _bot(**kwargs):
+    transport = FakeTransport()
+    scheduler = OutboundScheduler(retry_after=lambda e: getattr(e, 'retry_after', None), **kwargs)
+    return ScheduledBot(transport, scheduler), transport
+
+
+def test_token_bucket():
+    """Test burst capacity and refill rate"""
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    bucket.take(now)
+    bucket.take(now)
+    assert bucket.wait_time(now) == 0.5
+    assert bucket.wait_time(now + 0.5) == 0
+    bucket.block(now + 3)
+    assert bucket.wait_time(now + 1) == 2
+    print("✅ Token bucket successful")
+
+
+def test_per_chat_rate_limit():
+    """Test that one chat is throttled while another chat is not"""
+    bot, transport = _bot(global_rate=100, chat_rate=5, chat_burst=1)
+    start = time.monotonic()
+    futures = [bot.submit('send_message', 1, f"m{i}") for i in range(4)]
+    other = bot.submit('send_message', 2, "other")
+    assert other.result(2) is not None
+    for future in futures:
+        future.result(5)
+    chat_one = [call[0] - start for call in transport.calls if call[2] == 1]
+    assert chat_one[-1] >= 0.5, chat_one  # 4 messages at 5/s need at least 0.6s
+    assert [call[3] for call in transport.calls if call[2] == 1] == ["m0", "m1", "m2", "m3"]
+    print("✅ Per-chat rate limiting successful")
+
+
+def test_superseded_edits_are_dropped():
+    """Test that queued edits of the same message are coalesced"""
+    bot, transport = _bot(global_rate=100, chat_rate=2, chat_burst=1)
+    bot.send_message(7, "status")  # Use up the chat's burst
+    futures = [bot.submit('edit_message_text', f"frame {i}", 7, 42, priority=PRIORITY_ANIMATION)
+               for i in range(10)]
+    futures[-1].result(5)
+    edits = [call for call in transport.calls if call[1] == 'edit_message_text']
+    assert len(edits) == 1 and edits[0][4] == "frame 9", edits
+    assert all(future is futures[0] for future in futures)
+    print("✅ Edit coalescing successful")
+
+
+def test_priority_order():
+    """Test that results overtake queued animation frames"""
+    bot, transport = _bot(global_rate=5, chat_rate=100, chat_burst=100)
+    for chat in range(5):
+        bot.send_message(100 + chat, "drain")  # Empty the global bucket
+    animation = [bot.submit('edit_message_text', "tick", chat, 1, priority=PRIORITY_ANIMATION)
+                 for chat in range(3)]
+    result = bot.submit('send_document', 99, "file.pdf", priority=PRIORITY_RESULT)
+    result.result(5)
+    for future in animation:
+        future.result(5)
+    order = [call[1] for call in transport.calls[5:]]
+    assert order[0] == 'send_document', order
+    print("✅ Priority ordering successful")
+
+
+def test_rate_limit_retry():
+    """Test that 429 responses are retried after retry_after"""
+    bot, transport = _bot(global_rate=100, chat_rate=100, chat_burst=100)
+    transport.fail_next = 2
+    start = time.monotonic()
+    assert bot.send_message(5, "hello") == 1
+    assert time.monotonic() - start >= 0.4
+    print("✅ Rate limit retry successful")
+
+
+def test_reply_to_is_scheduled():
+    """Test that replies go through the chat's token bucket as send_message"""
+    bot, transport = _bot(global_rate=100, chat_rate=5, chat_burst=1)
+    message = SimpleNamespace(chat=SimpleNamespace(id=3), message_id=77)
+    start = time.monotonic()
+    bot.reply_to(message, "first")
+    bot.reply_to(message, "second", parse_mode='Markdown')
+    assert [call[1:] for call in transport.calls] == [('send_message', 3, "first", 77),
+                                                      ('send_message', 3, "second", 77)]
+    assert transport.calls[1][0] - start >= 0.15  # Second reply waited for the chat bucket
+    print("✅ Scheduled replies successful")
+
+
+def test_uploads_leave_senders_free():
+    """Test that slow uploads neither block status messages nor pile up in the senders"""
+    bot, transport = _bot(global_rate=100, chat_rate=100, chat_burst=100, senders=1, uploaders=1)
+    transport.upload_gate = threading.Event()
+    uploads = [bot.submit('send_document', chat, "file.pdf") for chat in range(3)]
+    time.sleep(0.2)
+    assert bot.send_message(9, "status") is not None  # Returns while the first upload hangs
+    assert [call[1] for call in transport.calls].count('upload_started') == 1
+    assert bot.scheduler.pending_count() == 2  # The other uploads wait in the priority queue
+    transport.upload_gate.set()
+    for future in uploads:
+        future.result(5)
+    assert [call[2] for call in transport.calls if call[1] == 'send_document'] == [0, 1, 2]
+    print("✅ Upload lane successful")
+
+
+def main():
+    print("📮 Testing RupaGanti outbound scheduler...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_token_bucket, test_per_chat_rate_limit, test_superseded_edits_are_dropped,
+                 test_priority_order, test_rate_limit_retry, test_reply_to_is_scheduled,
+                 test_uploads_leave_senders_free):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All outbound scheduler tests passed!")
+    else:
+        print("⚠️  Some outbound scheduler tests failed.")
+
+
+if __name__ == "__main__":
+    main()
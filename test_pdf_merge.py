@@ -7,6 +7,8 @@ import os
 import sys
 from io import BytesIO
 
+import pytest
+
 def test_pdf_merger():
     """Test if PDF merger libraries are available"""
     try:
@@ -89,11 +91,53 @@ def test_merge_functionality():
         print(f"❌ PDF merge test failed: {str(e)}")
         return False
 
+def _make_fitz_pdf(text="Test PDF Document"):
+    """Create a one-page PDF with PyMuPDF"""
+    import fitz  # PyMuPDF
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    page.insert_text((72, 100), "This is a test page")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def test_streaming_merge():
+    """Test the incremental merger used by the bot"""
+    PyPDF2 = pytest.importorskip('PyPDF2')
+    from pdf_merge import StreamingPdfMerger, inspect_pdf
+    test_pdf_data = _make_fitz_pdf()
+    
+    info = inspect_pdf(BytesIO(test_pdf_data))
+    assert info['pages'] == 1 and not info['encrypted'] and info['objects'] > 0
+    with pytest.raises(ValueError):
+        inspect_pdf(BytesIO(test_pdf_data[:len(test_pdf_data) // 2]))
+    
+    output = BytesIO()
+    merger = StreamingPdfMerger(output)
+    merger.append(info['reader'])  # Reuse the structure parsed by inspect_pdf
+    for _ in range(2):
+        assert merger.append(BytesIO(test_pdf_data)) == 1
+    merger.close()
+    
+    reader = PyPDF2.PdfReader(BytesIO(output.getvalue()), strict=True)
+    assert len(reader.pages) == 3
+    assert "Test PDF Document" in reader.pages[2].extract_text()
+    print("✅ Streaming PDF merge test successful")
+
 if __name__ == "__main__":
     print("🧪 Testing PDF merge functionality...")
     print()
     
     success = test_merge_functionality()
+    if success:
+        try:
+            test_streaming_merge()
+        except pytest.skip.Exception:
+            print("⚠️ PyPDF2 not available, skipping streaming merge test")
+        except Exception as e:
+            print(f"❌ Streaming PDF merge test failed: {str(e)}")
+            success = False
     
     print()
     if success:
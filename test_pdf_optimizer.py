@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-aware PDF optimizer
+"""
+
+import os
+import tempfile
+from io import BytesIO
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from pdf_optimizer import optimize_pdf
+
+
+def _make_pdf(directory, with_image=True):
+    """Create a PDF with text on every page and one oversized shared photo"""
+    doc = fitz.open()
+    image = BytesIO()
+    Image.effect_noise((1600, 1200), 64).convert('RGB').save(image, format='PNG')
+    for number in range(3):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {number} keeps its text")
+        if with_image:
+            page.insert_image(fitz.Rect(72, 100, 372, 325), stream=image.getvalue())
+    path = os.path.join(directory, 'input.pdf')
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_downsamples_oversized_images():
+    """Test that images shrink while text stays extractable"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _make_pdf(tmp)
+        output = BytesIO()
+        stats = optimize_pdf(path, output, max_dpi=150, jpeg_quality=60)
+        assert stats['images'] == 1 and stats['recompressed'] == 1, stats
+        assert len(output.getvalue()) < os.path.getsize(path) / 10
+
+    with fitz.open(stream=output.getvalue(), filetype='pdf') as doc:
+        assert doc.page_count == 3
+        assert "Page 2 keeps its text" in doc[2].get_text()
+        xref, _, width, height = doc[0].get_images(full=True)[0][:4]
+        # 300pt wide at 150 DPI is 625 pixels
+        assert (width, height) == (625, 469), (width, height)
+        assert doc[2].get_images(full=True)[0][0] == xref  # Still one shared image
+    print("✅ Image downsampling successful")
+
+
+def test_text_only_pdf():
+    """Test that a PDF without images is only rewritten, never rasterized"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = BytesIO()
+        stats = optimize_pdf(_make_pdf(tmp, with_image=False), output)
+    assert stats['images'] == 0 and stats['recompressed'] == 0
+    with fitz.open(stream=output.getvalue(), filetype='pdf') as doc:
+        assert "Page 0 keeps its text" in doc[0].get_text()
+        assert doc[0].get_images() == []
+    print("✅ Text-only optimization successful")
+
+
+def main():
+    print("🗜️ Testing RupaGanti PDF optimizer...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_downsamples_oversized_images, test_text_only_pdf):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All PDF optimizer tests passed!")
+    else:
+        print("⚠️  Some PDF optimizer tests failed.")
+
+
+if __name__ == "__main__":
+    main()
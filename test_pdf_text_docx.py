@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the structured PDF text to DOCX fallback
+"""
+
+import os
+import tempfile
+
+import fitz  # PyMuPDF
+from docx import Document
+
+from pdf_text_docx import DocxTextWriter, write_pdf_text_docx, LOW_TEXT_NOTE
+from docx_stitch import stitch_documents
+
+BODY = "This sentence is ordinary body text on the page. " * 4
+
+
+def _make_pdf(directory):
+    """Create a PDF with a title, body paragraphs, a ruled table and an empty page"""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 80), "Annual Report", fontsize=24)
+    page.insert_textbox(fitz.Rect(72, 110, 520, 200), BODY, fontsize=11)
+    page.insert_textbox(fitz.Rect(72, 210, 520, 300), BODY, fontsize=11)
+    for row in range(3):
+        for column in range(2):
+            cell = fitz.Rect(72 + column * 150, 320 + row * 25, 222 + column * 150, 345 + row * 25)
+            page.draw_rect(cell, color=(0, 0, 0), width=1)
+            page.insert_text((cell.x0 + 5, cell.y0 + 17), f"r{row}c{column}", fontsize=11)
+    doc.new_page()
+    path = os.path.join(directory, 'input.pdf')
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_structure():
+    """Test that headings, paragraphs and tables come out as Word structure"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'text.docx')
+        with fitz.open(_make_pdf(tmp)) as pdf:
+            assert write_pdf_text_docx(pdf, output_path) == 2
+        doc = Document(output_path)
+
+    paragraphs = [(p.style.name, p.text.strip()) for p in doc.paragraphs if p.text.strip()]
+    assert paragraphs[0] == ('Heading 1', 'Annual Report')
+    body = [text for style, text in paragraphs if style == 'Normal' and text != LOW_TEXT_NOTE]
+    assert len(body) == 2 and all(text.startswith('This sentence') for text in body)
+    assert not any('r0c0' in text for _, text in paragraphs)  # Table text is not repeated
+    assert paragraphs[-1][1] == LOW_TEXT_NOTE  # Second page has no text
+
+    assert len(doc.tables) == 1
+    assert [[cell.text for cell in row.cells] for row in doc.tables[0].rows] == \
+        [[f"r{row}c{column}" for column in range(2)] for row in range(3)]
+    print("✅ Structured extraction successful")
+
+
+def test_writer_escapes_and_stitches():
+    """Test that XML special characters survive and parts stitch with python-docx output"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        text_path = os.path.join(work_dir, 'text.docx')
+        with DocxTextWriter(text_path) as writer:
+            writer.paragraph([("A & B < C", True, False), (" \x0bline\nbreak", False, True)])
+            writer.paragraph([("Title", False, False)], style='Heading2')
+        doc = Document(text_path)
+        assert doc.paragraphs[0].text == "A & B < C line\nbreak"
+        assert doc.paragraphs[0].runs[0].bold and doc.paragraphs[0].runs[1].italic
+        assert doc.paragraphs[1].style.name == 'Heading 2'
+
+        other_path = os.path.join(work_dir, 'other.docx')
+        other = Document()
+        other.add_paragraph("converted part")
+        other.save(other_path)
+        output_path = os.path.join(work_dir, 'converted.docx')
+        stitch_documents([text_path, other_path], output_path)
+        texts = [p.text for p in Document(output_path).paragraphs if p.text]
+    assert texts == ["A & B < C line\nbreak", "Title", "converted part"]
+    print("✅ Streaming writer successful")
+
+
+def main():
+    print("📄 Testing RupaGanti PDF text to DOCX...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_structure, test_writer_escapes_and_stitches):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All PDF text to DOCX tests passed!")
+    else:
+        print("⚠️  Some PDF text to DOCX tests failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming AES-GCM storage engine
+"""
+
+import io
+import os
+import random
+import secrets
+import tempfile
+
+import secure_storage
+
+CHUNK = 1024
+KEY = secrets.token_bytes(32)
+
+
+def _write(path, data, chunk_size=CHUNK, piece=700):
+    with secure_storage.EncryptedFileWriter(path, KEY, chunk_size) as writer:
+        for i in range(0, len(data), piece):
+            writer.write(data[i:i + piece])
+    return writer.bytes_written
+
+
+def test_roundtrip_sizes():
+    """Test encrypt/decrypt round trip across chunk boundaries"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.bin")
+        for size in (0, 1, CHUNK - 1, CHUNK, CHUNK + 1, 3 * CHUNK, 5 * CHUNK + 17):
+            data = secrets.token_bytes(size)
+            assert _write(path, data) == size
+            assert secure_storage.plaintext_size(path) == size
+            with secure_storage.EncryptedFileReader(path, KEY) as reader:
+                assert reader.size == size
+                assert reader.read() == data
+            assert not os.path.exists(f"{path}.tmp")
+    print("✅ Streaming round trip successful")
+
+
+def test_unique_nonce_per_file():
+    """Test that identical inputs never share a nonce prefix or ciphertext"""
+    data = b"same content" * 100
+    first = secure_storage.encrypt_bytes(data, KEY, CHUNK)
+    second = secure_storage.encrypt_bytes(data, KEY, CHUNK)
+    assert first[:secure_storage.HEADER_SIZE] != second[:secure_storage.HEADER_SIZE]
+    assert first != second
+    assert secure_storage.decrypt_bytes(first, KEY) == data
+    print("✅ Per-file nonce successful")
+
+
+def test_tamper_and_truncation_detected():
+    """Test that modified or truncated files are rejected"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.bin")
+        _write(path, secrets.token_bytes(3 * CHUNK + 5))
+
+        with open(path, 'rb') as f:
+            blob = bytearray(f.read())
+
+        tampered = bytearray(blob)
+        tampered[secure_storage.HEADER_SIZE + 10] ^= 0x01
+        try:
+            secure_storage.decrypt_bytes(bytes(tampered), KEY)
+            raise AssertionError("tampered data was accepted")
+        except ValueError:
+            pass
+
+        # Dropping the final chunk must not look like a shorter valid file
+        frame = CHUNK + secure_storage.TAG_SIZE
+        truncated = bytes(blob[:secure_storage.HEADER_SIZE + 3 * frame])
+        try:
+            secure_storage.decrypt_bytes(truncated, KEY)
+            raise AssertionError("truncated data was accepted")
+        except ValueError:
+            pass
+    print("✅ Tamper and truncation detection successful")
+
+
+def test_random_access_reads():
+    """Test seek/read against an in-memory copy and lazy chunk decryption"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.bin")
+        data = secrets.token_bytes(40 * CHUNK + 123)
+        _write(path, data)
+        expected = io.BytesIO(data)
+        rng = random.Random(7)
+        with secure_storage.EncryptedFileReader(path, KEY) as reader:
+            assert reader.seekable()
+            for _ in range(200):
+                offset = rng.randrange(0, len(data) + 10)
+                whence = rng.choice((io.SEEK_SET, io.SEEK_END))
+                if whence == io.SEEK_END:
+                    offset = -min(offset, len(data))
+                assert reader.seek(offset, whence) == expected.seek(offset, whence)
+                count = rng.randrange(0, 3 * CHUNK)
+                assert reader.read(count) == expected.read(count)
+                assert reader.tell() == expected.tell()
+
+        # Reading a trailer only touches the last chunk(s)
+        with secure_storage.EncryptedFileReader(path, KEY) as reader:
+            reader.seek(-64, io.SEEK_END)
+            assert reader.read() == data[-64:]
+            assert reader.chunks_decrypted <= 2
+    print("✅ Random access decryption successful")
+
+
+def test_writer_abort_removes_partial_file():
+    """Test that a failed write leaves nothing behind"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.bin")
+        try:
+            with secure_storage.EncryptedFileWriter(path, KEY, CHUNK) as writer:
+                writer.write(b"x" * (2 * CHUNK))
+                raise RuntimeError("download interrupted")
+        except RuntimeError:
+            pass
+        assert not os.path.exists(path)
+        assert not os.path.exists(f"{path}.tmp")
+    print("✅ Partial file cleanup successful")
+
+
+def main():
+    print("🔐 Testing RupaGanti secure storage...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_roundtrip_sizes, test_unique_nonce_per_file,
+                 test_tamper_and_truncation_detected, test_random_access_reads,
+                 test_writer_abort_removes_partial_file):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All secure storage tests passed!")
+    else:
+        print("⚠️  Some tests failed. Please install missing dependencies:")
+        print("pip install cryptography")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script for the timer wheel scheduler
+"""
+
+import threading
+import time
+
+from timer_wheel import TimerWheel
+
+
+class InlineExecutor:
+    """Run callbacks immediately so tests can drive time by hand"""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def _wheel(slots=16):
+    wheel = TimerWheel(tick=0.1, slots=slots, executor=InlineExecutor())
+    return wheel, wheel._last_tick
+
+
+def test_fires_in_order():
+    """Test that timers fire once, after their delay, in deadline order"""
+    wheel, start = _wheel()
+    fired = []
+    wheel.schedule(0.3, lambda: fired.append('b'))
+    wheel.schedule(0.1, lambda: fired.append('a'))
+    wheel.schedule(0.75, lambda: fired.append('c'))
+
+    wheel.advance(start + 0.05)
+    assert fired == []
+    wheel.advance(start + 0.35)
+    assert fired == ['a', 'b']
+    wheel.advance(start + 1.0)
+    assert fired == ['a', 'b', 'c']
+    wheel.advance(start + 5.0)
+    assert fired == ['a', 'b', 'c']
+    print("✅ Timer ordering successful")
+
+
+def test_long_delay_wraps_wheel():
+    """Test delays longer than one wheel rotation"""
+    wheel, start = _wheel(slots=8)
+    fired = []
+    wheel.schedule(2.0, lambda: fired.append(time.monotonic()))
+    wheel.advance(start + 1.95)
+    assert fired == []
+    wheel.advance(start + 2.05)
+    assert len(fired) == 1
+    print("✅ Multi-rotation delay successful")
+
+
+def test_cancel_semantics():
+    """Test that cancel wins before firing and reports False afterwards"""
+    wheel, start = _wheel()
+    fired = []
+    cancelled = wheel.schedule(0.2, lambda: fired.append('cancelled'))
+    kept = wheel.schedule(0.2, lambda: fired.append('kept'))
+    assert cancelled.cancel() is True
+    assert cancelled.cancel() is False
+    wheel.advance(start + 0.25)
+    assert fired == ['kept']
+    assert kept.cancel() is False
+    assert wheel.pending_count() == 0
+    print("✅ Cancellation successful")
+
+
+def test_repeating_timer():
+    """Test interval timers and cancelling from inside the callback"""
+    wheel, start = _wheel()
+    ticks = []
+
+    def tick():
+        ticks.append(len(ticks))
+        if len(ticks) == 3:
+            handle.cancel()
+
+    handle = wheel.schedule(0.1, tick, interval=0.1)
+    for step in range(1, 10):
+        wheel.advance(start + step * 0.1 + 0.01)
+    assert ticks == [0, 1, 2]
+    assert not handle.active
+    print("✅ Repeating timer successful")
+
+
+def test_background_thread():
+    """Test the wheel running on its own thread"""
+    wheel = TimerWheel(tick=0.01, slots=64)
+    done = threading.Event()
+    wheel.start()
+    wheel.schedule(0.05, done.set)
+    assert done.wait(2)
+    wheel.stop()
+    print("✅ Background timer thread successful")
+
+
+def main():
+    print("⏱️ Testing RupaGanti timer wheel...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_fires_in_order, test_long_delay_wraps_wheel, test_cancel_semantics,
+                 test_repeating_timer, test_background_thread):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All timer wheel tests passed!")
+    else:
+        print("⚠️  Some timer wheel tests failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded external tool runner
+"""
+
+import sys
+import time
+import threading
+import subprocess
+from io import BytesIO
+
+import tool_runner
+
+# A stand-in tool: echoes stdin to stdout, optionally sleeping first
+ECHO = [sys.executable, '-c',
+        "import sys, time; time.sleep(float(sys.argv[1])); sys.stdout.buffer.write(sys.stdin.buffer.read())"]
+
+
+class Cancelled(Exception):
+    pass
+
+
+def test_pipes_stdin_to_stdout():
+    """Test that input and output are streamed through file-like objects"""
+    data = b'%PDF-1.4 ' * 500000
+    output = BytesIO()
+    result = tool_runner.run(ECHO + ['0'], stdin=BytesIO(data), stdout=output)
+    assert result.returncode == 0
+    assert output.getvalue() == data
+
+    try:
+        tool_runner.run([sys.executable, '-c', "import sys; sys.stderr.write('broken'); sys.exit(3)"])
+        assert False, "Expected CalledProcessError"
+    except subprocess.CalledProcessError as e:
+        assert e.returncode == 3 and e.stderr == b'broken'
+    print("✅ Stdin/stdout piping successful")
+
+
+def test_timeout_and_cancel_kill_tool():
+    """Test that the tool is killed on its own timeout and on cancellation"""
+    start = time.monotonic()
+    try:
+        tool_runner.run(ECHO + ['30'], stdin=BytesIO(b''), timeout=0.5)
+        assert False, "Expected ToolTimeout"
+    except tool_runner.ToolTimeout:
+        pass
+    assert time.monotonic() - start < 5
+
+    cancel_at = time.monotonic() + 0.5
+
+    def check():
+        if time.monotonic() > cancel_at:
+            raise Cancelled()
+
+    start = time.monotonic()
+    try:
+        tool_runner.run(ECHO + ['30'], stdin=BytesIO(b''), check=check)
+        assert False, "Expected Cancelled"
+    except Cancelled:
+        pass
+    assert time.monotonic() - start < 5
+    print("✅ Timeout and cancellation successful")
+
+
+def test_concurrency_is_bounded():
+    """Test that runs beyond the tool's slot count wait for a free slot"""
+    import multiprocessing
+    tool_runner.configure(tool_runner.create_slots(multiprocessing.get_context('spawn'), {'python-tool': 1}))
+    try:
+        finished = []
+
+        def worker():
+            tool_runner.run(ECHO + ['0.5'], stdin=BytesIO(b''), tool='python-tool')
+            finished.append(time.monotonic())
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # One slot: the second run starts only after the first finished
+        assert len(finished) == 2 and max(finished) - start >= 1.0, finished
+    finally:
+        tool_runner.configure(None)
+    print("✅ Bounded concurrency successful")
+
+
+def main():
+    print("🛠️ Testing RupaGanti tool runner...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_pipes_stdin_to_stdout, test_timeout_and_cancel_kill_tool, test_concurrency_is_bounded):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All tool runner tests passed!")
+    else:
+        print("⚠️  Some tool runner tests failed.")
+
+
+if __name__ == "__main__":
+    main()
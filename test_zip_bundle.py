@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-file ZIP bundles built from separately compressed members
+"""
+
+import os
+import zipfile
+from io import BytesIO
+
+from zip_bundle import compress_member, unique_name, write_bundle
+
+
+def _build(files):
+    """Compress each (name, data) pair and bundle them into one archive"""
+    stored = {}
+    members = []
+    used = set()
+    for name, data in files:
+        output = BytesIO()
+        member = compress_member(BytesIO(data), output, len(data))
+        path = f"member{len(members)}"
+        stored[path] = output.getvalue()
+        members.append((unique_name(name, used), path, member))
+    archive = BytesIO()
+    size = write_bundle(archive, members, lambda path: BytesIO(stored[path]), timestamp=1700000000)
+    return archive.getvalue(), size, members
+
+
+def test_bundle_round_trip():
+    """Test that stored and deflated members read back with zipfile"""
+    text = b'rupaganti multi-file archive ' * 20000
+    noise = os.urandom(300 * 1024)
+    data, size, members = _build([('notes.txt', text), ('noise.bin', noise), ('empty.txt', b'')])
+    assert size == len(data)
+    assert members[0][2]['method'] == zipfile.ZIP_DEFLATED
+    assert members[1][2]['method'] == zipfile.ZIP_STORED
+
+    with zipfile.ZipFile(BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ['notes.txt', 'noise.bin', 'empty.txt']
+        assert archive.read('notes.txt') == text
+        assert archive.read('noise.bin') == noise
+        assert archive.read('empty.txt') == b''
+    print("✅ Bundle round trip successful")
+
+
+def test_unique_names():
+    """Test that duplicate and path-like names become safe, distinct entries"""
+    used = set()
+    names = [unique_name(name, used) for name in ('a.pdf', 'A.pdf', '../x/a.pdf', 'C:\\dir\\b', 'b', '  ')]
+    assert names == ['a.pdf', 'A (2).pdf', 'a (3).pdf', 'b', 'b (2)', 'file']
+
+    data, _, _ = _build([('laporan ü.txt', b'isi')])
+    with zipfile.ZipFile(BytesIO(data)) as archive:
+        assert archive.read('laporan ü.txt') == b'isi'
+    print("✅ Unique entry names successful")
+
+
+def test_truncated_member():
+    """Test that a member shorter than recorded is rejected"""
+    member = compress_member(BytesIO(b'abc' * 1000), BytesIO(), 3000)
+    try:
+        write_bundle(BytesIO(), [('a.txt', 'a', member)], lambda path: BytesIO(b'short'))
+    except ValueError:
+        print("✅ Truncated member rejected")
+        return
+    raise AssertionError("truncated member was accepted")
+
+
+def main():
+    print("📦 Testing RupaGanti ZIP bundles...")
+    print("=" * 50)
+
+    success = True
+    for test in (test_bundle_round_trip, test_unique_names, test_truncated_member):
+        try:
+            test()
+        except Exception as e:
+            print(f"❌ {test.__name__} failed: {e}")
+            success = False
+
+    print("=" * 50)
+    if success:
+        print("🎉 All ZIP bundle tests passed!")
+    else:
+        print("⚠️  Some ZIP bundle tests failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Hashed timing wheel untuk semua deadline bot (countdown, inactivity, batch merge).
+
+Catatan:
+    - schedule() dan cancel() O(1): timer dimasukkan ke slot berdasarkan
+      jumlah tick, timer yang dibatalkan hanya ditandai dan dibuang saat
+      slotnya dilewati
+    - Semua timer dilayani oleh satu thread (atau satu coroutine di mode
+      asyncio lewat advance()), bukan satu threading.Timer per deadline
+    - Callback dijalankan di executor agar panggilan API yang lambat tidak
+      menahan timer lain
+    - Status timer diubah di bawah lock, jadi cancel() yang menang berarti
+      callback pasti tidak jalan, dan cancel() mengembalikan False jika
+      timer sudah terlanjur dieksekusi
+"""
+
+import logging
+import threading
+import time
+import concurrent.futures
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+FIRED = 'fired'
+CANCELLED = 'cancelled'
+
+
+class TimerHandle:
+    """
+    Handle satu timer di TimerWheel.
+
+    Catatan:
+        - interval diisi untuk timer berulang; timer dijadwalkan ulang setelah
+          callback selesai sehingga eksekusi tidak pernah tumpang tindih
+    """
+
+    __slots__ = ('callback', 'interval', 'rounds', 'state', '_wheel')
+
+    def __init__(self, wheel, callback, interval=None):
+        self._wheel = wheel
+        self.callback = callback
+        self.interval = interval
+        self.rounds = 0
+        self.state = PENDING
+
+    def cancel(self):
+        """
+        Membatalkan timer.
+
+        Return:
+            bool: True jika timer dibatalkan sebelum callback berikutnya jalan
+        """
+        with self._wheel._lock:
+            if self.state in (PENDING, RUNNING):
+                self.state = CANCELLED
+                return True
+            return False
+
+    @property
+    def active(self):
+        return self.state in (PENDING, RUNNING)
+
+
+class TimerWheel:
+    """
+    Scheduler timer berbasis hashed timing wheel.
+
+    Parameter:
+        tick (float): Resolusi timer dalam detik
+        slots (int): Jumlah slot wheel; satu putaran = tick * slots detik
+        executor: Executor untuk menjalankan callback, None berarti dibuat
+                  ThreadPoolExecutor kecil saat dibutuhkan
+    """
+
+    def __init__(self, tick=0.1, slots=1024, executor=None):
+        self.tick = tick
+        self.slots = slots
+        self.executor = executor
+        self._wheel = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._last_tick = time.monotonic()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def pending_count(self):
+        """
+        Menghitung timer yang masih menunggu (untuk monitoring, bukan O(1)).
+        """
+        with self._lock:
+            return sum(1 for bucket in self._wheel for handle in bucket if handle.state == PENDING)
+
+    def schedule(self, delay, callback, interval=None):
+        """
+        Menjadwalkan callback setelah delay detik.
+
+        Parameter:
+            delay (float): Waktu tunggu dalam detik
+            callback (callable): Fungsi tanpa argumen
+            interval (float): Jika diisi, callback diulang setiap interval detik
+                              sampai handle dibatalkan
+
+        Return:
+            TimerHandle: Handle dengan method cancel()
+        """
+        handle = TimerHandle(self, callback, interval)
+        with self._lock:
+            self._insert(handle, delay)
+        return handle
+
+    def _insert(self, handle, delay):
+        # Must be called with the lock held
+        ticks = max(1, int(-(-delay // self.tick)))  # Round up, at least one tick
+        handle.rounds = (ticks - 1) // self.slots
+        self._wheel[(self._cursor + ticks) % self.slots].append(handle)
+
+    def advance(self, now=None):
+        """
+        Memajukan wheel sesuai waktu yang sudah lewat dan menjalankan timer jatuh tempo.
+
+        Parameter:
+            now (float): Waktu time.monotonic(), default waktu sekarang
+
+        Return:
+            int: Jumlah callback yang dijalankan
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            while now - self._last_tick >= self.tick:
+                self._last_tick += self.tick
+                self._cursor = (self._cursor + 1) % self.slots
+                bucket = self._wheel[self._cursor]
+                if not bucket:
+                    continue
+                remaining = []
+                for handle in bucket:
+                    if handle.state != PENDING:
+                        continue
+                    if handle.rounds > 0:
+                        handle.rounds -= 1
+                        remaining.append(handle)
+                    else:
+                        handle.state = RUNNING if handle.interval else FIRED
+                        due.append(handle)
+                self._wheel[self._cursor] = remaining
+
+        for handle in due:
+            self._dispatch(handle)
+        return len(due)
+
+    def _dispatch(self, handle):
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='timer')
+        try:
+            self.executor.submit(self._run, handle)
+        except RuntimeError:
+            # Executor shut down during exit
+            pass
+
+    def _run(self, handle):
+        try:
+            handle.callback()
+        except Exception as e:
+            logger.error(f"Timer callback error: {str(e)}")
+        finally:
+            if handle.interval:
+                with self._lock:
+                    if handle.state == RUNNING:
+                        handle.state = PENDING
+                        self._insert(handle, handle.interval)
+
+    def start(self):
+        """
+        Menjalankan wheel di satu background thread (idempotent).
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._last_tick = time.monotonic()
+            self._thread = threading.Thread(target=self._loop, name='timer-wheel', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            next_tick = self._last_tick + self.tick
+            self._stopped.wait(max(0.0, next_tick - time.monotonic()))
+            try:
+                self.advance()
+            except Exception as e:
+                logger.error(f"Timer wheel error: {str(e)}")
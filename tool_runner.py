@@ -0,0 +1,226 @@
+"""
+Runner tool eksternal (gs, ffmpeg) untuk proses worker konversi.
+
+Catatan:
+    - Jumlah proses gs/ffmpeg yang berjalan bersamaan dibatasi per tool
+      dengan semaphore; proses bot membuat semaphore lewat create_slots()
+      dan membagikannya ke semua worker, sehingga batasnya berlaku lintas
+      worker dan lonjakan trafik tidak menumpuk proses gs tanpa batas
+    - Saat menunggu slot maupun saat tool berjalan, fungsi check() dipanggil
+      berkala; jika raise (dibatalkan atau melewati deadline job), proses
+      tool langsung di-kill
+    - Setiap tool punya timeout sendiri (TOOL_TIMEOUTS) yang tidak boleh
+      melewati sisa waktu job
+    - stdin/stdout bisa disambungkan ke objek file-like (misalnya
+      EncryptedFileReader/EncryptedFileWriter) dan disalin per chunk di
+      thread terpisah, sehingga hasil tool tidak perlu ditulis ke disk
+      sebagai plaintext
+"""
+
+import os
+import time
+import threading
+import subprocess
+
+CHUNK_SIZE = 1024 * 1024
+POLL_INTERVAL = 0.5  # Seconds between cancellation checks
+STDERR_TAIL = 4096  # Bytes of stderr kept for error messages
+_DEFAULT_CONCURRENCY = max(1, (os.cpu_count() or 2) // 2)
+TOOL_CONCURRENCY = {  # Simultaneous processes per tool across all workers
+    'gs': _DEFAULT_CONCURRENCY,
+    'ffmpeg': _DEFAULT_CONCURRENCY,
+}
+TOOL_TIMEOUTS = {  # Per invocation limit in seconds; other tools only get the job deadline
+    'gs': 120,
+    'ffprobe': 30,
+}
+
+_slots = {}
+_slots_lock = threading.Lock()
+
+
+class ToolTimeout(subprocess.TimeoutExpired):
+    """Tool eksternal melewati timeout-nya sendiri."""
+
+
+def create_slots(mp_context, concurrency=None):
+    """
+    Membuat semaphore lintas proses untuk setiap tool.
+
+    Parameter:
+        mp_context: Context multiprocessing yang dipakai pool worker
+        concurrency (dict): Nama tool -> jumlah slot, default TOOL_CONCURRENCY
+
+    Return:
+        dict: Nama tool -> BoundedSemaphore, diberikan ke configure() di worker
+    """
+    concurrency = concurrency or TOOL_CONCURRENCY
+    return {tool: mp_context.BoundedSemaphore(limit) for tool, limit in concurrency.items()}
+
+
+def configure(slots):
+    """
+    Memasang semaphore dari create_slots() di proses worker.
+
+    Catatan:
+        - Tanpa configure(), setiap proses memakai semaphore lokalnya sendiri
+    """
+    with _slots_lock:
+        _slots.clear()
+        _slots.update(slots or {})
+
+
+def _get_slot(tool):
+    with _slots_lock:
+        slot = _slots.get(tool)
+        if slot is None and tool in TOOL_CONCURRENCY:
+            slot = _slots[tool] = threading.BoundedSemaphore(TOOL_CONCURRENCY[tool])
+        return slot
+
+
+def _acquire(slot, deadline, check):
+    while True:
+        if check:
+            check()
+        wait = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.monotonic())
+        if wait <= 0:
+            return False
+        if slot.acquire(timeout=wait):
+            return True
+
+
+def _feed(source, pipe):
+    # Copy a file-like object into the tool's stdin, then signal EOF
+    try:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            pipe.write(chunk)
+    except (BrokenPipeError, ValueError, OSError):
+        pass  # The tool exited or was killed; its return code tells the rest
+    finally:
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+def _drain(pipe, target, errors):
+    # Copy the tool's stdout into a file-like object
+    try:
+        while True:
+            chunk = pipe.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            target.write(chunk)
+    except Exception as e:
+        # Closing our end makes the tool fail with a broken pipe instead of blocking
+        errors.append(e)
+        pipe.close()
+
+
+def _collect_tail(pipe, tail, on_line):
+    # Keep only the end of stderr; tools like ffmpeg log continuously
+    size = 0
+    chunks = iter(pipe.readline, b'') if on_line else iter(lambda: pipe.read(STDERR_TAIL), b'')
+    for chunk in chunks:
+        if on_line:
+            try:
+                on_line(chunk)
+            except Exception:
+                pass  # A broken progress consumer must not stall the tool
+        tail.append(chunk)
+        size += len(chunk)
+        while size - len(tail[0]) >= STDERR_TAIL:
+            size -= len(tail.pop(0))
+
+
+def _kill(process):
+    try:
+        process.kill()
+    except OSError:
+        pass
+    process.wait()
+
+
+def run(args, check=None, timeout=None, stdin=None, stdout=None, cwd=None, tool=None, on_stderr_line=None):
+    """
+    Menjalankan satu tool eksternal dengan slot terbatas, timeout, dan pembatalan.
+
+    Parameter:
+        args (list): Perintah tool
+        check (callable): Dipanggil berkala; jika raise, tool di-kill dan
+                          exception diteruskan
+        timeout (float): Batas waktu dalam detik termasuk menunggu slot,
+                         default TOOL_TIMEOUTS untuk tool tersebut
+        stdin: File-like yang dialirkan ke stdin tool, boleh None
+        stdout: File-like tujuan stdout tool, boleh None (stdout dibuang)
+        cwd (str): Direktori kerja tool
+        tool (str): Nama slot dan timeout, default nama file args[0]
+        on_stderr_line (callable): Dipanggil untuk setiap baris stderr (bytes),
+                                   misalnya untuk membaca progress ffmpeg
+
+    Return:
+        subprocess.CompletedProcess: stdout None, stderr berisi bagian akhir log
+
+    Catatan:
+        - Akan raise ToolTimeout jika timeout habis
+        - Akan raise CalledProcessError jika tool keluar dengan kode selain 0
+        - Objek stdout tidak ditutup; pemanggil yang menutupnya
+    """
+    tool = tool or os.path.basename(args[0])
+    if timeout is None:
+        timeout = TOOL_TIMEOUTS.get(tool)
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    slot = _get_slot(tool)
+    if slot is not None and not _acquire(slot, deadline, check):
+        raise ToolTimeout(args, timeout)
+    try:
+        process = subprocess.Popen(args, cwd=cwd,
+                                   stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE if stdout is not None else subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE)
+        tail = []
+        threads = [threading.Thread(target=_collect_tail, args=(process.stderr, tail, on_stderr_line), daemon=True)]
+        if stdin is not None:
+            threads.append(threading.Thread(target=_feed, args=(stdin, process.stdin), daemon=True))
+        errors = []
+        if stdout is not None:
+            threads.append(threading.Thread(target=_drain, args=(process.stdout, stdout, errors), daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                try:
+                    process.wait(timeout=POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                if check:
+                    check()
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise ToolTimeout(args, timeout)
+        except BaseException:
+            _kill(process)
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+            for pipe in (process.stdin, process.stdout, process.stderr):
+                if pipe is not None and not pipe.closed:
+                    try:
+                        pipe.close()
+                    except OSError:
+                        pass
+    finally:
+        if slot is not None:
+            slot.release()
+
+    if errors:
+        raise errors[0]  # Writing the output failed (e.g. disk full)
+    stderr = b''.join(tail)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, args, stderr=stderr)
+    return subprocess.CompletedProcess(args, process.returncode, None, stderr)
@@ -0,0 +1,169 @@
+"""
+Arsip ZIP multi-file dari member yang dikompres terpisah (sesi ZIP).
+
+Catatan:
+    - Setiap file dikompres sendiri menjadi data DEFLATE mentah atau disimpan
+      apa adanya (compress_member), sehingga file bisa dikompres paralel di
+      worker berbeda selagi file berikutnya masih diunggah
+    - write_bundle() hanya menyalin data member ke satu arsip beserta header
+      lokal dan central directory, tanpa kompresi ulang
+    - CRC dan ukuran sudah diketahui sebelum header ditulis, jadi output
+      tidak perlu seekable dan tidak butuh data descriptor
+    - ZIP64 tidak didukung; total arsip dibatasi 4 GB, jauh di atas batas
+      ukuran file bot
+"""
+
+import time
+import zlib
+import struct
+import zipfile
+
+from archive_planner import plan_zip, sample_blocks
+
+CHUNK_SIZE = 1024 * 1024
+ZIP_LIMIT = 0xFFFFFFFF  # Largest size or offset without ZIP64
+ZIP_VERSION = 20  # Version needed to extract: DEFLATE
+MADE_BY = (3 << 8) | ZIP_VERSION  # Unix, so the file mode in the external attributes is used
+FILE_MODE = 0o100644
+UTF8_FLAG = 0x800
+
+_LOCAL_HEADER = struct.Struct('<4sHHHHHLLLHH')
+_CENTRAL_HEADER = struct.Struct('<4sHHHHHHLLLHHHHHLL')
+_END_RECORD = struct.Struct('<4sHHHHLLH')
+
+
+def compress_member(reader, writer, size, check=None, on_progress=None):
+    """
+    Mengompres satu file menjadi data member ZIP mentah.
+
+    Parameter:
+        reader: File-like seekable berisi data asli
+        writer: File-like tujuan data terkompresi
+        size (int): Ukuran data asli dalam byte
+        check (callable): Dipanggil per chunk; raise untuk membatalkan
+        on_progress (callable): Dipanggil dengan fraksi selesai 0-1
+
+    Return:
+        dict: {'method', 'crc', 'file_size', 'compress_size'} untuk write_bundle()
+
+    Catatan:
+        - Metode dan level dipilih dari sampel isi file (archive_planner)
+    """
+    method, level, _ = plan_zip(sample_blocks(reader, size))
+    reader.seek(0)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15) if method == zipfile.ZIP_DEFLATED else None
+    crc = 0
+    file_size = 0
+    compress_size = 0
+    while True:
+        if check:
+            check()
+        chunk = reader.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        crc = zlib.crc32(chunk, crc)
+        file_size += len(chunk)
+        data = compressor.compress(chunk) if compressor else chunk
+        writer.write(data)
+        compress_size += len(data)
+        if on_progress:
+            on_progress(file_size / max(size, 1))
+    if compressor:
+        data = compressor.flush()
+        writer.write(data)
+        compress_size += len(data)
+    return {'method': method, 'crc': crc, 'file_size': file_size, 'compress_size': compress_size}
+
+
+def unique_name(name, used):
+    """
+    Membuat nama entry yang aman dan belum dipakai di arsip.
+
+    Parameter:
+        name (str): Nama file asli dari pengguna
+        used (set): Nama yang sudah dipakai; nama baru ditambahkan ke sini
+
+    Return:
+        str: Nama tanpa komponen direktori, diberi akhiran (2), (3), ...
+             jika sudah ada
+    """
+    name = name.replace('\\', '/').rsplit('/', 1)[-1].strip() or 'file'
+    stem, dot, ext = name.rpartition('.')
+    if not dot:
+        stem, ext = name, ''
+    candidate = name
+    counter = 2
+    while candidate.lower() in used:
+        candidate = f"{stem} ({counter}).{ext}" if dot else f"{stem} ({counter})"
+        counter += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def _dos_time(timestamp):
+    t = time.localtime(timestamp)
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((max(t.tm_year, 1980) - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def write_bundle(writer, members, open_member, check=None, timestamp=None):
+    """
+    Menulis arsip ZIP dari member hasil compress_member().
+
+    Parameter:
+        writer: File-like tujuan arsip, tidak perlu seekable
+        members (list): [(nama entry, path member, dict dari compress_member())]
+        open_member (callable): Membuka path member sebagai file-like untuk dibaca
+        check (callable): Dipanggil per chunk; raise untuk membatalkan
+        timestamp (float): Waktu modifikasi semua entry, default sekarang
+
+    Return:
+        int: Ukuran arsip dalam byte
+
+    Catatan:
+        - Nama entry dipakai apa adanya; gunakan unique_name() terlebih dahulu
+        - Akan raise ValueError jika arsip melewati batas tanpa ZIP64
+    """
+    dos_time, dos_date = _dos_time(time.time() if timestamp is None else timestamp)
+    if len(members) > 0xFFFF:
+        raise ValueError("Too many files for one archive")
+    offset = 0
+    central = []
+    for name, path, info in members:
+        if offset > ZIP_LIMIT or info['file_size'] > ZIP_LIMIT or info['compress_size'] > ZIP_LIMIT:
+            raise ValueError("Archive too large")
+        try:
+            encoded = name.encode('ascii')
+            flags = 0
+        except UnicodeEncodeError:
+            encoded = name.encode('utf-8')
+            flags = UTF8_FLAG
+        fields = (ZIP_VERSION, flags, info['method'], dos_time, dos_date,
+                  info['crc'], info['compress_size'], info['file_size'], len(encoded))
+        header = _LOCAL_HEADER.pack(b'PK\x03\x04', *fields, 0) + encoded
+        writer.write(header)
+        central.append(_CENTRAL_HEADER.pack(b'PK\x01\x02', MADE_BY, *fields, 0, 0, 0, 0,
+                                            FILE_MODE << 16, offset) + encoded)
+        offset += len(header)
+
+        copied = 0
+        with open_member(path) as member:
+            while True:
+                if check:
+                    check()
+                chunk = member.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                copied += len(chunk)
+        if copied != info['compress_size']:
+            raise ValueError(f"Member {name} is truncated")
+        offset += copied
+
+    central_size = sum(len(entry) for entry in central)
+    if offset + central_size > ZIP_LIMIT:
+        raise ValueError("Archive too large")
+    for entry in central:
+        writer.write(entry)
+    writer.write(_END_RECORD.pack(b'PK\x05\x06', 0, 0, len(central), len(central), central_size, offset, 0))
+    return offset + central_size + _END_RECORD.size